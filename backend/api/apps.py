@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        # 為替レート表をバックグラウンドで定期的に取得し直す
+        if getattr(settings, 'EXCHANGE_RATE_REFRESHER_ENABLED', False):
+            from .services.currency_refresher import refresher
+            refresher.start()
@@ -0,0 +1,201 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncRequestFactory
+from rest_framework.test import APIRequestFactory
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Awaitable, Callable, List, Tuple
+import asyncio
+import copy
+import threading
+import time
+from api.services.ebay import EbayService
+from api.services.ebay_scheduler import scheduler
+from api.services.http_client import async_http
+from api.services.scraping.yahoo_auction import YahooAuctionService
+from api.views.scraping import YahooAuctionItemSearchView, AsyncYahooAuctionItemSearchView
+from .benchmark_ebay import SAMPLE_PRODUCT
+from .ebay_stub_server import start_stub_server
+
+class SearchStubServer(ThreadingHTTPServer):
+    """ヤフオクの検索結果ページのローカルスタブ（1ページ分の商品を遅延付きで返す）"""
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, latency_ms: float, items: int):
+        super().__init__(('127.0.0.1', 0), SearchStubHandler)
+        self.latency_ms = latency_ms
+        products = ''.join(
+            f'<li class="Product"><h3 class="Product__title"><a class="Product__titleLink" '
+            f'href="https://page.auctions.yahoo.co.jp/jp/auction/x{i}">Item {i}</a></h3>'
+            f'<div class="Product__price"><span class="Product__label">現在</span>'
+            f'<span class="Product__priceValue">{1000 + i}円</span></div></li>'
+            for i in range(items)
+        )
+        self.body = (
+            f'<html><body><div class="SearchMode__result">約{items}件</div><ul>{products}</ul></body></html>'
+        ).encode('utf-8')
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/search/search"
+
+class SearchStubHandler(BaseHTTPRequestHandler):
+    server: SearchStubServer
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        time.sleep(self.server.latency_ms / 1000)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(self.server.body)))
+        self.end_headers()
+        self.wfile.write(self.server.body)
+
+    def log_message(self, format, *args):
+        pass
+
+class Command(BaseCommand):
+    help = '外部APIを呼ぶビューを、同期版（WSGIのワーカー数だけ同時に処理）と非同期版（1プロセスのイベントループ）で比較します'
+
+    SCENARIOS = ('search', 'register')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', choices=self.SCENARIOS + ('all',), default='all')
+        parser.add_argument('--requests', type=int, default=400, help='シナリオごとのリクエスト数')
+        parser.add_argument('--concurrency', type=int, default=200, help='同時に送るリクエスト数')
+        parser.add_argument('--wsgi-workers', type=int, default=8, help='WSGIで同時に処理できるリクエスト数（ワーカー数×スレッド数）')
+        parser.add_argument('--latency-ms', type=float, default=200, help='スタブの遅延（ミリ秒）')
+        parser.add_argument('--items', type=int, default=20, help='検索結果のスタブの商品数')
+
+    def handle(self, *args, **options):
+        for name in ('requests', 'concurrency', 'wsgi_workers'):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')}は1以上を指定してください")
+        search_server = SearchStubServer(options['latency_ms'], options['items'])
+        threading.Thread(target=search_server.serve_forever, daemon=True).start()
+        ebay_server = start_stub_server(latency_ms=options['latency_ms'])
+
+        base_url = YahooAuctionService.BASE_URL
+        YahooAuctionService.BASE_URL = search_server.url
+        # eBayの同時実行数の上限は両方の方式で同じにする
+        scheduler.daily_quota = 10 ** 9
+        scheduler.set_max_concurrency(options['concurrency'])
+        service = EbayService.from_credentials(
+            client_id='benchmark-app',
+            client_secret='benchmark-cert',
+            dev_id='benchmark-dev',
+            auth_token='benchmark-token',
+            base_url=ebay_server.url,
+        )
+
+        sync_search = YahooAuctionItemSearchView.as_view()
+        async_search = AsyncYahooAuctionItemSearchView.as_view()
+        sync_factory = APIRequestFactory()
+        async_factory = AsyncRequestFactory()
+
+        def search(i: int) -> Any:
+            response = sync_search(sync_factory.get('/api/v1/search/yahoo-auction/items/', {'p': f'camera {i}'}))
+            return response.status_code == 200
+
+        async def async_search_call(i: int) -> Any:
+            response = await async_search(async_factory.get('/api/v1/search/yahoo-auction/items/', {'p': f'camera {i}'}))
+            return response.status_code == 200
+
+        def register(i: int) -> Any:
+            return service.register_product(copy.deepcopy(SAMPLE_PRODUCT))
+
+        async def async_register(i: int) -> Any:
+            return await service.async_register_product(copy.deepcopy(SAMPLE_PRODUCT))
+
+        scenarios = {
+            'search': (search, async_search_call),
+            'register': (register, async_register),
+        }
+        names = self.SCENARIOS if options['scenario'] == 'all' else (options['scenario'],)
+
+        self.stdout.write(
+            f"requests={options['requests']} concurrency={options['concurrency']} "
+            f"wsgi_workers={options['wsgi_workers']} latency={options['latency_ms']}ms"
+        )
+        self.stdout.write(f"{'scenario':<10} {'mode':<6} {'ok':>6} {'errors':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+        try:
+            for name in names:
+                sync_func, async_func = scenarios[name]
+                self._write(name, 'wsgi', *self._run_wsgi(sync_func, options['requests'], options['wsgi_workers']))
+                self._write(name, 'asgi', *asyncio.run(self._run_asgi(async_func, options['requests'], options['concurrency'])))
+        finally:
+            YahooAuctionService.BASE_URL = base_url
+            for server in (search_server, ebay_server):
+                server.shutdown()
+                server.server_close()
+
+    @staticmethod
+    def _run_wsgi(func: Callable[[int], Any], total: int, workers: int) -> Tuple[List[float], int, float]:
+        """同期版をWSGIのワーカー数のスレッドで処理（それ以上のリクエストは空きを待つ）"""
+        def task(i: int) -> Tuple[float, bool]:
+            started_at = time.perf_counter()
+            try:
+                ok = func(i) is not False
+            except Exception:
+                ok = False
+            return time.perf_counter() - started_at, ok
+
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(task, range(total)))
+        elapsed = time.perf_counter() - started_at
+        # 待ち時間を含めたレイテンシはリクエストを送ってから応答までの時間にする
+        latencies = Command._queued_latencies([latency for latency, _ in results], workers)
+        return latencies, sum(1 for _, ok in results if not ok), elapsed
+
+    @staticmethod
+    async def _run_asgi(func: Callable[[int], Awaitable[Any]], total: int, concurrency: int) -> Tuple[List[float], int, float]:
+        """非同期版を1つのイベントループで処理（同時にconcurrency件まで）"""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def task(i: int) -> Tuple[float, bool]:
+            async with semaphore:
+                started_at = time.perf_counter()
+                try:
+                    ok = await func(i) is not False
+                except Exception:
+                    ok = False
+                return time.perf_counter() - started_at, ok
+
+        started_at = time.perf_counter()
+        try:
+            results = await asyncio.gather(*[task(i) for i in range(total)])
+        finally:
+            await async_http.aclose()
+        elapsed = time.perf_counter() - started_at
+        return sorted(latency for latency, _ in results), sum(1 for _, ok in results if not ok), elapsed
+
+    @staticmethod
+    def _queued_latencies(service_times: List[float], workers: int) -> List[float]:
+        """
+        全リクエストを同時に送った場合の応答時間（ワーカーの空き待ちを含む）
+
+        ThreadPoolExecutorは先着順に処理するため、i番目のリクエストは
+        前のリクエストの処理時間の分だけ待ってから処理される。
+        """
+        finish_times = [0.0] * workers
+        latencies = []
+        for service_time in service_times:
+            worker = min(range(workers), key=finish_times.__getitem__)
+            finish_times[worker] += service_time
+            latencies.append(finish_times[worker])
+        return sorted(latencies)
+
+    def _write(self, name: str, mode: str, latencies: List[float], errors: int, elapsed: float) -> None:
+        total = len(latencies)
+        self.stdout.write(
+            f"{name:<10} {mode:<6} {total - errors:>6} {errors:>6} {total / elapsed:>9.1f} "
+            f"{self._percentile(latencies, 0.50):>9.1f} {self._percentile(latencies, 0.95):>9.1f} "
+            f"{latencies[-1] * 1000:>9.1f}"
+        )
+
+    @staticmethod
+    def _percentile(sorted_values: List[float], quantile: float) -> float:
+        index = min(int(round(quantile * (len(sorted_values) - 1))), len(sorted_values) - 1)
+        return sorted_values[index] * 1000
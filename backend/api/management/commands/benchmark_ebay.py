@@ -0,0 +1,129 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+import copy
+import time
+from api.services.ebay import EbayService
+from api.services.ebay_scheduler import scheduler
+from api.services.metrics import api_metrics
+from .ebay_stub_server import start_stub_server
+
+# register_productに渡す出品データ（USD建てのため為替APIは呼ばれない）
+SAMPLE_PRODUCT = {
+    'title': 'Canon PowerShot G7 X Mark II Digital Camera',
+    'description': 'Used, excellent condition. Shipped from Japan.',
+    'primaryCategory': {'categoryId': '31388'},
+    'startPrice': {'value': '350.00', 'currencyId': 'USD'},
+    'quantity': 1,
+    'listingDuration': 'GTC',
+    'listingType': 'FixedPriceItem',
+    'country': 'JP',
+    'currency': 'USD',
+    'paymentMethods': ['PayPal'],
+    'condition': {'conditionId': '3000'},
+    'returnPolicy': {'returnsAccepted': True, 'returnsPeriod': 'Days_30', 'returnsDescription': ''},
+    'shippingDetails': {
+        'shippingServiceOptions': [
+            {'shippingService': 'EconomyShippingFromOutsideUS', 'shippingServiceCost': {'value': '25.00'}},
+        ],
+    },
+}
+
+class Command(BaseCommand):
+    help = 'ローカルスタブ（または指定したURL）に対してEbayServiceの負荷テストを行います'
+
+    SCENARIOS = ('register', 'token', 'get_item')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', choices=self.SCENARIOS + ('all',), default='all')
+        parser.add_argument('--requests', type=int, default=200, help='シナリオごとのリクエスト数')
+        parser.add_argument('--concurrency', type=int, default=10, help='同時実行数')
+        parser.add_argument('--base-url', help='既に起動しているスタブのURL（省略時はプロセス内でスタブを起動）')
+        parser.add_argument('--latency-ms', type=float, default=100, help='プロセス内スタブの遅延（ミリ秒）')
+        parser.add_argument('--jitter-ms', type=float, default=30, help='プロセス内スタブの遅延のばらつき（ミリ秒）')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='プロセス内スタブがRequestErrorを返す割合')
+        parser.add_argument('--system-error-rate', type=float, default=0.0, help='プロセス内スタブがSystemErrorを返す割合')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requestsは1以上を指定してください')
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrencyは1以上を指定してください')
+        server = None
+        base_url = options['base_url']
+        if not base_url:
+            server = start_stub_server(
+                latency_ms=options['latency_ms'],
+                jitter_ms=options['jitter_ms'],
+                error_rate=options['error_rate'],
+                system_error_rate=options['system_error_rate'],
+            )
+            base_url = server.url
+
+        # 本番の呼び出し回数やトークンのキャッシュと混ざらないよう専用のアプリIDを使う
+        service = EbayService.from_credentials(
+            client_id='benchmark-app',
+            client_secret='benchmark-cert',
+            dev_id='benchmark-dev',
+            auth_token='benchmark-token',
+            base_url=base_url,
+        )
+        scheduler.daily_quota = 10 ** 9
+        scheduler.set_max_concurrency(options['concurrency'])
+        api_metrics.reset()
+
+        scenarios: Dict[str, Callable[[int], object]] = {
+            'register': lambda i: service.register_product(copy.deepcopy(SAMPLE_PRODUCT)),
+            'token': lambda i: self._refresh_token(service),
+            'get_item': lambda i: service.get_item(str(110000000000 + i), use_cache=False),
+        }
+        names = self.SCENARIOS if options['scenario'] == 'all' else (options['scenario'],)
+
+        self.stdout.write(f"target={base_url} requests={options['requests']} concurrency={options['concurrency']}")
+        self.stdout.write(f"{'scenario':<10} {'ok':>6} {'errors':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        try:
+            for name in names:
+                self._run(name, scenarios[name], options['requests'], options['concurrency'])
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+    def _run(self, name: str, func: Callable[[int], object], total: int, concurrency: int) -> None:
+        latencies: List[float] = []
+        errors = 0
+
+        def task(i: int):
+            started_at = time.perf_counter()
+            try:
+                func(i)
+                return time.perf_counter() - started_at, None
+            except Exception as e:
+                return time.perf_counter() - started_at, e
+
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for latency, error in executor.map(task, range(total)):
+                latencies.append(latency)
+                if error is not None:
+                    errors += 1
+        elapsed = time.perf_counter() - started_at
+
+        latencies.sort()
+        self.stdout.write(
+            f"{name:<10} {total - errors:>6} {errors:>6} {total / elapsed:>9.1f} "
+            f"{self._percentile(latencies, 0.50):>9.1f} {self._percentile(latencies, 0.95):>9.1f} "
+            f"{self._percentile(latencies, 0.99):>9.1f} {latencies[-1] * 1000:>9.1f}"
+        )
+
+    @staticmethod
+    def _refresh_token(service: EbayService) -> str:
+        # キャッシュ済みのトークンを消して毎回トークン取得を発生させる
+        cache.delete(f"ebay_access_token:{service.client_id}")
+        return service._get_access_token()
+
+    @staticmethod
+    def _percentile(sorted_values: List[float], quantile: float) -> float:
+        index = min(int(round(quantile * (len(sorted_values) - 1))), len(sorted_values) - 1)
+        return sorted_values[index] * 1000
@@ -0,0 +1,144 @@
+from django.core.management.base import BaseCommand
+from typing import Any, Callable, Dict
+from xml.etree import ElementTree
+import timeit
+from api.services.ebay_response import NS, decode_response
+
+def build_add_item_response(fee_count: int = 25, warning_count: int = 1) -> bytes:
+    """AddFixedPriceItemの成功レスポンス（手数料一覧と警告付き）"""
+    warnings = ''.join(
+        f'<Errors><ShortMessage>Warning</ShortMessage><LongMessage>Listing warning {i}</LongMessage>'
+        f'<ErrorCode>21917108</ErrorCode><SeverityCode>Warning</SeverityCode>'
+        f'<ErrorClassification>RequestError</ErrorClassification></Errors>'
+        for i in range(warning_count)
+    )
+    fees = ''.join(
+        f'<Fee><Name>Fee{i}</Name><Fee currencyID="USD">{i * 0.05:.2f}</Fee></Fee>'
+        for i in range(fee_count)
+    )
+    return (
+        f'<?xml version="1.0" encoding="UTF-8"?><AddFixedPriceItemResponse xmlns="{NS}">'
+        f'<Timestamp>2025-01-01T00:00:00.000Z</Timestamp><Ack>Warning</Ack>{warnings}'
+        f'<Version>1173</Version><Build>E1173</Build><ItemID>110000000001</ItemID>'
+        f'<StartTime>2025-01-01T00:00:00.000Z</StartTime><EndTime>2025-01-31T00:00:00.000Z</EndTime>'
+        f'<Fees>{fees}</Fees></AddFixedPriceItemResponse>'
+    ).encode('utf-8')
+
+def build_get_item_response(specifics: int = 30, pictures: int = 12) -> bytes:
+    """GetItem（DetailLevel=ReturnAll）のレスポンス"""
+    name_values = ''.join(
+        f'<NameValueList><Name>Spec{i}</Name><Value>Value{i}</Value></NameValueList>'
+        for i in range(specifics)
+    )
+    picture_urls = ''.join(
+        f'<PictureURL>https://i.ebayimg.com/images/g/{i}/s-l1600.jpg</PictureURL>'
+        for i in range(pictures)
+    )
+    return (
+        f'<?xml version="1.0" encoding="UTF-8"?><GetItemResponse xmlns="{NS}">'
+        f'<Timestamp>2025-01-01T00:00:00.000Z</Timestamp><Ack>Success</Ack>'
+        f'<Version>1173</Version><Build>E1173</Build><Item>'
+        f'<AutoPay>false</AutoPay><BuyerProtection>ItemIneligible</BuyerProtection>'
+        f'<Country>JP</Country><Currency>USD</Currency>'
+        f'<Description>{"&lt;p&gt;Shipped from Japan.&lt;/p&gt;" * 80}</Description>'
+        f'<ItemID>110000000001</ItemID>'
+        f'<ListingDetails><StartTime>2025-01-01T00:00:00.000Z</StartTime>'
+        f'<EndTime>2025-01-31T00:00:00.000Z</EndTime>'
+        f'<ViewItemURL>https://www.ebay.com/itm/110000000001</ViewItemURL></ListingDetails>'
+        f'<ItemSpecifics>{name_values}</ItemSpecifics>'
+        f'<PictureDetails>{picture_urls}</PictureDetails>'
+        f'<Quantity>1</Quantity>'
+        f'<SellingStatus><BidCount>0</BidCount><ConvertedCurrentPrice currencyID="USD">350.0</ConvertedCurrentPrice>'
+        f'<CurrentPrice currencyID="USD">350.0</CurrentPrice><QuantitySold>0</QuantitySold>'
+        f'<ListingStatus>Active</ListingStatus></SellingStatus>'
+        f'<Title>Canon PowerShot G7 X Mark II</Title></Item></GetItemResponse>'
+    ).encode('utf-8')
+
+def legacy_decode_add_item(content: bytes) -> Dict[str, Any]:
+    """変更前の_send_requestとregister_productと同じ探索"""
+    root = ElementTree.fromstring(content)
+    errors = root.findall(f'.//{{{NS}}}Errors')
+    messages = []
+    for error in errors:
+        error_id = error.find(f'{{{NS}}}ErrorCode')
+        error_message = error.find(f'{{{NS}}}LongMessage')
+        if error_message is not None:
+            messages.append(f"Error {error_id.text if error_id is not None else 'Unknown'}: {error_message.text}")
+    item_id = root.find(f'.//{{{NS}}}ItemID')
+    fee_list = []
+    for fee in root.findall(f'.//{{{NS}}}Fee'):
+        name = fee.find(f'{{{NS}}}Name')
+        amount = fee.find(f'.//{{{NS}}}Amount')
+        if name is not None and amount is not None:
+            fee_list.append({'Name': name.text, 'Amount': amount.text})
+    return {'errors': messages, 'ItemID': item_id.text, 'Fees': fee_list}
+
+def legacy_decode_get_item(content: bytes) -> Dict[str, Any]:
+    """変更前の_send_requestとget_itemと同じ探索"""
+    root = ElementTree.fromstring(content)
+    root.findall(f'.//{{{NS}}}Errors')
+    item = root.find(f'.//{{{NS}}}Item')
+
+    def text(path):
+        el = item.find(f'.//{{{NS}}}{path}')
+        return el.text if el is not None else None
+
+    current_price = item.find(f'.//{{{NS}}}CurrentPrice')
+    return {
+        'ItemID': text('ItemID'),
+        'Title': text('Title'),
+        'Description': text('Description'),
+        'CurrentPrice': current_price.text,
+        'CurrencyID': current_price.get('currencyID'),
+        'ListingStatus': text('ListingStatus'),
+        'ViewItemURL': text('ViewItemURL'),
+    }
+
+def decode_add_item(content: bytes) -> Dict[str, Any]:
+    response = decode_response(content)
+    return {
+        'errors': [error.long_message for error in response.error_list],
+        'ItemID': response.item_id,
+        'Fees': [{'Name': fee.name, 'Amount': fee.amount} for fee in response.fees],
+    }
+
+def decode_get_item(content: bytes) -> Dict[str, Any]:
+    item = decode_response(content).item
+    return {
+        'ItemID': item.item_id,
+        'Title': item.title,
+        'Description': item.description,
+        'CurrentPrice': item.current_price,
+        'CurrencyID': item.currency_id,
+        'ListingStatus': item.listing_status,
+        'ViewItemURL': item.view_item_url,
+    }
+
+class Command(BaseCommand):
+    help = 'Trading APIレスポンスの解析処理（変更前の探索と一括走査）を比較します'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=2000, help='1回の計測での実行回数')
+        parser.add_argument('--repeat', type=int, default=5, help='計測の繰り返し回数（最短時間を採用）')
+
+    def handle(self, *args, **options):
+        cases = [
+            ('AddFixedPriceItem', build_add_item_response(), legacy_decode_add_item, decode_add_item),
+            ('GetItem', build_get_item_response(), legacy_decode_get_item, decode_get_item),
+        ]
+        self.stdout.write(f"{'response':<18} {'bytes':>7} {'legacy us':>10} {'decoder us':>11} {'parse us':>9} {'speedup':>8}")
+        for name, content, legacy, decoder in cases:
+            legacy_time = self._measure(lambda: legacy(content), options)
+            decoder_time = self._measure(lambda: decoder(content), options)
+            # XMLのパース自体は両方に共通するため参考として表示する
+            parse_time = self._measure(lambda: ElementTree.fromstring(content), options)
+            self.stdout.write(
+                f"{name:<18} {len(content):>7} {legacy_time:>10.1f} {decoder_time:>11.1f} "
+                f"{parse_time:>9.1f} {legacy_time / decoder_time:>7.2f}x"
+            )
+
+    @staticmethod
+    def _measure(func: Callable[[], Any], options: Dict[str, Any]) -> float:
+        """1回あたりの実行時間（マイクロ秒）"""
+        timer = timeit.Timer(func)
+        return min(timer.repeat(repeat=options['repeat'], number=options['number'])) / options['number'] * 1e6
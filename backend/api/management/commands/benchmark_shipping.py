@@ -0,0 +1,137 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from datetime import date
+from decimal import Decimal
+from typing import Any, Callable, Dict, List
+import random
+import string
+import timeit
+from api.models.master import Service, Countries, Shipping, ShippingSurcharge
+from api.services.quote_cache import quote_cache
+from api.services.rate_card import rate_card_index
+from api.services.shipping_calculator import ShippingCalculator
+
+class Command(BaseCommand):
+    help = '実運用規模の料金表（一時データ）で送料計算とマスタデータの読み込みを計測します'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--services', type=int, default=5, help='配送サービス数')
+        parser.add_argument('--zones', type=int, default=10, help='配送サービスごとのゾーン数')
+        parser.add_argument('--weights', type=int, default=300, help='ゾーンごとの重量区分数（1kg刻み）')
+        parser.add_argument('--countries', type=int, default=200, help='配送サービスごとの配送先の国数')
+        parser.add_argument('--packages', type=int, default=1000, help='計測に使う荷物数')
+        parser.add_argument('--repeat', type=int, default=3, help='計測の繰り返し回数（最短時間を採用）')
+        parser.add_argument('--explain', action='store_true', help='料金表の検索クエリの実行計画を表示')
+
+    def handle(self, *args, **options):
+        # 計測用のデータは最後にロールバックして残さない
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback()
+        except _Rollback:
+            pass
+        finally:
+            rate_card_index.bump_version()
+
+    def _run(self, options: Dict[str, Any]) -> None:
+        services = self._create_rate_tables(options)
+        rate_card_index.bump_version()
+        rows = Shipping.objects.filter(service__in=services).count()
+        self.stdout.write(
+            f"services={len(services)} zones={options['zones']} weights={options['weights']} "
+            f"countries={options['countries']} rows={rows} packages={options['packages']}"
+        )
+
+        rng = random.Random(0)
+        codes = list(rate_card_index.get_card(services[0].id).countries)
+        packages = [
+            {
+                'country_code': rng.choice(codes),
+                'length': rng.randint(10, 120),
+                'width': rng.randint(10, 60),
+                'height': rng.randint(5, 60),
+                'weight': round(rng.uniform(0.1, options['weights'] * 0.8), 1),
+            }
+            for _ in range(options['packages'])
+        ]
+        calculator = ShippingCalculator(services[0].id, date.today())
+        zone_weights = [
+            (calculator.card.countries[package['country_code']], Decimal(str(package['weight'])))
+            for package in packages
+        ]
+
+        def quote_all():
+            for package in packages:
+                calculator.calculate_shipping_cost(
+                    package['country_code'], package['length'], package['width'], package['height'], package['weight'],
+                )
+
+        def query_all():
+            # メモリ上の料金表を使う前のDB検索と同じ条件（複合インデックスを使う）
+            for zone, weight in zone_weights:
+                Shipping.objects.filter(service=services[0], zone=zone, weight__gte=weight) \
+                    .order_by('weight').values_list('weight', 'basic_price').first()
+
+        max_size = quote_cache.max_size
+        quote_cache.max_size = 0
+        try:
+            uncached = self._measure(quote_all, options)
+        finally:
+            quote_cache.max_size = max_size
+        quote_cache.clear()
+        quote_all()
+        cached = self._measure(quote_all, options)
+
+        count = len(packages)
+        self.stdout.write(f"{'case':<18} {'total ms':>10} {'per item us':>12}")
+        self._write('index load', self._measure(rate_card_index._load, options), 1)
+        self._write('quote (db query)', self._measure(query_all, options), count)
+        self._write('quote (uncached)', uncached, count)
+        self._write('quote (cached)', cached, count)
+        self._write('batch', self._measure(lambda: calculator.calculate_shipping_costs(packages), options), count)
+        self._write('compare', self._measure(lambda: [
+            ShippingCalculator.compare_services(
+                package['country_code'], package['length'], package['width'], package['height'], package['weight'],
+            )
+            for package in packages[:100]
+        ], options), min(count, 100))
+
+        if options['explain']:
+            zone, weight = zone_weights[0]
+            self.stdout.write(
+                Shipping.objects.filter(service=services[0], zone=zone, weight__gte=weight).order_by('weight').explain()
+            )
+
+    def _create_rate_tables(self, options: Dict[str, Any]) -> List[Service]:
+        rng = random.Random(0)
+        zones = string.ascii_uppercase[:options['zones']]
+        codes = [a + b for a in string.ascii_uppercase for b in string.ascii_uppercase][:options['countries']]
+        # MySQLのbulk_createは主キーを返さないため配送サービスは1件ずつ作成する
+        services = [Service.objects.create(service_name=f'Benchmark {i}') for i in range(options['services'])]
+        for service in services:
+            Countries.objects.bulk_create([
+                Countries(country_code=code, country_name=code, country_name_jp=code,
+                          zone=rng.choice(zones), service=service)
+                for code in codes
+            ], batch_size=1000)
+            Shipping.objects.bulk_create([
+                Shipping(service=service, zone=zone, weight=weight,
+                         basic_price=Decimal(2000 + index * 300 + weight * 150))
+                for index, zone in enumerate(zones) for weight in range(1, options['weights'] + 1)
+            ], batch_size=1000)
+            ShippingSurcharge.objects.create(
+                service=service, surcharge_type='FUEL', rate=Decimal('12.50'), start_date=date(2020, 1, 1),
+            )
+        return services
+
+    def _write(self, name: str, seconds: float, count: int) -> None:
+        self.stdout.write(f"{name:<18} {seconds * 1000:>10.1f} {seconds / count * 1e6:>12.1f}")
+
+    @staticmethod
+    def _measure(func: Callable[[], Any], options: Dict[str, Any]) -> float:
+        """1回あたりの実行時間（秒）"""
+        return min(timeit.Timer(func).repeat(repeat=options['repeat'], number=1))
+
+class _Rollback(Exception):
+    """計測用のデータを取り消すための例外"""
@@ -0,0 +1,237 @@
+from django.core.management.base import BaseCommand
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+import itertools
+import json
+import random
+import re
+import threading
+import time
+
+NS = "urn:ebay:apis:eBLBaseComponents"
+
+class EbayStubServer(ThreadingHTTPServer):
+    """
+    Trading APIとOAuthトークン取得のローカルスタブ
+
+    eBayのレスポンスに近いXMLを返し、遅延とエラーの発生率を指定できる。
+    """
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address: Tuple[str, int], latency_ms: float = 0, jitter_ms: float = 0,
+                 error_rate: float = 0, system_error_rate: float = 0, active_items: int = 500):
+        super().__init__(address, EbayStubHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate  # RequestError（入力エラー）を返す割合
+        self.system_error_rate = system_error_rate  # SystemError（eBay側の障害）を返す割合
+        self.active_items = active_items
+        self.item_ids = itertools.count(110000000000)
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def next_item_id(self) -> str:
+        with self.lock:
+            return str(next(self.item_ids))
+
+class EbayStubHandler(BaseHTTPRequestHandler):
+    server: EbayStubServer
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0)).decode('utf-8')
+        self._sleep()
+
+        if self.path.startswith('/identity/v1/oauth2/token'):
+            self._send(200, json.dumps({
+                'access_token': f"v^1.1#i^1#stub-{random.getrandbits(64):x}",
+                'expires_in': 7200,
+                'token_type': 'User Access Token',
+            }), 'application/json')
+            return
+
+        if self.path.startswith('/ws/api.dll'):
+            call_name = self.headers.get('X-EBAY-API-CALL-NAME', '')
+            roll = random.random()
+            if roll < self.server.system_error_rate:
+                self._send_xml(call_name, self._errors('10007', 'Internal error to the application.', 'SystemError'), 'Failure')
+            elif roll < self.server.system_error_rate + self.server.error_rate:
+                self._send_xml(call_name, self._errors('21916', 'Invalid value for a field.', 'RequestError'), 'Failure')
+            else:
+                handler = getattr(self, f"_handle_{call_name}", None)
+                if handler is None:
+                    self._send_xml(call_name, self._errors('2', f"Unsupported API call: {call_name}", 'RequestError'), 'Failure')
+                else:
+                    self._send_xml(call_name, handler(body), 'Success')
+            return
+
+        self._send(404, 'Not Found', 'text/plain')
+
+    def log_message(self, format, *args):
+        # ベンチマーク中の出力を抑える
+        pass
+
+    def _handle_AddFixedPriceItem(self, body: str) -> str:
+        now = datetime.now(timezone.utc)
+        fees = [
+            ('AuctionLengthFee', '0.0'), ('BoldFee', '0.0'), ('BuyItNowFee', '0.0'),
+            ('CategoryFeaturedFee', '0.0'), ('FeaturedFee', '0.0'), ('GalleryPlusFee', '0.0'),
+            ('FeaturedGalleryFee', '0.0'), ('FixedPriceDurationFee', '0.0'), ('GalleryFee', '0.0'),
+            ('GiftIconFee', '0.0'), ('HighLightFee', '0.0'), ('InsertionFee', '0.35'),
+            ('InternationalInsertionFee', '0.0'), ('ListingDesignerFee', '0.0'), ('ListingFee', '0.35'),
+            ('PhotoDisplayFee', '0.0'), ('PhotoFee', '0.0'), ('ReserveFee', '0.0'),
+            ('SchedulingFee', '0.0'), ('SubtitleFee', '0.0'), ('BorderFee', '0.0'),
+            ('ProPackBundleFee', '0.0'), ('BasicUpgradePackBundleFee', '0.0'),
+            ('ValuePackBundleFee', '0.0'), ('PrivateListingFee', '0.0'),
+        ]
+        fee_xml = ''.join(
+            f'<Fee><Name>{name}</Name><Fee currencyID="USD">{amount}</Fee></Fee>'
+            for name, amount in fees
+        )
+        return (
+            f'<ItemID>{self.server.next_item_id()}</ItemID>'
+            f'<StartTime>{self._time(now)}</StartTime>'
+            f'<EndTime>{self._time(now + timedelta(days=30))}</EndTime>'
+            f'<Fees>{fee_xml}</Fees>'
+            f'<Category2ID />'
+        )
+
+    def _handle_GetItem(self, body: str) -> str:
+        match = re.search(r'<ItemID>([^<]+)</ItemID>', body)
+        return self._item(match.group(1) if match else self.server.next_item_id(), full=True)
+
+    def _handle_GetMyeBaySelling(self, body: str) -> str:
+        per_page = int(self._field(body, 'EntriesPerPage') or 200)
+        page = int(self._field(body, 'PageNumber') or 1)
+        total = self.server.active_items
+        total_pages = max((total + per_page - 1) // per_page, 1)
+        start = (page - 1) * per_page
+        items = ''.join(
+            self._item(str(110000000000 + i), full=False)
+            for i in range(start, min(start + per_page, total))
+        )
+        return (
+            f'<ActiveList><ItemArray>{items}</ItemArray>'
+            f'<PaginationResult><TotalNumberOfPages>{total_pages}</TotalNumberOfPages>'
+            f'<TotalNumberOfEntries>{total}</TotalNumberOfEntries></PaginationResult></ActiveList>'
+        )
+
+    def _handle_GetSellerEvents(self, body: str) -> str:
+        items = ''.join(
+            self._item(str(110000000000 + random.randrange(self.server.active_items)), full=False)
+            for _ in range(random.randint(0, 20))
+        )
+        return f'<TimeTo>{self._time(datetime.now(timezone.utc))}</TimeTo><ItemArray>{items}</ItemArray>'
+
+    def _handle_ReviseInventoryStatus(self, body: str) -> str:
+        statuses = []
+        for block in re.findall(r'<InventoryStatus>(.*?)</InventoryStatus>', body, re.S):
+            item_id = self._field(block, 'ItemID')
+            price = self._field(block, 'StartPrice') or f"{random.uniform(10, 500):.2f}"
+            quantity = self._field(block, 'Quantity') or '1'
+            statuses.append(
+                f'<InventoryStatus><ItemID>{item_id}</ItemID><StartPrice>{price}</StartPrice>'
+                f'<Quantity>{quantity}</Quantity></InventoryStatus>'
+            )
+        fees = ''.join(
+            f'<Fees><ItemID>{self._field(block, "ItemID")}</ItemID>'
+            f'<Fee><Name>ListingFee</Name><Fee currencyID="USD">0.0</Fee></Fee></Fees>'
+            for block in re.findall(r'<InventoryStatus>(.*?)</InventoryStatus>', body, re.S)
+        )
+        return ''.join(statuses) + fees
+
+    def _item(self, item_id: str, full: bool) -> str:
+        price = f"{random.uniform(10, 500):.2f}"
+        quantity = random.randint(1, 5)
+        description = ''
+        if full:
+            description = '<Description>' + ('&lt;p&gt;Shipped from Japan. Excellent condition.&lt;/p&gt;' * 60) + '</Description>'
+        return (
+            f'<Item><ItemID>{item_id}</ItemID><Title>Stub item {item_id}</Title>{description}'
+            f'<Quantity>{quantity}</Quantity><QuantityAvailable>{quantity}</QuantityAvailable>'
+            f'<ListingDetails><ViewItemURL>https://www.sandbox.ebay.com/itm/{item_id}</ViewItemURL>'
+            f'<EndTime>{self._time(datetime.now(timezone.utc) + timedelta(days=30))}</EndTime></ListingDetails>'
+            f'<SellingStatus><CurrentPrice currencyID="USD">{price}</CurrentPrice>'
+            f'<QuantitySold>0</QuantitySold><ListingStatus>Active</ListingStatus></SellingStatus></Item>'
+        )
+
+    @staticmethod
+    def _errors(code: str, message: str, classification: str) -> str:
+        return (
+            f'<Errors><ShortMessage>{message}</ShortMessage><LongMessage>{message}</LongMessage>'
+            f'<ErrorCode>{code}</ErrorCode><SeverityCode>Error</SeverityCode>'
+            f'<ErrorClassification>{classification}</ErrorClassification></Errors>'
+        )
+
+    @staticmethod
+    def _field(body: str, name: str):
+        match = re.search(fr'<{name}>([^<]+)</{name}>', body)
+        return match.group(1) if match else None
+
+    @staticmethod
+    def _time(value: datetime) -> str:
+        return value.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+    def _send_xml(self, call_name: str, content: str, ack: str) -> None:
+        xml = (
+            f'<?xml version="1.0" encoding="UTF-8"?>'
+            f'<{call_name}Response xmlns="{NS}">'
+            f'<Timestamp>{self._time(datetime.now(timezone.utc))}</Timestamp>'
+            f'<Ack>{ack}</Ack><Version>1173</Version><Build>E1173_CORE_API_19146280_R1</Build>'
+            f'{content}</{call_name}Response>'
+        )
+        self._send(200, xml, 'text/xml')
+
+    def _send(self, status_code: int, content: str, content_type: str) -> None:
+        data = content.encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _sleep(self) -> None:
+        delay = self.server.latency_ms + random.uniform(-self.server.jitter_ms, self.server.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+def start_stub_server(host: str = '127.0.0.1', port: int = 0, **options) -> EbayStubServer:
+    """スタブをバックグラウンドスレッドで起動（port=0の場合は空きポートを使用）"""
+    server = EbayStubServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+class Command(BaseCommand):
+    help = 'eBay Trading APIとOAuthトークン取得のローカルスタブを起動します'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8089)
+        parser.add_argument('--latency-ms', type=float, default=200, help='1リクエストあたりの遅延（ミリ秒）')
+        parser.add_argument('--jitter-ms', type=float, default=50, help='遅延のばらつき（ミリ秒）')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='RequestErrorを返す割合（0〜1）')
+        parser.add_argument('--system-error-rate', type=float, default=0.0, help='SystemErrorを返す割合（0〜1）')
+        parser.add_argument('--active-items', type=int, default=500, help='GetMyeBaySellingで返す出品数')
+
+    def handle(self, *args, **options):
+        server = EbayStubServer(
+            (options['host'], options['port']),
+            latency_ms=options['latency_ms'],
+            jitter_ms=options['jitter_ms'],
+            error_rate=options['error_rate'],
+            system_error_rate=options['system_error_rate'],
+            active_items=options['active_items'],
+        )
+        self.stdout.write(f"eBay stub listening on {server.url} (set EBAY_SANDBOX_URL to use it)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
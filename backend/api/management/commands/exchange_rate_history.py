@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from api.services.currency import CurrencyService
+from api.services.currency_history import ExchangeRateHistoryService
+from datetime import datetime
+from itertools import groupby
+from typing import Dict, Iterator, Optional
+import csv
+import sys
+
+# CSVの列（1行に1通貨。同じ基準通貨・取得日時の行が1つのレート表になる）
+FIELDS = ['base_currency', 'fetched_at', 'currency', 'rate']
+
+class Command(BaseCommand):
+    help = '為替レートの履歴をCSVから一括登録（import）、またはCSVに出力（export）します'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['import', 'export'])
+        parser.add_argument('--file', help='入出力するCSVファイル（省略時は標準入出力）')
+        parser.add_argument('--base', default=CurrencyService.BASE_CURRENCY, help='出力する基準通貨')
+        parser.add_argument('--start', help='出力する期間の開始日時（ISO形式）')
+        parser.add_argument('--end', help='出力する期間の終了日時（ISO形式）')
+        parser.add_argument('--currency', action='append', help='出力する通貨（複数指定可。省略時は全通貨）')
+
+    def handle(self, *args, **options):
+        if options['action'] == 'import':
+            self._import(options)
+        else:
+            self._export(options)
+
+    def _import(self, options):
+        stream = open(options['file'], newline='', encoding='utf-8') if options['file'] else sys.stdin
+        try:
+            reader = csv.DictReader(stream)
+            missing = set(FIELDS) - set(reader.fieldnames or [])
+            if missing:
+                raise CommandError(f"CSVに必要な列がありません: {', '.join(sorted(missing))}")
+            count = ExchangeRateHistoryService.backfill(self._read_tables(reader))
+        finally:
+            if options['file']:
+                stream.close()
+        self.stdout.write(f"imported {count} rate tables")
+
+    def _read_tables(self, reader: csv.DictReader) -> Iterator[Dict]:
+        """連続する同じ基準通貨・取得日時の行を1つのレート表にまとめる"""
+        for (base_currency, fetched_at), rows in groupby(reader, key=lambda row: (row['base_currency'], row['fetched_at'])):
+            moment = self._parse(fetched_at)
+            if moment is None:
+                raise CommandError(f"取得日時が不正です: {fetched_at}")
+            try:
+                rates = {row['currency'].upper(): float(row['rate']) for row in rows}
+            except ValueError as e:
+                raise CommandError(f"レートが不正です: {str(e)}")
+            yield {'base': base_currency.upper(), 'fetched_at': moment, 'rates': rates}
+
+    def _export(self, options):
+        start = self._parse(options['start']) if options['start'] else None
+        end = self._parse(options['end']) if options['end'] else None
+        currencies = {currency.upper() for currency in options['currency'] or []}
+
+        stream = open(options['file'], 'w', newline='', encoding='utf-8') if options['file'] else self.stdout
+        try:
+            writer = csv.writer(stream)
+            writer.writerow(FIELDS)
+            count = 0
+            for history in ExchangeRateHistoryService.export(options['base'].upper(), start, end):
+                fetched_at = history.fetched_at.isoformat()
+                writer.writerows(
+                    [history.base_currency, fetched_at, currency, rate]
+                    for currency, rate in history.rates.items()
+                    if not currencies or currency in currencies
+                )
+                count += 1
+        finally:
+            if options['file']:
+                stream.close()
+        if options['file']:
+            self.stdout.write(f"exported {count} rate tables to {options['file']}")
+
+    @staticmethod
+    def _parse(value: str) -> Optional[datetime]:
+        moment = parse_datetime(value)
+        if moment is not None and timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
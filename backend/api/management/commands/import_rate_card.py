@@ -0,0 +1,40 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from api.services.rate_card_import import RateCardImporter
+from contextlib import ExitStack
+import csv
+
+class Command(BaseCommand):
+    help = '配送サービスの料金表・配送先・追加料金をCSVから取り込み、新しい料金表に入れ替えます'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--service-id', type=int, required=True, help='取り込む配送サービスのID')
+        parser.add_argument('--rates', required=True, help='料金表のCSV（zone, weight, basic_price）')
+        parser.add_argument('--countries', help='配送先のCSV（country_code, country_name, country_name_jp, zone）')
+        parser.add_argument('--surcharges', help='追加料金のCSV（surcharge_type, rate, fixed_amount, start_date, end_date）')
+        parser.add_argument('--dry-run', action='store_true', help='検証のみ行い、書き込まない')
+
+    def handle(self, *args, **options):
+        with ExitStack() as stack:
+            def reader(path):
+                if not path:
+                    return None
+                return csv.DictReader(stack.enter_context(open(path, newline='', encoding='utf-8-sig')))
+
+            try:
+                report = RateCardImporter(options['service_id']).run(
+                    rates=reader(options['rates']),
+                    countries=reader(options['countries']),
+                    surcharges=reader(options['surcharges']),
+                    source=options['rates'],
+                    dry_run=options['dry_run'],
+                )
+            except ValidationError as e:
+                raise CommandError('\n'.join(e.messages))
+
+        prefix = '[dry run] ' if report['dry_run'] else ''
+        self.stdout.write(
+            f"{prefix}service {report['service_id']}: rate card v{report['version']}, rates={report['rates']} "
+            f"countries created={report['countries_created']} updated={report['countries_updated']} "
+            f"surcharges={report['surcharges'] if report['surcharges'] is not None else 'unchanged'}"
+        )
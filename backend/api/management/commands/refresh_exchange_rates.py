@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from api.services.currency import CurrencyService
+from api.services.currency_refresher import ExchangeRateRefresher
+
+class Command(BaseCommand):
+    help = '為替レート表を取得し直してキャッシュを更新します（定期実行用）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--currency', action='append', help='取得する基準通貨（複数指定可。省略時は設定値）')
+        parser.add_argument('--force', action='store_true', help='有効期限に関係なく取得し直す')
+        parser.add_argument('--loop', action='store_true', help='停止されるまで定期的に更新を続ける')
+
+    def handle(self, *args, **options):
+        currencies = [currency.upper() for currency in options['currency'] or []]
+        refresher = ExchangeRateRefresher(currencies=currencies or None)
+
+        if options['loop']:
+            try:
+                refresher.run()
+            except KeyboardInterrupt:
+                pass
+            return
+
+        refreshed = refresher.run_once(force=options['force'])
+        for currency in refresher.currencies:
+            age = CurrencyService.get_table_age(currency)
+            status = 'refreshed' if currency in refreshed else 'skipped'
+            age_text = f"{age:.0f}s" if age is not None else 'none'
+            self.stdout.write(f"{currency}: {status} (age={age_text})")
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.core.exceptions import ValidationError
+from api.models import Setting
+from api.services.ebay_inventory import EbayInventoryService
+
+class Command(BaseCommand):
+    help = 'eBayの出品一覧をローカルテーブルに同期します（定期実行用）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user-id', type=int, help='同期するユーザーID（省略時はeBay認証情報が設定された全ユーザー）')
+        parser.add_argument('--full', action='store_true', help='差分ではなく全件同期を行う')
+
+    def handle(self, *args, **options):
+        if options['user_id']:
+            user_ids = [options['user_id']]
+        else:
+            user_ids = list(
+                Setting.objects.exclude(ebay_auth_token__isnull=True)
+                .exclude(ebay_auth_token='')
+                .values_list('id_id', flat=True)
+            )
+
+        for user_id in user_ids:
+            try:
+                result = EbayInventoryService(user_id=user_id).sync(full=options['full'])
+            except ValidationError as e:
+                if options['user_id']:
+                    raise CommandError(str(e))
+                self.stderr.write(f"user {user_id}: {str(e)}")
+                continue
+            self.stdout.write(
+                f"user {user_id}: {result['type']} sync, fetched={result['fetched']} "
+                f"created={result['created']} updated={result['updated']} ended={result['ended']}"
+            )
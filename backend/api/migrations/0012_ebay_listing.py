@@ -0,0 +1,49 @@
+# Generated by Django 5.0.1 on 2026-10-19 18:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_rename_ebay_refresh_token_setting_ebay_auth_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EbaySyncState',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('last_full_sync_at', models.DateTimeField(null=True)),
+                ('last_modified_sync_at', models.DateTimeField(null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 't_ebay_sync_state',
+            },
+        ),
+        migrations.CreateModel(
+            name='EbayListing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_id', models.CharField(max_length=20, unique=True)),
+                ('title', models.CharField(blank=True, max_length=255, null=True)),
+                ('listing_status', models.CharField(default='Active', max_length=20)),
+                ('current_price', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('currency', models.CharField(blank=True, max_length=3, null=True)),
+                ('quantity', models.IntegerField(default=0)),
+                ('quantity_sold', models.IntegerField(default=0)),
+                ('view_item_url', models.URLField(blank=True, null=True)),
+                ('end_time', models.DateTimeField(null=True)),
+                ('synced_at', models.DateTimeField(null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 't_ebay_listing',
+                'indexes': [models.Index(fields=['user', 'listing_status'], name='ebay_listing_user_status_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-19 18:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_ebay_listing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExchangeRateHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('base_currency', models.CharField(max_length=3)),
+                ('fetched_at', models.DateTimeField()),
+                ('rates', models.JSONField()),
+            ],
+            options={
+                'db_table': 't_exchange_rate_history',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='exchangeratehistory',
+            constraint=models.UniqueConstraint(fields=('base_currency', 'fetched_at'), name='exchange_rate_history_base_time_uniq'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.1 on 2026-10-19 18:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_exchange_rate_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShippingRateCard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.IntegerField()),
+                ('status', models.CharField(choices=[('loading', '取り込み中'), ('active', '有効'), ('retired', '無効')], default='loading', max_length=10)),
+                ('source', models.CharField(blank=True, max_length=255, null=True)),
+                ('row_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('activated_at', models.DateTimeField(null=True)),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='api.service')),
+            ],
+            options={
+                'db_table': 'm_shipping_rate_card',
+            },
+        ),
+        migrations.AddField(
+            model_name='shipping',
+            name='rate_card',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='api.shippingratecard'),
+        ),
+        migrations.AddConstraint(
+            model_name='shippingratecard',
+            constraint=models.UniqueConstraint(fields=('service', 'version'), name='shipping_rate_card_service_version_uniq'),
+        ),
+    ]
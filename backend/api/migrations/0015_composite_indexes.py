@@ -0,0 +1,26 @@
+# Generated by Django 5.0.1 on 2026-10-19 18:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_shipping_rate_card'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='countries',
+            name='country_code',
+            field=models.CharField(max_length=2),
+        ),
+        migrations.AddIndex(
+            model_name='shipping',
+            index=models.Index(fields=['service', 'zone', 'weight'], name='shipping_svc_zone_weight_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='countries',
+            constraint=models.UniqueConstraint(fields=('country_code', 'service'), name='countries_code_service_uniq'),
+        ),
+    ]
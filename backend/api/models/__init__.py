@@ -1,5 +1,7 @@
 # api/models/__init__.py
 from .user import User
-from .master import Service, Countries, Shipping, Setting
+from .master import Service, Countries, Shipping, ShippingRateCard, ShippingSurcharge, Setting
+from .ebay import EbayListing, EbaySyncState
+from .currency import ExchangeRateHistory
 
-__all__ = ['User', 'Service', 'Countries', 'Shipping']
\ No newline at end of file
+__all__ = ['User', 'Service', 'Countries', 'Shipping', 'ShippingRateCard', 'ShippingSurcharge', 'EbayListing', 'EbaySyncState', 'ExchangeRateHistory']
\ No newline at end of file
@@ -0,0 +1,21 @@
+from django.db import models
+
+class ExchangeRateHistory(models.Model):
+    """
+    取得した為替レート表の履歴
+
+    レートが前回の取得時から変わった場合のみ保存し、ある時点のレートは
+    その時点以前で最新の行から求める。
+    """
+    base_currency = models.CharField(max_length=3, null=False)
+    fetched_at = models.DateTimeField(null=False)
+    rates = models.JSONField(null=False)  # 通貨コード -> 基準通貨1単位あたりのレート
+
+    class Meta:
+        db_table = 't_exchange_rate_history'
+        constraints = [
+            models.UniqueConstraint(fields=['base_currency', 'fetched_at'], name='exchange_rate_history_base_time_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.base_currency} @ {self.fetched_at}"
@@ -0,0 +1,47 @@
+from django.db import models
+from .user import User
+
+class EbayListing(models.Model):
+    """
+    eBayに出品中の商品のローカルコピー
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    item_id = models.CharField(max_length=20, unique=True, null=False)
+    title = models.CharField(max_length=255, null=True, blank=True)
+    listing_status = models.CharField(max_length=20, null=False, default='Active')  # 'Active', 'Completed', 'Ended' など
+    current_price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    currency = models.CharField(max_length=3, null=True, blank=True)
+    quantity = models.IntegerField(null=False, default=0)  # 出品数量（販売済みを含む）
+    quantity_sold = models.IntegerField(null=False, default=0)
+    view_item_url = models.URLField(null=True, blank=True)
+    end_time = models.DateTimeField(null=True)  # 出品の終了予定日時
+    synced_at = models.DateTimeField(null=True)  # 最後に同期した日時
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 't_ebay_listing'
+        indexes = [
+            models.Index(fields=['user', 'listing_status'], name='ebay_listing_user_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id} - {self.title}"
+
+    @property
+    def quantity_available(self) -> int:
+        return max(self.quantity - self.quantity_sold, 0)
+
+class EbaySyncState(models.Model):
+    """
+    ユーザーごとのeBay出品同期の状態
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    last_full_sync_at = models.DateTimeField(null=True)
+    last_modified_sync_at = models.DateTimeField(null=True)  # GetSellerEventsで取得済みの更新日時の上限
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 't_ebay_sync_state'
+
+    def __str__(self):
+        return f"eBay sync state for user {self.user_id}"
@@ -11,7 +11,7 @@ class Service(models.Model):
         return self.service_name
 
 class Countries(models.Model):
-    country_code = models.CharField(max_length=2, unique=True, null=False)
+    country_code = models.CharField(max_length=2, null=False)
     country_name = models.CharField(max_length=100, null=False)
     country_name_jp = models.CharField(max_length=100, null=False)
     zone = models.CharField(max_length=1, null=False)
@@ -19,18 +19,58 @@ class Countries(models.Model):
 
     class Meta:
         db_table = 'm_countries'
+        constraints = [
+            # 国コードは配送サービスごとに一意（同じ国を複数の配送サービスで登録できる）
+            models.UniqueConstraint(fields=['country_code', 'service'], name='countries_code_service_uniq'),
+        ]
 
     def __str__(self):
         return f"{self.country_code} - {self.country_name}"
 
+class ShippingRateCard(models.Model):
+    """
+    取り込んだ料金表のバージョン
+
+    取り込み中（loading）の料金表は参照されず、取り込みが完了した時点で有効（active）な料金表と入れ替わる。
+    """
+    STATUS_LOADING = 'loading'
+    STATUS_ACTIVE = 'active'
+    STATUS_RETIRED = 'retired'
+    STATUS_CHOICES = [
+        (STATUS_LOADING, '取り込み中'),
+        (STATUS_ACTIVE, '有効'),
+        (STATUS_RETIRED, '無効'),
+    ]
+
+    service = models.ForeignKey(Service, on_delete=models.CASCADE)
+    version = models.IntegerField(null=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_LOADING)
+    source = models.CharField(max_length=255, null=True, blank=True)  # 取り込んだファイル名
+    row_count = models.IntegerField(null=False, default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    activated_at = models.DateTimeField(null=True)
+
+    class Meta:
+        db_table = 'm_shipping_rate_card'
+        constraints = [
+            models.UniqueConstraint(fields=['service', 'version'], name='shipping_rate_card_service_version_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.service.service_name} v{self.version} ({self.status})"
+
 class Shipping(models.Model):
     zone = models.CharField(max_length=1, null=False)
     weight = models.IntegerField(null=False)
     basic_price = models.DecimalField(max_digits=10, decimal_places=2, null=False)
     service = models.ForeignKey(Service, on_delete=models.CASCADE)
+    rate_card = models.ForeignKey(ShippingRateCard, on_delete=models.CASCADE, null=True)  # nullの場合は取り込み機能以前のデータ
 
     class Meta:
         db_table = 'm_shipping'
+        indexes = [
+            models.Index(fields=['service', 'zone', 'weight'], name='shipping_svc_zone_weight_idx'),
+        ]
 
     def __str__(self):
         return f"Zone {self.zone} - {self.weight}kg"
@@ -1,15 +1,46 @@
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from .http_client import async_http
+import asyncio
+import httpx
 import requests
 import logging
-from typing import Dict, Union, Optional
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Any, Dict, List, Tuple, Union, Optional
 
 logger = logging.getLogger(__name__)
 
+class _Flight:
+    """基準通貨ごとに実行中の取得処理（同時に取得するのは1件のみ）"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.table: Optional[Dict[str, Any]] = None
+        self.error: Optional[Exception] = None
+
 class CurrencyService:
+    API_URL = 'https://api.exchangerate-api.com/v4/latest/{base_currency}'
     CACHE_KEY_PREFIX = 'exchange_rate'
     CACHE_TIMEOUT = 3600  # 1時間
+    # 為替レートAPIのタイムアウト（秒）
+    REQUEST_TIMEOUT = float(getattr(settings, 'EXCHANGE_RATE_REQUEST_TIMEOUT', 5))
+    # 為替レート表を取得する基準通貨（その他の通貨ペアはこの表から計算する）
+    BASE_CURRENCY = getattr(settings, 'EXCHANGE_RATE_BASE_CURRENCY', 'USD')
+
+    SOURCE_LIVE = 'live'
+    SOURCE_LAST_KNOWN_GOOD = 'last_known_good'
+    SOURCE_DEFAULT = 'default'
+
+    # プロセス内のレート表（基準通貨 -> {'rates': ..., 'fetched_at': ...}）
+    _local_tables: Dict[str, Dict[str, Any]] = {}
+    _local_lock = threading.Lock()
+    _flights: Dict[str, _Flight] = {}
+    # 非同期版の実行中の取得処理（イベントループと基準通貨ごと）
+    _async_flights: Dict[Tuple[int, str], 'asyncio.Task'] = {}
 
     @classmethod
     def get_exchange_rate(cls, from_currency: str, to_currency: str) -> float:
@@ -23,33 +54,269 @@ class CurrencyService:
         Returns:
             float: 為替レート
         """
-        cache_key = f"{cls.CACHE_KEY_PREFIX}:{from_currency}:{to_currency}"
-        rate = cache.get(cache_key)
-        
-        if rate is not None:
-            logger.info(f"Using cached exchange rate for {from_currency}/{to_currency}")
-            return rate
+        return cls.get_rate_quote(from_currency, to_currency)['rate']
+
+    @classmethod
+    def get_rate_quote(cls, from_currency: str, to_currency: str) -> Dict[str, Any]:
+        """
+        為替レートとその鮮度を取得
+
+        Returns:
+            dict: 'rate'（為替レート）、'as_of'（レート表の取得日時、ISO形式）、
+                  'stale'（有効期限切れのレートかどうか）、'source'（live/last_known_good/default）
+        """
+        if from_currency == to_currency:
+            return {'rate': 1.0, 'as_of': None, 'stale': False, 'source': cls.SOURCE_LIVE}
 
         try:
-            url = f"https://api.exchangerate-api.com/v4/latest/{from_currency}"
-            response = requests.get(url, params={'key': settings.EXCHANGE_RATE_API_KEY})
-            response.raise_for_status()
-            
-            data = response.json()
-            rate = data['rates'].get(to_currency)
-            
-            if rate is None:
-                raise ValidationError(f"為替レートが見つかりません: {from_currency}/{to_currency}")
-            
-            # レートをキャッシュに保存
-            cache.set(cache_key, rate, cls.CACHE_TIMEOUT)
-            
-            logger.info(f"Retrieved new exchange rate for {from_currency}/{to_currency}: {rate}")
-            return rate
+            # 変換元通貨の表がキャッシュ済みならそのまま使い、なければ基準通貨の表から計算する
+            table = cls._get_cached_table(from_currency)
+            if table is None:
+                table = cls.get_rate_table(cls.BASE_CURRENCY)
+            return cls._quote(table, from_currency, to_currency)
             
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to get exchange rate: {str(e)}")
-            return cls.get_default_rate(from_currency, to_currency)
+            return cls._default_quote(from_currency, to_currency)
+
+    @classmethod
+    async def async_get_rate_quote(cls, from_currency: str, to_currency: str) -> Dict[str, Any]:
+        """
+        get_rate_quoteの非同期版（レート表の取得にhttpxを使い、取得中もイベントループを止めない）
+        """
+        if from_currency == to_currency:
+            return {'rate': 1.0, 'as_of': None, 'stale': False, 'source': cls.SOURCE_LIVE}
+
+        try:
+            table = cls._get_local_table(from_currency) or await sync_to_async(cls._get_cached_table)(from_currency)
+            if table is None:
+                table = await cls.async_get_rate_table(cls.BASE_CURRENCY)
+            return cls._quote(table, from_currency, to_currency)
+
+        except httpx.HTTPError as e:
+            logger.error(f"Failed to get exchange rate: {str(e)}")
+            return cls._default_quote(from_currency, to_currency)
+
+    @classmethod
+    def _quote(cls, table: Dict[str, Any], from_currency: str, to_currency: str) -> Dict[str, Any]:
+        rate = cls._cross_rate(table, from_currency, to_currency)
+        if rate is None:
+            raise ValidationError(f"為替レートが見つかりません: {from_currency}/{to_currency}")
+
+        stale = time.time() - table['fetched_at'] >= cls.CACHE_TIMEOUT
+        return {
+            'rate': rate,
+            'as_of': datetime.fromtimestamp(table['fetched_at'], tz=dt_timezone.utc).isoformat(),
+            'stale': stale,
+            'source': cls.SOURCE_LAST_KNOWN_GOOD if stale else cls.SOURCE_LIVE,
+        }
+
+    @classmethod
+    def _default_quote(cls, from_currency: str, to_currency: str) -> Dict[str, Any]:
+        return {
+            'rate': cls.get_default_rate(from_currency, to_currency),
+            'as_of': None,
+            'stale': True,
+            'source': cls.SOURCE_DEFAULT,
+        }
+
+    @classmethod
+    def get_rate_table(cls, base_currency: str) -> Dict[str, Any]:
+        """
+        基準通貨のレート表を取得
+
+        プロセス内のキャッシュ、共有キャッシュ（django.core.cache）、外部APIの順に参照する。
+        外部APIの取得に失敗した場合は、有効期限切れでも最後に取得できたレート表を返す。
+
+        Returns:
+            dict: 'base'（基準通貨）、'rates'（通貨コード -> レート）、'fetched_at'（取得日時のUNIX時間）
+        """
+        table = cls._get_cached_table(base_currency)
+        if table is not None:
+            return table
+
+        try:
+            return cls.refresh_rate_table(base_currency)
+        except requests.exceptions.RequestException as e:
+            table = cls._get_last_known_good(base_currency)
+            if table is None:
+                raise
+            logger.warning(f"Using last known good exchange rate table for {base_currency}: {str(e)}")
+            return table
+
+    @classmethod
+    async def async_get_rate_table(cls, base_currency: str) -> Dict[str, Any]:
+        """get_rate_tableの非同期版"""
+        table = cls._get_local_table(base_currency) or await sync_to_async(cls._get_cached_table)(base_currency)
+        if table is not None:
+            return table
+
+        try:
+            return await cls.async_refresh_rate_table(base_currency)
+        except httpx.HTTPError as e:
+            table = await sync_to_async(cls._get_last_known_good)(base_currency)
+            if table is None:
+                raise
+            logger.warning(f"Using last known good exchange rate table for {base_currency}: {str(e)}")
+            return table
+
+    @classmethod
+    async def async_refresh_rate_table(cls, base_currency: str) -> Dict[str, Any]:
+        """
+        refresh_rate_tableの非同期版
+
+        同じイベントループで同じ基準通貨の取得が実行中の場合はその結果を待つ。
+        """
+        key = (id(asyncio.get_running_loop()), base_currency)
+        task = cls._async_flights.get(key)
+        if task is None:
+            task = cls._async_flights[key] = asyncio.ensure_future(cls._async_fetch_rate_table(base_currency))
+            task.add_done_callback(lambda _: cls._async_flights.pop(key, None))
+        # 待っている1件がキャンセルされても取得自体は続ける
+        return await asyncio.shield(task)
+
+    @classmethod
+    def refresh_rate_table(cls, base_currency: str) -> Dict[str, Any]:
+        """
+        外部APIからレート表を取得してキャッシュを更新
+
+        同じ基準通貨の取得が実行中の場合は新たに取得せず、その結果を待つ。
+        """
+        with cls._local_lock:
+            flight = cls._flights.get(base_currency)
+            leader = flight is None
+            if leader:
+                flight = cls._flights[base_currency] = _Flight()
+
+        if not leader:
+            if not flight.done.wait(cls.REQUEST_TIMEOUT + 1):
+                raise requests.exceptions.Timeout(f"Timed out waiting for exchange rate table for {base_currency}")
+            if flight.error is not None:
+                raise flight.error
+            return flight.table
+
+        try:
+            flight.table = cls._fetch_rate_table(base_currency)
+            return flight.table
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with cls._local_lock:
+                cls._flights.pop(base_currency, None)
+            flight.done.set()
+
+    @classmethod
+    def _fetch_rate_table(cls, base_currency: str) -> Dict[str, Any]:
+        url = cls.API_URL.format(base_currency=base_currency)
+        response = requests.get(url, params={'key': settings.EXCHANGE_RATE_API_KEY}, timeout=cls.REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return cls._store_rate_table(base_currency, response.json())
+
+    @classmethod
+    async def _async_fetch_rate_table(cls, base_currency: str) -> Dict[str, Any]:
+        url = cls.API_URL.format(base_currency=base_currency)
+        response = await async_http.get().get(
+            url,
+            params={'key': settings.EXCHANGE_RATE_API_KEY} if settings.EXCHANGE_RATE_API_KEY else None,
+            timeout=cls.REQUEST_TIMEOUT
+        )
+        response.raise_for_status()
+        # キャッシュと履歴の保存はDBを使う場合があるため同期処理として実行する
+        return await sync_to_async(cls._store_rate_table)(base_currency, response.json())
+
+    @classmethod
+    def _store_rate_table(cls, base_currency: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """APIのレスポンスからレート表を作成してキャッシュと履歴に保存"""
+        table = {
+            'base': base_currency,
+            'rates': data['rates'],
+            'fetched_at': time.time(),
+        }
+        cache.set(cls._table_cache_key(base_currency), table, cls.CACHE_TIMEOUT)
+        # 外部APIの障害に備えて、有効期限なしで最後に取得できたレート表を残す
+        cache.set(cls._last_known_good_key(base_currency), table, None)
+        cls._set_local_table(base_currency, table)
+
+        logger.info(f"Retrieved new exchange rate table for {base_currency} ({len(table['rates'])} currencies)")
+        cls._record_history(table)
+        return table
+
+    @staticmethod
+    def _record_history(table: Dict[str, Any]) -> None:
+        """取得したレート表を履歴に保存（失敗してもレートの取得は失敗させない）"""
+        from .currency_history import ExchangeRateHistoryService
+        try:
+            ExchangeRateHistoryService.record(table)
+        except Exception as e:
+            logger.error(f"Failed to record exchange rate history for {table['base']}: {str(e)}")
+
+    @classmethod
+    def get_table_age(cls, base_currency: str) -> Optional[float]:
+        """キャッシュ済みのレート表の経過秒数（キャッシュがない場合はNone）"""
+        table = cls._get_cached_table(base_currency)
+        if table is None:
+            return None
+        return time.time() - table['fetched_at']
+
+    @classmethod
+    def clear_local_cache(cls) -> None:
+        """プロセス内のレート表を破棄"""
+        with cls._local_lock:
+            cls._local_tables.clear()
+
+    @classmethod
+    def _get_cached_table(cls, base_currency: str) -> Optional[Dict[str, Any]]:
+        """キャッシュ済みのレート表を取得（プロセス内 -> 共有キャッシュ）"""
+        table = cls._get_local_table(base_currency)
+        if table is not None:
+            return table
+
+        table = cache.get(cls._table_cache_key(base_currency))
+        if table is not None:
+            cls._set_local_table(base_currency, table)
+        return table
+
+    @classmethod
+    def _get_local_table(cls, base_currency: str) -> Optional[Dict[str, Any]]:
+        """プロセス内の有効期限内のレート表"""
+        table = cls._local_tables.get(base_currency)
+        if table is not None and time.time() - table['fetched_at'] < cls.CACHE_TIMEOUT:
+            return table
+        return None
+
+    @classmethod
+    def _get_last_known_good(cls, base_currency: str) -> Optional[Dict[str, Any]]:
+        """有効期限切れでも最後に取得できたレート表（プロセス内と共有キャッシュのうち新しい方）"""
+        tables = [
+            table for table in (cls._local_tables.get(base_currency), cache.get(cls._last_known_good_key(base_currency)))
+            if table is not None
+        ]
+        # 他のプロセスが後から取得したレート表があればそちらを使う
+        return max(tables, key=lambda table: table['fetched_at'], default=None)
+
+    @classmethod
+    def _set_local_table(cls, base_currency: str, table: Dict[str, Any]) -> None:
+        with cls._local_lock:
+            cls._local_tables[base_currency] = table
+
+    @staticmethod
+    def _cross_rate(table: Dict[str, Any], from_currency: str, to_currency: str) -> Optional[float]:
+        """レート表から任意の通貨ペアのレートを計算"""
+        rates = table['rates']
+        from_rate = 1.0 if from_currency == table['base'] else rates.get(from_currency)
+        to_rate = 1.0 if to_currency == table['base'] else rates.get(to_currency)
+        if not from_rate or to_rate is None:
+            return None
+        return to_rate / from_rate
+
+    @classmethod
+    def _table_cache_key(cls, base_currency: str) -> str:
+        return f"{cls.CACHE_KEY_PREFIX}:table:{base_currency}"
+
+    @classmethod
+    def _last_known_good_key(cls, base_currency: str) -> str:
+        return f"{cls.CACHE_KEY_PREFIX}:lkg:{base_currency}"
 
     @staticmethod
     def get_default_rate(from_currency: str, to_currency: str) -> float:
@@ -82,7 +349,37 @@ class CurrencyService:
         Returns:
             str: 変換後の金額（文字列形式）
         """
-        amount_float = float(amount)
-        rate = cls.get_exchange_rate(from_currency, to_currency)
-        converted = amount_float * rate
-        return f"{converted:.{decimal_places}f}" 
\ No newline at end of file
+        return cls.convert_amounts([amount], from_currency, to_currency, decimal_places)[0]
+
+    @classmethod
+    def convert_amounts(cls, amounts: List[Union[str, float, Decimal]], from_currency: str, to_currency: str,
+                        decimal_places: int = 2, rate: Optional[float] = None) -> List[str]:
+        """
+        複数の金額をまとめて指定された通貨に変換
+
+        為替レートは1回だけ取得し、Decimalで計算して四捨五入する。
+
+        Args:
+            amounts: 変換する金額のリスト
+            from_currency: 変換元通貨コード
+            to_currency: 変換先通貨コード
+            decimal_places: 小数点以下の桁数
+            rate: 使用する為替レート（get_rate_quoteで取得済みの場合。省略時は取得する）
+
+        Returns:
+            list: 変換後の金額（文字列形式）のリスト（入力と同じ順序）
+        """
+        try:
+            values = [Decimal(str(amount)) for amount in amounts]
+        except InvalidOperation:
+            raise ValidationError("金額が不正です")
+        if not all(value.is_finite() for value in values):
+            raise ValidationError("金額が不正です")
+        if not values:
+            return []
+
+        if rate is None:
+            rate = cls.get_exchange_rate(from_currency, to_currency)
+        rate = Decimal(str(rate))
+        exponent = Decimal(1).scaleb(-decimal_places)
+        return [str((value * rate).quantize(exponent, rounding=ROUND_HALF_UP)) for value in values]
\ No newline at end of file
@@ -0,0 +1,167 @@
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from ..models import ExchangeRateHistory
+from .currency import CurrencyService
+import bisect
+import logging
+import threading
+from datetime import datetime, timezone as dt_timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class _HistoryIndex:
+    """基準通貨ごとの履歴（取得日時の昇順）"""
+    def __init__(self, version: int, timestamps: List[float], rates: List[Dict[str, float]]):
+        self.version = version
+        self.timestamps = timestamps
+        self.rates = rates
+
+class ExchangeRateHistoryService:
+    """
+    為替レート表の履歴の保存と、ある時点で適用されていたレートの検索
+
+    履歴は基準通貨ごとにプロセス内へ取得日時の昇順で読み込み、二分探索で検索する。
+    履歴が追加されると共有キャッシュのバージョンが上がり、各プロセスは次の検索時に読み直す。
+    """
+    VERSION_KEY_PREFIX = 'exchange_rate_history:version'
+    BATCH_SIZE = 500
+
+    _indexes: Dict[str, _HistoryIndex] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def record(cls, table: Dict[str, Any]) -> bool:
+        """
+        取得したレート表を履歴に保存（前回の保存からレートが変わっていない場合は保存しない）
+
+        Returns:
+            bool: 保存した場合はTrue
+        """
+        base_currency = table['base']
+        latest = (
+            ExchangeRateHistory.objects.filter(base_currency=base_currency)
+            .order_by('-fetched_at')
+            .values_list('rates', flat=True)
+            .first()
+        )
+        if latest == table['rates']:
+            return False
+
+        ExchangeRateHistory.objects.create(
+            base_currency=base_currency,
+            fetched_at=datetime.fromtimestamp(table['fetched_at'], tz=dt_timezone.utc),
+            rates=table['rates'],
+        )
+        cls._bump_version(base_currency)
+        return True
+
+    @classmethod
+    def get_rate_as_of(cls, from_currency: str, to_currency: str, at: datetime) -> Dict[str, Any]:
+        """
+        指定日時に適用されていた為替レートを取得
+
+        Returns:
+            dict: 'rate'（為替レート）、'as_of'（使用したレート表の取得日時、ISO形式）
+        """
+        return cls.get_rates_as_of(from_currency, to_currency, [at])[0]
+
+    @classmethod
+    def get_rates_as_of(cls, from_currency: str, to_currency: str, moments: List[datetime]) -> List[Dict[str, Any]]:
+        """複数の日時について適用されていた為替レートを取得（入力と同じ順序）"""
+        if from_currency == to_currency:
+            return [{'rate': 1.0, 'as_of': None} for _ in moments]
+
+        index = cls._get_index(CurrencyService.BASE_CURRENCY)
+        results = []
+        for at in moments:
+            position = bisect.bisect_right(index.timestamps, at.timestamp()) - 1
+            if position < 0:
+                raise ValidationError(f"{at.isoformat()}以前の為替レートの履歴がありません")
+            rate = CurrencyService._cross_rate(
+                {'base': CurrencyService.BASE_CURRENCY, 'rates': index.rates[position]},
+                from_currency, to_currency
+            )
+            if rate is None:
+                raise ValidationError(f"為替レートが見つかりません: {from_currency}/{to_currency}")
+            results.append({
+                'rate': rate,
+                'as_of': datetime.fromtimestamp(index.timestamps[position], tz=dt_timezone.utc).isoformat(),
+            })
+        return results
+
+    @classmethod
+    def backfill(cls, tables: Iterable[Dict[str, Any]]) -> int:
+        """
+        過去のレート表をまとめて保存（既に同じ日時の履歴がある場合は無視する）
+
+        Args:
+            tables: 'base'、'fetched_at'（datetime）、'rates'を持つ辞書
+
+        Returns:
+            int: 保存対象の件数
+        """
+        rows = [
+            ExchangeRateHistory(base_currency=table['base'], fetched_at=table['fetched_at'], rates=table['rates'])
+            for table in tables
+        ]
+        with transaction.atomic():
+            ExchangeRateHistory.objects.bulk_create(rows, batch_size=cls.BATCH_SIZE, ignore_conflicts=True)
+        for base_currency in {row.base_currency for row in rows}:
+            cls._bump_version(base_currency)
+        return len(rows)
+
+    @classmethod
+    def export(cls, base_currency: str, start: Optional[datetime] = None,
+               end: Optional[datetime] = None) -> Iterator[ExchangeRateHistory]:
+        """期間内の履歴を取得日時の昇順で返す（大量の行でもメモリに読み込まない）"""
+        queryset = ExchangeRateHistory.objects.filter(base_currency=base_currency)
+        if start is not None:
+            queryset = queryset.filter(fetched_at__gte=start)
+        if end is not None:
+            queryset = queryset.filter(fetched_at__lte=end)
+        return queryset.order_by('fetched_at').iterator(chunk_size=cls.BATCH_SIZE)
+
+    @classmethod
+    def clear_local_cache(cls) -> None:
+        with cls._lock:
+            cls._indexes.clear()
+
+    @classmethod
+    def _get_index(cls, base_currency: str) -> _HistoryIndex:
+        version = cache.get(cls._version_key(base_currency), 0)
+        index = cls._indexes.get(base_currency)
+        if index is not None and index.version == version:
+            return index
+
+        timestamps = []
+        rates = []
+        for fetched_at, table_rates in (
+            ExchangeRateHistory.objects.filter(base_currency=base_currency)
+            .order_by('fetched_at')
+            .values_list('fetched_at', 'rates')
+            .iterator(chunk_size=cls.BATCH_SIZE)
+        ):
+            timestamps.append(fetched_at.timestamp())
+            rates.append(table_rates)
+
+        index = _HistoryIndex(version, timestamps, rates)
+        with cls._lock:
+            cls._indexes[base_currency] = index
+        logger.info(f"Loaded {len(timestamps)} exchange rate history rows for {base_currency}")
+        return index
+
+    @classmethod
+    def _bump_version(cls, base_currency: str) -> None:
+        key = cls._version_key(base_currency)
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # 別のプロセスがキーを消した場合
+            cache.set(key, 1, None)
+
+    @classmethod
+    def _version_key(cls, base_currency: str) -> str:
+        return f"{cls.VERSION_KEY_PREFIX}:{base_currency}"
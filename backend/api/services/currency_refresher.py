@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.core.cache import cache
+from .currency import CurrencyService
+import requests
+import logging
+import threading
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+class ExchangeRateRefresher:
+    """
+    為替レート表を有効期限が切れる前に定期的に取得し直す
+
+    リクエスト処理中に外部APIを待たないよう、キャッシュを常に有効な状態に保つ。
+    複数プロセスで動かした場合でも、共有キャッシュのロックにより取得は1プロセスのみが行う。
+    """
+    # 有効期限（CurrencyService.CACHE_TIMEOUT）より前に取得し直す
+    REFRESH_AFTER = float(getattr(settings, 'EXCHANGE_RATE_REFRESH_AFTER', 2700))  # 45分
+    CHECK_INTERVAL = float(getattr(settings, 'EXCHANGE_RATE_REFRESH_CHECK_INTERVAL', 60))
+
+    def __init__(self, currencies: Optional[List[str]] = None):
+        self.currencies = currencies or self.default_currencies()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def default_currencies() -> List[str]:
+        configured = getattr(settings, 'EXCHANGE_RATE_REFRESH_CURRENCIES', '')
+        currencies = [currency.strip().upper() for currency in configured.split(',') if currency.strip()]
+        return currencies or [CurrencyService.BASE_CURRENCY]
+
+    def run_once(self, force: bool = False) -> List[str]:
+        """
+        期限が近いレート表を取得し直す
+
+        Returns:
+            list: 取得し直した基準通貨
+        """
+        refreshed = []
+        for currency in self.currencies:
+            age = CurrencyService.get_table_age(currency)
+            if not force and age is not None and age < self.REFRESH_AFTER:
+                continue
+
+            # 他のプロセスが取得中の場合は任せる
+            lock_key = f"{CurrencyService.CACHE_KEY_PREFIX}:refresh_lock:{currency}"
+            if not cache.add(lock_key, True, int(CurrencyService.REQUEST_TIMEOUT) + 5):
+                continue
+            try:
+                CurrencyService.refresh_rate_table(currency)
+                refreshed.append(currency)
+            except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+                logger.error(f"Failed to refresh exchange rate table for {currency}: {str(e)}")
+            finally:
+                cache.delete(lock_key)
+        return refreshed
+
+    def run(self) -> None:
+        """停止されるまで定期的にrun_onceを実行"""
+        logger.info(f"Exchange rate refresher started for {', '.join(self.currencies)}")
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Exchange rate refresher error: {str(e)}")
+            self._stop.wait(self.CHECK_INTERVAL)
+
+    def start(self) -> None:
+        """バックグラウンドスレッドで実行"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name='exchange-rate-refresher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+refresher = ExchangeRateRefresher()
@@ -1,18 +1,28 @@
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.template.loader import render_to_string
-from ..models import Setting
+from django.utils import timezone
+from ..models import Setting, EbayListing
 from ..validations.ebay import validate_product_data, validate_api_headers
 from .currency import CurrencyService
+from .ebay_scheduler import scheduler, EbayApiError, PRIORITY_INTERACTIVE
+from .metrics import api_metrics
+from .ebay_response import TradingResponse, decode_response
+from .http_client import async_http
 import os
+import httpx
 import requests
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, Any
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from xml.dom import minidom
 from io import StringIO
 from xml.etree import ElementTree
+from urllib3.exceptions import NewConnectionError
 
 logger = logging.getLogger(__name__)
 
@@ -25,8 +35,12 @@ ERROR_MESSAGES = {
 
 class EbayService:
     NS = "urn:ebay:apis:eBLBaseComponents"
+    ITEM_CACHE_TIMEOUT = getattr(settings, 'EBAY_ITEM_CACHE_TIMEOUT', 60)  # 商品情報のキャッシュ時間（秒）
+    MAX_CONCURRENT_REQUESTS = getattr(settings, 'EBAY_MAX_CONCURRENT_REQUESTS', 5)
+    REQUEST_TIMEOUT = getattr(settings, 'EBAY_REQUEST_TIMEOUT', 30)  # 秒
+    MAX_INVENTORY_STATUS_PER_CALL = 4  # ReviseInventoryStatusで一度に更新できる商品数
 
-    def __init__(self, user_id: int):
+    def __init__(self, user_id: int, priority: str = PRIORITY_INTERACTIVE):
         try:
             setting = Setting.objects.get(id_id=user_id)
             # 必要な認証情報が全て設定されているか確認
@@ -47,19 +61,14 @@ class EbayService:
                     missing_fields.append("Auth Token")
                 raise ValidationError(f"以下のeBay認証情報が設定されていません: {', '.join(missing_fields)}")
                 
-            self.client_id = setting.ebay_client_id
-            self.client_secret = setting.ebay_client_secret
-            self.dev_id = setting.ebay_dev_id
-            self.auth_token = setting.ebay_auth_token
-            
-            # 開発環境はTrue、本番環境はFalse
-            self.is_sandbox = getattr(settings, 'EBAY_IS_SANDBOX', True)
-            self.base_url = getattr(settings, 'EBAY_SANDBOX_URL') if self.is_sandbox else getattr(settings, 'EBAY_PRODUCTION_URL')
-            
-            if not self.base_url:
-                raise ValidationError('eBayのAPIエンドポイントが設定されていません')
-            
-            logger.info(f"Initialized EbayService with base_url: {self.base_url}")
+            self._configure(
+                user_id,
+                priority,
+                setting.ebay_client_id,
+                setting.ebay_client_secret,
+                setting.ebay_dev_id,
+                setting.ebay_auth_token
+            )
             
         except Setting.DoesNotExist:
             raise ValidationError("eBayの認証情報が設定されていません。各種設定画面で設定してください。")
@@ -67,12 +76,44 @@ class EbayService:
             logger.error(f"Failed to initialize EbayService: {str(e)}")
             raise
 
+    @classmethod
+    def from_credentials(cls, client_id: str, client_secret: str, dev_id: str, auth_token: str,
+                         base_url: str = None, priority: str = PRIORITY_INTERACTIVE) -> 'EbayService':
+        """
+        設定テーブルを使わずに認証情報を直接指定して生成（ベンチマークなど用）
+
+        ユーザーに紐づかないため、登録した商品はローカルの出品テーブルに保存しない。
+        """
+        service = cls.__new__(cls)
+        service._configure(None, priority, client_id, client_secret, dev_id, auth_token, base_url)
+        return service
+
+    def _configure(self, user_id, priority, client_id, client_secret, dev_id, auth_token, base_url=None):
+        self.user_id = user_id
+        self.priority = priority
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.dev_id = dev_id
+        self.auth_token = auth_token
+        
+        # 開発環境はTrue、本番環境はFalse
+        self.is_sandbox = getattr(settings, 'EBAY_IS_SANDBOX', True)
+        self.base_url = base_url or (getattr(settings, 'EBAY_SANDBOX_URL') if self.is_sandbox else getattr(settings, 'EBAY_PRODUCTION_URL'))
+        
+        if not self.base_url:
+            raise ValidationError('eBayのAPIエンドポイントが設定されていません')
+        
+        logger.info(f"Initialized EbayService with base_url: {self.base_url}")
+
     def _get_access_token(self) -> str:
         """OAuthアクセストークンを取得"""
-        cached_token = cache.get(f"ebay_access_token_{self.client_id}")
+        cached_token = cache.get(f"ebay_access_token:{self.client_id}")
         if cached_token:
             return cached_token
 
+        started_at = time.perf_counter()
+        response = None
+        outcome = api_metrics.OUTCOME_INVALID_RESPONSE
         try:
             auth_url = f"{self.base_url}/identity/v1/oauth2/token"
             auth_data = {
@@ -81,14 +122,20 @@ class EbayService:
                 'scope': 'https://api.ebay.com/oauth/api_scope https://api.ebay.com/oauth/api_scope/sell.inventory https://api.ebay.com/oauth/api_scope/sell.marketing https://api.ebay.com/oauth/api_scope/sell.account https://api.ebay.com/oauth/api_scope/sell.fulfillment'
             }
             
-            response = requests.post(
-                auth_url,
-                data=auth_data,
-                auth=(self.client_id, self.client_secret),
-                headers={'Content-Type': 'application/x-www-form-urlencoded'}
-            )
+            try:
+                response = requests.post(
+                    auth_url,
+                    data=auth_data,
+                    auth=(self.client_id, self.client_secret),
+                    headers={'Content-Type': 'application/x-www-form-urlencoded'},
+                    timeout=self.REQUEST_TIMEOUT
+                )
+            except requests.exceptions.RequestException:
+                outcome = api_metrics.OUTCOME_NETWORK_ERROR
+                raise
             
             if not response.ok:
+                outcome = api_metrics.OUTCOME_HTTP_ERROR
                 logger.error(f"Token request failed: {response.status_code}")
                 logger.error(f"Response: {response.content.decode('utf-8')}")
                 raise ValidationError("アクセストークンの取得に失敗しました")
@@ -102,78 +149,43 @@ class EbayService:
 
             # キャッシュに保存（有効期限の5分前に期限切れ）
             cache.set(
-                f"ebay_access_token_{self.client_id}",
+                f"ebay_access_token:{self.client_id}",
                 access_token,
                 expires_in - 300
             )
 
+            outcome = api_metrics.OUTCOME_SUCCESS
             return access_token
 
         except Exception as e:
             logger.error(f"Failed to get access token: {str(e)}")
             raise ValidationError("アクセストークンの取得に失敗しました")
+        finally:
+            api_metrics.record(
+                'oauth',
+                'RefreshToken',
+                time.perf_counter() - started_at,
+                outcome,
+                response_size=len(response.content) if response is not None else 0
+            )
 
     def register_product(self, product_data: Dict[str, Any]) -> Dict[str, Any]:
         """eBayに商品を登録"""
         try:
             # バリデーション
             validate_product_data(product_data)
-            
-            # 日本円からUSDに変換
-            if product_data['currency'] == 'JPY':
-                product_data['startPrice']['value'] = CurrencyService.convert_amount(
-                    product_data['startPrice']['value'],
-                    'JPY',
-                    'USD'
-                )
-                product_data['startPrice']['currencyId'] = 'USD'
-                
-                if 'shippingServiceOptions' in product_data['shippingDetails']:
-                    for option in product_data['shippingDetails']['shippingServiceOptions']:
-                        if 'shippingServiceCost' in option:
-                            option['shippingServiceCost']['value'] = CurrencyService.convert_amount(
-                                option['shippingServiceCost']['value'],
-                                'JPY',
-                                'USD'
-                            )
-                            option['shippingServiceCost']['currencyId'] = 'USD'
-                
-                product_data['currency'] = 'USD'
-
-            # XMLテンプレートをレンダリング
-            xml_request = render_to_string('ebay/add_fixed_price_item.xml', {
-                'token': self.auth_token,
-                'product_data': product_data
-            }).strip()
 
             # APIリクエストを送信
+            xml_request = self._build_add_item_request(product_data)
             response = self._send_request('AddFixedPriceItem', xml_request)
             
             # 成功レスポンスのパース
-            item_id = response.find(f'.//{{{self.NS}}}ItemID')
-            if item_id is None:
+            if response.item_id is None:
                 raise ValidationError("商品登録に失敗しました：ItemIDが見つかりません")
-            
-            fees = response.findall(f'.//{{{self.NS}}}Fee')
-            fee_list = []
-            for fee in fees:
-                name = fee.find(f'{{{self.NS}}}Name')
-                amount = fee.find(f'.//{{{self.NS}}}Amount')
-                if name is not None and amount is not None:
-                    fee_list.append({
-                        'Name': name.text,
-                        'Amount': {
-                            'value': amount.text,
-                            'currencyID': amount.attrib.get('currencyID', 'USD')
-                        }
-                    })
-            
-            return {
-                'ItemID': item_id.text,
-                'Fees': {
-                    'Fee': fee_list
-                }
-            }
+
+            # ローカルの出品テーブルに反映
+            self._save_listing(response.item_id, product_data)
+            return self._format_registration(response)
 
         except ValidationError:
             raise
@@ -181,8 +193,148 @@ class EbayService:
             logger.error(f"Failed to register product: {str(e)}")
             raise ValidationError("商品の登録に失敗しました")
 
-    def get_item(self, item_id: str) -> Dict[str, Any]:
-        """eBayの商品情報を取得"""
+    async def async_register_product(self, product_data: Dict[str, Any]) -> Dict[str, Any]:
+        """register_productの非同期版（為替レートとeBay APIの呼び出しにhttpxを使う）"""
+        try:
+            validate_product_data(product_data)
+
+            rate = None
+            if product_data['currency'] == 'JPY':
+                rate = (await CurrencyService.async_get_rate_quote('JPY', 'USD'))['rate']
+            xml_request = self._build_add_item_request(product_data, rate)
+            response = await self._async_send_request('AddFixedPriceItem', xml_request)
+
+            if response.item_id is None:
+                raise ValidationError("商品登録に失敗しました：ItemIDが見つかりません")
+
+            await sync_to_async(self._save_listing)(response.item_id, product_data)
+            return self._format_registration(response)
+
+        except ValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to register product: {str(e)}")
+            raise ValidationError("商品の登録に失敗しました")
+
+    def _build_add_item_request(self, product_data: Dict[str, Any], rate: float = None) -> str:
+        """
+        AddFixedPriceItemのリクエストを作成
+
+        Args:
+            rate: 円からUSDへの為替レート（取得済みの場合。省略時は必要な場合に取得する）
+        """
+        # 日本円からUSDに変換（開始価格と送料をまとめて変換）
+        if product_data['currency'] == 'JPY':
+            prices = [product_data['startPrice']]
+            for option in product_data['shippingDetails'].get('shippingServiceOptions', []):
+                if 'shippingServiceCost' in option:
+                    prices.append(option['shippingServiceCost'])
+
+            converted = CurrencyService.convert_amounts([price['value'] for price in prices], 'JPY', 'USD', rate=rate)
+            for price, value in zip(prices, converted):
+                price['value'] = value
+            product_data['startPrice']['currencyId'] = 'USD'
+            for price in prices[1:]:
+                price['currencyId'] = 'USD'
+            
+            product_data['currency'] = 'USD'
+
+        # XMLテンプレートをレンダリング
+        return render_to_string('ebay/add_fixed_price_item.xml', {
+            'token': self.auth_token,
+            'product_data': product_data
+        }).strip()
+
+    @staticmethod
+    def _format_registration(response: TradingResponse) -> Dict[str, Any]:
+        fee_list = [
+            {
+                'Name': fee.name,
+                'Amount': {
+                    'value': fee.amount,
+                    'currencyID': fee.currency_id
+                }
+            }
+            for fee in response.fees
+            if fee.name is not None and fee.amount is not None
+        ]
+        
+        return {
+            'ItemID': response.item_id,
+            'Fees': {
+                'Fee': fee_list
+            }
+        }
+
+    def get_item(self, item_id: str, use_cache: bool = True) -> Dict[str, Any]:
+        """eBayの商品情報を取得（短時間キャッシュあり）"""
+        cache_key = self._item_cache_key(item_id)
+        if use_cache:
+            cached_item = cache.get(cache_key)
+            if cached_item is not None:
+                return cached_item
+
+        item = self._fetch_item(item_id)
+        cache.set(cache_key, item, self.ITEM_CACHE_TIMEOUT)
+        return item
+
+    def get_items(self, item_ids: List[str], use_cache: bool = True) -> Dict[str, Any]:
+        """
+        複数の商品情報をまとめて取得
+
+        キャッシュにない商品のみ並列でGetItemを呼び出す。
+
+        Args:
+            item_ids: 取得する商品IDのリスト
+            use_cache: キャッシュを利用するかどうか
+
+        Returns:
+            dict: 'items'（商品ID -> 商品情報）と'errors'（商品ID -> エラーメッセージ）
+        """
+        item_ids = list(dict.fromkeys(str(item_id) for item_id in item_ids))
+        items = {}
+        if use_cache:
+            cached_items = cache.get_many([self._item_cache_key(item_id) for item_id in item_ids])
+            for item_id in item_ids:
+                cached_item = cached_items.get(self._item_cache_key(item_id))
+                if cached_item is not None:
+                    items[item_id] = cached_item
+
+        errors = {}
+        missing_ids = [item_id for item_id in item_ids if item_id not in items]
+        if missing_ids:
+            fetched_items = {}
+            max_workers = min(self.MAX_CONCURRENT_REQUESTS, len(missing_ids))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {executor.submit(self._fetch_item, item_id): item_id for item_id in missing_ids}
+                for future in as_completed(futures):
+                    item_id = futures[future]
+                    try:
+                        fetched_items[item_id] = future.result()
+                    except ValidationError as e:
+                        errors[item_id] = ' '.join(e.messages)
+            cache.set_many(
+                {self._item_cache_key(item_id): item for item_id, item in fetched_items.items()},
+                self.ITEM_CACHE_TIMEOUT
+            )
+            items.update(fetched_items)
+
+        return {
+            'items': {item_id: items[item_id] for item_id in item_ids if item_id in items},
+            'errors': errors,
+        }
+
+    def invalidate_item_cache(self, item_ids: List[str]) -> None:
+        """自分で更新した商品のキャッシュを削除"""
+        cache.delete_many([self._item_cache_key(item_id) for item_id in item_ids])
+
+    def _item_cache_key(self, item_id: str) -> str:
+        # 出品者向けの項目を含むことがあるため、取得に使った認証情報（ユーザー、なければアプリ）ごとに分ける
+        owner = f"user-{self.user_id}" if self.user_id is not None else f"app-{self.client_id}"
+        return f"ebay_item:{owner}:{item_id}"
+
+    def _fetch_item(self, item_id: str) -> Dict[str, Any]:
+        """GetItemで商品情報を取得"""
         try:
             xml_request = f"""<?xml version="1.0" encoding="utf-8"?>
 <GetItemRequest xmlns="urn:ebay:apis:eBLBaseComponents">
@@ -197,21 +349,20 @@ class EbayService:
             response = self._send_request('GetItem', xml_request)
             
             # 商品情報を取得
-            item = response.find(f'.//{{{self.NS}}}Item')
+            item = response.item
             if item is None:
                 raise ValidationError("商品情報が見つかりません")
             
-            # 必要な情報を抽出
             return {
-                'ItemID': self._get_element_text(item, 'ItemID'),
-                'Title': self._get_element_text(item, 'Title'),
-                'Description': self._get_element_text(item, 'Description'),
+                'ItemID': item.item_id,
+                'Title': item.title,
+                'Description': item.description,
                 'CurrentPrice': {
-                    'Value': self._get_element_text(item, './/CurrentPrice'),
-                    'CurrencyID': item.find('.//CurrentPrice').get('currencyID') if item.find('.//CurrentPrice') is not None else None
+                    'Value': item.current_price,
+                    'CurrencyID': item.currency_id
                 },
-                'ListingStatus': self._get_element_text(item, 'ListingStatus'),
-                'ViewItemURL': self._get_element_text(item, 'ViewItemURL'),
+                'ListingStatus': item.listing_status,
+                'ViewItemURL': item.view_item_url,
             }
 
         except ValidationError:
@@ -220,47 +371,273 @@ class EbayService:
             logger.error(f"Failed to get item info: {str(e)}")
             raise ValidationError("商品情報の取得に失敗しました")
 
-    def _send_request(self, call_name: str, xml_request: str) -> ElementTree.Element:
-        """eBay APIにリクエストを送信"""
+    def revise_inventory_status(self, changes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        ReviseInventoryStatusで価格・在庫数をまとめて更新
+
+        Args:
+            changes: 'item_id'と'price'・'quantity'（省略可）を持つ辞書のリスト（最大4件）
+
+        Returns:
+            list: eBayが返した更新後の商品ID・価格・在庫数
+        """
+        if not changes or len(changes) > self.MAX_INVENTORY_STATUS_PER_CALL:
+            raise ValidationError(f"一度に更新できる商品は1〜{self.MAX_INVENTORY_STATUS_PER_CALL}件です")
+
+        xml_request = render_to_string('ebay/revise_inventory_status.xml', {
+            'token': self.auth_token,
+            'changes': changes
+        }).strip()
+
         try:
-            headers = {
-                'X-EBAY-API-CALL-NAME': call_name,
-                'X-EBAY-API-SITEID': getattr(settings, 'EBAY_API_SITE_ID', '0'),
-                'X-EBAY-API-COMPATIBILITY-LEVEL': getattr(settings, 'EBAY_API_COMPATIBILITY_LEVEL', '967'),
-                'X-EBAY-API-APP-NAME': self.client_id,
-                'X-EBAY-API-DEV-NAME': self.dev_id,
-                'X-EBAY-API-CERT-NAME': self.client_secret,
-                'Content-Type': 'application/xml',
-            }
+            response = self._send_request('ReviseInventoryStatus', xml_request)
+        finally:
+            # 失敗した場合も一部が反映されている可能性があるためキャッシュは削除する
+            self.invalidate_item_cache([change['item_id'] for change in changes])
+
+        results = []
+        for status in response.root.iterfind(f'{{{self.NS}}}InventoryStatus'):
+            results.append({
+                'item_id': self._get_element_text(status, 'ItemID'),
+                'price': self._get_element_text(status, 'StartPrice'),
+                'quantity': self._get_element_text(status, 'Quantity'),
+            })
+        return results
+
+    def get_my_ebay_selling(self, page_number: int = 1, entries_per_page: int = 200) -> ElementTree.Element:
+        """出品中の商品一覧を取得（ページ単位）"""
+        xml_request = f"""<?xml version="1.0" encoding="utf-8"?>
+<GetMyeBaySellingRequest xmlns="urn:ebay:apis:eBLBaseComponents">
+<RequesterCredentials>
+<eBayAuthToken>{self.auth_token}</eBayAuthToken>
+</RequesterCredentials>
+<ActiveList>
+<Include>true</Include>
+<Pagination>
+<EntriesPerPage>{entries_per_page}</EntriesPerPage>
+<PageNumber>{page_number}</PageNumber>
+</Pagination>
+</ActiveList>
+<DetailLevel>ReturnAll</DetailLevel>
+</GetMyeBaySellingRequest>"""
+
+        return self._send_request('GetMyeBaySelling', xml_request).root
+
+    def get_seller_events(self, mod_time_from: datetime, mod_time_to: datetime) -> ElementTree.Element:
+        """指定期間内に更新された商品を取得"""
+        xml_request = f"""<?xml version="1.0" encoding="utf-8"?>
+<GetSellerEventsRequest xmlns="urn:ebay:apis:eBLBaseComponents">
+<RequesterCredentials>
+<eBayAuthToken>{self.auth_token}</eBayAuthToken>
+</RequesterCredentials>
+<ModTimeFrom>{self._format_time(mod_time_from)}</ModTimeFrom>
+<ModTimeTo>{self._format_time(mod_time_to)}</ModTimeTo>
+<DetailLevel>ReturnAll</DetailLevel>
+</GetSellerEventsRequest>"""
+
+        return self._send_request('GetSellerEvents', xml_request).root
+
+    def _save_listing(self, item_id: str, product_data: Dict[str, Any]) -> None:
+        """登録した商品をローカルの出品テーブルに保存（失敗しても登録処理は継続）"""
+        if self.user_id is None:
+            return
+        try:
+            EbayListing.objects.update_or_create(
+                item_id=item_id,
+                defaults={
+                    'user_id': self.user_id,
+                    'title': product_data.get('title'),
+                    'listing_status': 'Active',
+                    'current_price': product_data['startPrice']['value'],
+                    'currency': product_data.get('currency'),
+                    'quantity': int(product_data.get('quantity') or 0),
+                    'quantity_sold': 0,
+                    'synced_at': timezone.now(),
+                }
+            )
+        except Exception as e:
+            logger.warning(f"Failed to save listing {item_id} locally: {str(e)}")
+
+    @staticmethod
+    def _format_time(value: datetime) -> str:
+        """eBay APIの日時形式（UTC）に変換"""
+        return value.astimezone(dt_timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
 
-            validate_api_headers(headers)
-            response = requests.post(f"{self.base_url}/ws/api.dll", data=xml_request, headers=headers)
+    def _send_request(self, call_name: str, xml_request: str) -> TradingResponse:
+        """eBay APIにリクエストを送信（呼び出し回数の管理と再試行はスケジューラーが行う）"""
+        headers = self._api_headers(call_name)
+        return scheduler.call(
+            lambda: self._post_request(call_name, xml_request, headers),
+            call_name,
+            self.client_id,
+            self.priority
+        )
+
+    async def _async_send_request(self, call_name: str, xml_request: str) -> TradingResponse:
+        """_send_requestの非同期版"""
+        headers = self._api_headers(call_name)
+        return await scheduler.async_call(
+            lambda: self._async_post_request(call_name, xml_request, headers),
+            call_name,
+            self.client_id,
+            self.priority
+        )
+
+    def _api_headers(self, call_name: str) -> Dict[str, str]:
+        headers = {
+            'X-EBAY-API-CALL-NAME': call_name,
+            'X-EBAY-API-SITEID': getattr(settings, 'EBAY_API_SITE_ID', '0'),
+            'X-EBAY-API-COMPATIBILITY-LEVEL': getattr(settings, 'EBAY_API_COMPATIBILITY_LEVEL', '967'),
+            'X-EBAY-API-APP-NAME': self.client_id,
+            'X-EBAY-API-DEV-NAME': self.dev_id,
+            'X-EBAY-API-CERT-NAME': self.client_secret,
+            'Content-Type': 'application/xml',
+        }
+        validate_api_headers(headers)
+        return headers
+
+    def _post_request(self, call_name: str, xml_request: str, headers: Dict[str, str]) -> TradingResponse:
+        """リクエストを1回送信し、エラーを一時的なものかどうか分類して返す"""
+        started_at = time.perf_counter()
+        response = None
+        outcome = api_metrics.OUTCOME_INVALID_RESPONSE
+        error_code = None
+        try:
+            try:
+                response = requests.post(
+                    f"{self.base_url}/ws/api.dll",
+                    data=xml_request,
+                    headers=headers,
+                    timeout=self.REQUEST_TIMEOUT
+                )
+            except requests.exceptions.RequestException as e:
+                outcome = api_metrics.OUTCOME_NETWORK_ERROR
+                logger.error(f"API request failed: {call_name}: {str(e)}")
+                raise EbayApiError(
+                    "APIリクエストに失敗しました",
+                    transient=True,
+                    request_sent=not self._is_connect_error(e)
+                )
 
             if not response.ok:
-                logger.error(f"API request failed: {response.content.decode('utf-8')}")
-                raise ValidationError("APIリクエストに失敗しました")
+                outcome = api_metrics.OUTCOME_HTTP_ERROR
+                raise self._http_error(response.status_code, response.content)
 
-            root = ElementTree.fromstring(response.content)
-            
-            # エラーチェック
-            errors = root.findall(f'.//{{{self.NS}}}Errors')
-            if errors:
-                error_messages = []
-                for error in errors:
-                    error_id = error.find(f'{{{self.NS}}}ErrorCode')
-                    error_message = error.find(f'{{{self.NS}}}LongMessage')
-                    if error_message is not None:
-                        error_messages.append(f"Error {error_id.text if error_id is not None else 'Unknown'}: {error_message.text}")
-                if error_messages:
-                    raise ValidationError(error_messages)
+            decoded, error = self._decode_trading_response(call_name, response.content)
+            if error is not None:
+                outcome = api_metrics.OUTCOME_API_ERROR
+                error_code = error.error_code
+                raise error
             
-            return root
+            outcome = api_metrics.OUTCOME_SUCCESS
+            return decoded
 
         except ValidationError:
             raise
         except Exception as e:
             logger.error(f"API request failed: {str(e)}")
             raise ValidationError("APIリクエストに失敗しました")
+        finally:
+            api_metrics.record(
+                'trading',
+                call_name,
+                time.perf_counter() - started_at,
+                outcome,
+                response_size=len(response.content) if response is not None else 0,
+                error_code=error_code
+            )
+
+    async def _async_post_request(self, call_name: str, xml_request: str, headers: Dict[str, str]) -> TradingResponse:
+        """_post_requestの非同期版（共有の接続プールを使う）"""
+        started_at = time.perf_counter()
+        response = None
+        outcome = api_metrics.OUTCOME_INVALID_RESPONSE
+        error_code = None
+        try:
+            try:
+                response = await async_http.get().post(
+                    f"{self.base_url}/ws/api.dll",
+                    content=xml_request.encode('utf-8'),
+                    headers=headers,
+                    timeout=self.REQUEST_TIMEOUT
+                )
+            except httpx.HTTPError as e:
+                outcome = api_metrics.OUTCOME_NETWORK_ERROR
+                logger.error(f"API request failed: {call_name}: {str(e)}")
+                raise EbayApiError(
+                    "APIリクエストに失敗しました",
+                    transient=True,
+                    # 接続の確立や接続プールの待機で失敗した場合はeBayに届いていない
+                    request_sent=not isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+                )
+
+            if not response.is_success:
+                outcome = api_metrics.OUTCOME_HTTP_ERROR
+                raise self._http_error(response.status_code, response.content)
+
+            decoded, error = self._decode_trading_response(call_name, response.content)
+            if error is not None:
+                outcome = api_metrics.OUTCOME_API_ERROR
+                error_code = error.error_code
+                raise error
+
+            outcome = api_metrics.OUTCOME_SUCCESS
+            return decoded
+
+        except ValidationError:
+            raise
+        except Exception as e:
+            logger.error(f"API request failed: {str(e)}")
+            raise ValidationError("APIリクエストに失敗しました")
+        finally:
+            api_metrics.record(
+                'trading',
+                call_name,
+                time.perf_counter() - started_at,
+                outcome,
+                response_size=len(response.content) if response is not None else 0,
+                error_code=error_code
+            )
+
+    @staticmethod
+    def _http_error(status_code: int, content: bytes) -> EbayApiError:
+        logger.error(f"API request failed: {content.decode('utf-8')}")
+        return EbayApiError(
+            "APIリクエストに失敗しました",
+            transient=status_code >= 500 or status_code == 429
+        )
+
+    @staticmethod
+    def _decode_trading_response(call_name: str, content: bytes):
+        """
+        レスポンスを解析し、エラーがある場合は一時的なものかどうか分類したEbayApiErrorを返す
+
+        Returns:
+            tuple: 解析結果とエラー（エラーがない場合はNone）
+        """
+        decoded = decode_response(content)
+
+        # エラーチェック（警告のみの場合は処理は成功している）
+        for warning in decoded.errors:
+            if not warning.is_error:
+                logger.warning(f"{call_name} warning {warning.code}: {warning.long_message}")
+        errors = [error for error in decoded.error_list if error.long_message is not None]
+        if not errors:
+            return decoded, None
+        return decoded, EbayApiError(
+            [f"Error {error.code or 'Unknown'}: {error.long_message}" for error in errors],
+            error_code=next((error.code for error in errors if error.code), None),
+            # SystemErrorはeBay側の問題のため再試行で解決する可能性がある
+            transient=any(error.classification == 'SystemError' for error in errors)
+        )
+
+    @staticmethod
+    def _is_connect_error(error: requests.exceptions.RequestException) -> bool:
+        """接続の確立に失敗した（リクエストがeBayに届いていない）かどうか"""
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return isinstance(reason, NewConnectionError)
 
     def _get_element_text(self, element: ElementTree.Element, path: str) -> str:
         """XMLから要素のテキストを取得（存在しない場合はNone）"""
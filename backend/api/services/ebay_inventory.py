@@ -0,0 +1,189 @@
+from django.db import transaction
+from django.utils import timezone
+from ..models import EbayListing, EbaySyncState
+from .ebay import EbayService
+from .ebay_scheduler import PRIORITY_BACKGROUND
+from .ebay_response import decode_item
+import logging
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Any, List, Optional
+from xml.etree import ElementTree
+
+logger = logging.getLogger(__name__)
+
+class EbayInventoryService:
+    """
+    eBayの出品一覧をローカルテーブルに同期する
+
+    初回（または差分の取得期間を超えた場合）はGetMyeBaySellingで全件を取得し、
+    以降はGetSellerEventsで前回同期以降に更新された商品のみを反映する。
+    """
+    NS = EbayService.NS
+    ENTRIES_PER_PAGE = 200
+    # GetSellerEventsで遡れる期間の上限（これを超えたら全件同期に切り替える）
+    SELLER_EVENTS_MAX_WINDOW = timedelta(hours=48)
+    # eBay側の反映遅延を考慮して前回の上限より少し前から取得する
+    SELLER_EVENTS_OVERLAP = timedelta(minutes=2)
+    UPDATE_FIELDS = [
+        'title', 'listing_status', 'current_price', 'currency', 'quantity',
+        'quantity_sold', 'view_item_url', 'end_time', 'synced_at',
+    ]
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.ebay_service = EbayService(user_id=user_id, priority=PRIORITY_BACKGROUND)
+
+    def sync(self, full: bool = False) -> Dict[str, Any]:
+        """
+        出品一覧を同期
+
+        Args:
+            full: Trueの場合は常に全件同期を行う
+
+        Returns:
+            dict: 同期の種類と反映件数
+        """
+        state, _ = EbaySyncState.objects.get_or_create(user_id=self.user_id)
+        now = timezone.now()
+        if full or not state.last_modified_sync_at or now - state.last_modified_sync_at > self.SELLER_EVENTS_MAX_WINDOW:
+            return self.full_sync(state)
+        return self.incremental_sync(state)
+
+    def full_sync(self, state: EbaySyncState) -> Dict[str, Any]:
+        """GetMyeBaySellingで出品中の商品を全件取得して反映"""
+        started_at = timezone.now()
+        items = []
+        page_number = 1
+        total_pages = 1
+        while page_number <= total_pages:
+            root = self.ebay_service.get_my_ebay_selling(page_number, self.ENTRIES_PER_PAGE)
+            active_list = root.find(f'{{{self.NS}}}ActiveList')
+            if active_list is None:
+                break
+            items.extend(
+                self._parse_item(item, default_status='Active')
+                for item in active_list.iterfind(f'{{{self.NS}}}ItemArray/{{{self.NS}}}Item')
+            )
+            total_pages = int(self._child_text(active_list, 'PaginationResult', 'TotalNumberOfPages') or 1)
+            page_number += 1
+
+        with transaction.atomic():
+            created, updated = self._upsert(items, started_at)
+            # 全件取得に含まれなかった出品中の商品は終了扱いにする
+            ended = EbayListing.objects.filter(
+                user_id=self.user_id,
+                listing_status='Active'
+            ).exclude(
+                item_id__in=[item['item_id'] for item in items]
+            ).update(listing_status='Ended', synced_at=started_at)
+
+            state.last_full_sync_at = started_at
+            state.last_modified_sync_at = started_at
+            state.save()
+
+        logger.info(f"Full eBay inventory sync for user {self.user_id}: {len(items)} items, {ended} ended")
+        return {
+            'type': 'full',
+            'fetched': len(items),
+            'created': created,
+            'updated': updated,
+            'ended': ended,
+        }
+
+    def incremental_sync(self, state: EbaySyncState) -> Dict[str, Any]:
+        """GetSellerEventsで前回同期以降に更新された商品のみ反映"""
+        mod_time_to = timezone.now()
+        mod_time_from = state.last_modified_sync_at - self.SELLER_EVENTS_OVERLAP
+        root = self.ebay_service.get_seller_events(mod_time_from, mod_time_to)
+        items = [
+            self._parse_item(item)
+            for item in root.iterfind(f'{{{self.NS}}}ItemArray/{{{self.NS}}}Item')
+        ]
+
+        with transaction.atomic():
+            created, updated = self._upsert(items, mod_time_to)
+            state.last_modified_sync_at = mod_time_to
+            state.save()
+        # eBay側で更新された商品のキャッシュは古くなっているため削除
+        self.ebay_service.invalidate_item_cache([item['item_id'] for item in items])
+
+        logger.info(f"Incremental eBay inventory sync for user {self.user_id}: {len(items)} items")
+        return {
+            'type': 'incremental',
+            'fetched': len(items),
+            'created': created,
+            'updated': updated,
+            'ended': 0,
+        }
+
+    def _upsert(self, items: List[Dict[str, Any]], synced_at: datetime) -> tuple:
+        """取得した商品をまとめて作成・更新"""
+        existing = {
+            listing.item_id: listing
+            for listing in EbayListing.objects.filter(item_id__in=[item['item_id'] for item in items])
+        }
+        to_create = []
+        to_update = []
+        for item in items:
+            listing = existing.get(item['item_id'])
+            if listing is None:
+                listing = EbayListing(user_id=self.user_id, item_id=item['item_id'])
+                to_create.append(listing)
+            else:
+                to_update.append(listing)
+            for field, value in item.items():
+                if field != 'item_id' and value is not None:
+                    setattr(listing, field, value)
+            listing.synced_at = synced_at
+
+        EbayListing.objects.bulk_create(to_create, batch_size=500)
+        EbayListing.objects.bulk_update(to_update, self.UPDATE_FIELDS, batch_size=500)
+        return len(to_create), len(to_update)
+
+    def _parse_item(self, element: ElementTree.Element, default_status: Optional[str] = None) -> Dict[str, Any]:
+        """Item要素から同期対象の項目を抽出"""
+        item = decode_item(element)
+        quantity = self._to_int(item.quantity)
+        quantity_available = self._to_int(item.quantity_available)
+        quantity_sold = self._to_int(item.quantity_sold)
+        if quantity_sold is None and quantity is not None and quantity_available is not None:
+            quantity_sold = quantity - quantity_available
+
+        return {
+            'item_id': item.item_id,
+            'title': item.title,
+            'listing_status': item.listing_status or default_status,
+            'current_price': self._to_decimal(item.current_price),
+            'currency': item.currency_id,
+            'quantity': quantity,
+            'quantity_sold': quantity_sold,
+            'view_item_url': item.view_item_url,
+            'end_time': self._to_datetime(item.end_time),
+        }
+
+    def _child_text(self, element: ElementTree.Element, *path: str) -> Optional[str]:
+        """直下のパスで要素のテキストを取得（存在しない場合はNone）"""
+        el = element.find('/'.join(f'{{{self.NS}}}{name}' for name in path))
+        return el.text if el is not None else None
+
+    @staticmethod
+    def _to_int(value: Optional[str]) -> Optional[int]:
+        try:
+            return int(value) if value is not None else None
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _to_decimal(value: Optional[str]) -> Optional[Decimal]:
+        try:
+            return Decimal(value) if value is not None else None
+        except InvalidOperation:
+            return None
+
+    @staticmethod
+    def _to_datetime(value: Optional[str]) -> Optional[datetime]:
+        try:
+            return datetime.fromisoformat(value) if value else None
+        except ValueError:
+            return None
@@ -0,0 +1,170 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from ..models import EbayListing
+from .ebay import EbayService
+from .ebay_scheduler import PRIORITY_INTERACTIVE
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class EbayRepricingService:
+    """
+    出品中の商品の価格・在庫数をまとめて更新する
+
+    変更内容をローカルの出品テーブルと比較し、しきい値未満の価格変更は省く。
+    残りを4件ずつReviseInventoryStatusにまとめ、同時実行数を制限して送信する。
+    """
+    MIN_PRICE_CHANGE = Decimal(str(getattr(settings, 'EBAY_REPRICE_MIN_CHANGE', '0.50')))  # 価格変更の最小額
+    MIN_PRICE_CHANGE_RATIO = Decimal(str(getattr(settings, 'EBAY_REPRICE_MIN_CHANGE_RATIO', '0.01')))  # 価格変更の最小割合
+
+    def __init__(self, user_id: int, priority: str = PRIORITY_INTERACTIVE):
+        self.user_id = user_id
+        self.ebay_service = EbayService(user_id=user_id, priority=priority)
+
+    def reprice(self, changes: List[Dict[str, Any]], dry_run: bool = False) -> Dict[str, Any]:
+        """
+        価格・在庫数の変更を反映
+
+        Args:
+            changes: 'item_id'と'price'・'quantity'（どちらか一方でも可）を持つ辞書のリスト
+            dry_run: Trueの場合はeBayに送信せず、反映予定の内容のみ返す
+
+        Returns:
+            dict: 反映した変更（applied）、省いた変更（skipped）、失敗した変更（failed）
+        """
+        listings = {
+            listing.item_id: listing
+            for listing in EbayListing.objects.filter(
+                user_id=self.user_id,
+                item_id__in=[str(change.get('item_id')) for change in changes]
+            )
+        }
+
+        pending = {}
+        skipped = []
+        for change in changes:
+            try:
+                revision = self._build_revision(change, listings.get(str(change.get('item_id'))))
+            except ValidationError as e:
+                skipped.append({'item_id': change.get('item_id'), 'reason': ' '.join(e.messages)})
+                continue
+            if revision is None:
+                skipped.append({'item_id': str(change['item_id']), 'reason': 'below_threshold'})
+                continue
+            # 同じ商品が複数回指定された場合は最後の変更を使う
+            pending[revision['item_id']] = revision
+
+        revisions = list(pending.values())
+        chunk_size = self.ebay_service.MAX_INVENTORY_STATUS_PER_CALL
+        chunks = [revisions[i:i + chunk_size] for i in range(0, len(revisions), chunk_size)]
+
+        applied = []
+        failed = []
+        if dry_run:
+            applied = revisions
+        elif chunks:
+            max_workers = min(self.ebay_service.MAX_CONCURRENT_REQUESTS, len(chunks))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for chunk, error in zip(chunks, executor.map(self._send_chunk, chunks)):
+                    if error is None:
+                        applied.extend(chunk)
+                    else:
+                        failed.extend({**revision, 'error': error} for revision in chunk)
+            self._update_listings(applied, listings)
+
+        logger.info(
+            f"Repriced eBay listings for user {self.user_id}: "
+            f"{len(applied)} applied, {len(skipped)} skipped, {len(failed)} failed"
+        )
+        return {
+            'dry_run': dry_run,
+            'calls': 0 if dry_run else len(chunks),
+            'applied': [self._format(revision) for revision in applied],
+            'skipped': skipped,
+            'failed': [self._format(revision) for revision in failed],
+        }
+
+    def _build_revision(self, change: Dict[str, Any], listing: Optional[EbayListing]) -> Optional[Dict[str, Any]]:
+        """変更内容を検証し、反映が必要な項目のみを残す（不要な場合はNone）"""
+        item_id = change.get('item_id')
+        if not item_id:
+            raise ValidationError("商品IDが指定されていません")
+
+        price = None
+        if change.get('price') is not None:
+            try:
+                price = Decimal(str(change['price'])).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+            except InvalidOperation:
+                raise ValidationError("価格が不正です")
+            if price <= 0:
+                raise ValidationError("価格が不正です")
+
+        quantity = None
+        if change.get('quantity') is not None:
+            try:
+                quantity = int(change['quantity'])
+            except (TypeError, ValueError):
+                raise ValidationError("在庫数が不正です")
+            if quantity < 0:
+                raise ValidationError("在庫数が不正です")
+
+        if price is None and quantity is None:
+            raise ValidationError("価格または在庫数を指定してください")
+
+        old_price = listing.current_price if listing else None
+        old_quantity = listing.quantity_available if listing else None
+        if price is not None and old_price is not None and not self._is_significant(old_price, price):
+            price = None
+        if quantity is not None and quantity == old_quantity:
+            quantity = None
+        if price is None and quantity is None:
+            return None
+
+        return {
+            'item_id': str(item_id),
+            'price': price,
+            'quantity': quantity,
+            'old_price': old_price,
+            'old_quantity': old_quantity,
+        }
+
+    def _is_significant(self, old_price: Decimal, new_price: Decimal) -> bool:
+        """価格変更がしきい値以上かどうか"""
+        difference = abs(new_price - old_price)
+        return difference >= max(self.MIN_PRICE_CHANGE, old_price * self.MIN_PRICE_CHANGE_RATIO)
+
+    def _send_chunk(self, chunk: List[Dict[str, Any]]) -> Optional[str]:
+        """4件までの変更を1回のAPI呼び出しで送信（失敗した場合はエラーメッセージを返す）"""
+        try:
+            self.ebay_service.revise_inventory_status(chunk)
+            return None
+        except ValidationError as e:
+            return ' '.join(e.messages)
+
+    def _update_listings(self, applied: List[Dict[str, Any]], listings: Dict[str, EbayListing]) -> None:
+        """反映した変更をローカルの出品テーブルに保存"""
+        now = timezone.now()
+        updated = []
+        for revision in applied:
+            listing = listings.get(revision['item_id'])
+            if listing is None:
+                continue
+            if revision['price'] is not None:
+                listing.current_price = revision['price']
+            if revision['quantity'] is not None:
+                # 在庫数は販売済みを除いた数で指定される
+                listing.quantity = listing.quantity_sold + revision['quantity']
+            listing.synced_at = now
+            updated.append(listing)
+        EbayListing.objects.bulk_update(updated, ['current_price', 'quantity', 'synced_at'], batch_size=500)
+
+    @staticmethod
+    def _format(revision: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            key: str(value) if isinstance(value, Decimal) else value
+            for key, value in revision.items()
+        }
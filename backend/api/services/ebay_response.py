@@ -0,0 +1,165 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from xml.etree import ElementTree
+
+NS = "urn:ebay:apis:eBLBaseComponents"
+
+def _tag(name: str) -> str:
+    return f"{{{NS}}}{name}"
+
+# 名前空間付きのタグ名は毎回組み立てず、モジュール読み込み時に一度だけ作る
+TAG_ACK = _tag('Ack')
+TAG_ERRORS = _tag('Errors')
+TAG_ERROR_CODE = _tag('ErrorCode')
+TAG_SHORT_MESSAGE = _tag('ShortMessage')
+TAG_LONG_MESSAGE = _tag('LongMessage')
+TAG_SEVERITY_CODE = _tag('SeverityCode')
+TAG_ERROR_CLASSIFICATION = _tag('ErrorClassification')
+TAG_ITEM_ID = _tag('ItemID')
+TAG_FEES = _tag('Fees')
+TAG_FEE = _tag('Fee')
+TAG_NAME = _tag('Name')
+TAG_AMOUNT = _tag('Amount')
+TAG_ITEM = _tag('Item')
+TAG_TITLE = _tag('Title')
+TAG_DESCRIPTION = _tag('Description')
+TAG_QUANTITY = _tag('Quantity')
+TAG_QUANTITY_AVAILABLE = _tag('QuantityAvailable')
+TAG_SELLING_STATUS = _tag('SellingStatus')
+TAG_CURRENT_PRICE = _tag('CurrentPrice')
+TAG_LISTING_STATUS = _tag('ListingStatus')
+TAG_QUANTITY_SOLD = _tag('QuantitySold')
+TAG_LISTING_DETAILS = _tag('ListingDetails')
+TAG_VIEW_ITEM_URL = _tag('ViewItemURL')
+TAG_END_TIME = _tag('EndTime')
+
+@dataclass
+class EbayError:
+    code: Optional[str]
+    short_message: Optional[str]
+    long_message: Optional[str]
+    severity: Optional[str]  # 'Error' または 'Warning'
+    classification: Optional[str]  # 'RequestError' または 'SystemError'
+
+    @property
+    def is_error(self) -> bool:
+        # SeverityCodeが無い場合は安全側に倒してエラーとして扱う
+        return self.severity != 'Warning'
+
+@dataclass
+class EbayFee:
+    name: Optional[str]
+    amount: Optional[str]
+    currency_id: str
+
+@dataclass
+class EbayItem:
+    item_id: Optional[str] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    current_price: Optional[str] = None
+    currency_id: Optional[str] = None
+    listing_status: Optional[str] = None
+    quantity: Optional[str] = None
+    quantity_available: Optional[str] = None
+    quantity_sold: Optional[str] = None
+    view_item_url: Optional[str] = None
+    end_time: Optional[str] = None
+
+@dataclass
+class TradingResponse:
+    """Trading APIのレスポンスを一度の走査で取り出した結果"""
+    root: ElementTree.Element
+    ack: Optional[str] = None
+    errors: List[EbayError] = field(default_factory=list)
+    item_id: Optional[str] = None
+    fees: List[EbayFee] = field(default_factory=list)
+    item: Optional[EbayItem] = None
+
+    @property
+    def error_list(self) -> List[EbayError]:
+        """警告を除いたエラー"""
+        return [error for error in self.errors if error.is_error]
+
+def decode_response(content: bytes) -> TradingResponse:
+    """
+    Trading APIのレスポンスを解析
+
+    ルート直下の要素を一度だけ走査し、エラー・ItemID・手数料・商品情報を取り出す。
+    それ以外の要素が必要な場合はrootを参照する。
+    """
+    root = ElementTree.fromstring(content)
+    response = TradingResponse(root=root)
+    for child in root:
+        tag = child.tag
+        if tag == TAG_ACK:
+            response.ack = child.text
+        elif tag == TAG_ERRORS:
+            response.errors.append(_decode_error(child))
+        elif tag == TAG_ITEM_ID:
+            response.item_id = child.text
+        elif tag == TAG_FEES:
+            # ReviseInventoryStatusなどは商品ごとにFeesを返す
+            response.fees.extend(_decode_fee(fee) for fee in child if fee.tag == TAG_FEE)
+        elif tag == TAG_ITEM:
+            response.item = decode_item(child)
+    return response
+
+def decode_item(element: ElementTree.Element) -> EbayItem:
+    """Item要素の子要素を一度だけ走査して商品情報を取り出す"""
+    item = EbayItem()
+    for child in element:
+        tag = child.tag
+        if tag == TAG_ITEM_ID:
+            item.item_id = child.text
+        elif tag == TAG_TITLE:
+            item.title = child.text
+        elif tag == TAG_DESCRIPTION:
+            item.description = child.text
+        elif tag == TAG_QUANTITY:
+            item.quantity = child.text
+        elif tag == TAG_QUANTITY_AVAILABLE:
+            item.quantity_available = child.text
+        elif tag == TAG_SELLING_STATUS:
+            for status in child:
+                if status.tag == TAG_CURRENT_PRICE:
+                    item.current_price = status.text
+                    item.currency_id = status.get('currencyID')
+                elif status.tag == TAG_LISTING_STATUS:
+                    item.listing_status = status.text
+                elif status.tag == TAG_QUANTITY_SOLD:
+                    item.quantity_sold = status.text
+        elif tag == TAG_LISTING_DETAILS:
+            for detail in child:
+                if detail.tag == TAG_VIEW_ITEM_URL:
+                    item.view_item_url = detail.text
+                elif detail.tag == TAG_END_TIME:
+                    item.end_time = detail.text
+    return item
+
+def _decode_error(element: ElementTree.Element) -> EbayError:
+    values: Dict[str, Optional[str]] = {}
+    for child in element:
+        values[child.tag] = child.text
+    return EbayError(
+        code=values.get(TAG_ERROR_CODE),
+        short_message=values.get(TAG_SHORT_MESSAGE),
+        long_message=values.get(TAG_LONG_MESSAGE),
+        severity=values.get(TAG_SEVERITY_CODE),
+        classification=values.get(TAG_ERROR_CLASSIFICATION),
+    )
+
+def _decode_fee(element: ElementTree.Element) -> EbayFee:
+    # 手数料は <Fee><Name/><Fee currencyID=""/></Fee> の形で返る（Amountは旧形式）
+    name = None
+    amount = None
+    for child in element:
+        if child.tag == TAG_NAME:
+            name = child.text
+        elif child.tag == TAG_FEE or child.tag == TAG_AMOUNT:
+            amount = child
+    return EbayFee(
+        name=name,
+        amount=amount.text if amount is not None else None,
+        currency_id=amount.get('currencyID', 'USD') if amount is not None else 'USD',
+    )
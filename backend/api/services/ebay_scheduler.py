@@ -0,0 +1,314 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+import asyncio
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 'interactive'  # 画面操作から呼ばれるAPI
+PRIORITY_BACKGROUND = 'background'  # 同期処理などのバッチから呼ばれるAPI
+
+class EbayApiError(ValidationError):
+    """
+    eBay API呼び出しのエラー
+
+    ValidationErrorを継承しているため、既存の呼び出し元はそのまま扱える。
+
+    Args:
+        message: エラーメッセージ（またはメッセージのリスト）
+        error_code: eBayのエラーコード
+        transient: 時間をおけば成功する可能性があるエラーかどうか
+        request_sent: リクエストがeBayに届いた可能性があるかどうか
+    """
+    def __init__(self, message: Union[str, List[str]], error_code: Optional[str] = None,
+                 transient: bool = False, request_sent: bool = True):
+        super().__init__(message)
+        self.error_code = error_code
+        self.transient = transient
+        self.request_sent = request_sent
+
+class EbayQuotaExceededError(EbayApiError):
+    """1日あたりのAPI呼び出し上限に達した"""
+
+class EbayCircuitOpenError(EbayApiError):
+    """eBay側の障害によりサーキットブレーカーが開いている"""
+
+class _PriorityGate:
+    """同時実行数を制限し、待機中の画面操作を同期処理より優先する"""
+    POLL_INTERVAL = 0.01  # acquire_asyncで空きを確認する間隔（秒）
+
+    def __init__(self, slots: int):
+        self._condition = threading.Condition()
+        self._free_slots = slots
+        self._waiting_interactive = 0
+
+    def acquire(self, priority: str) -> None:
+        with self._condition:
+            if priority == PRIORITY_INTERACTIVE:
+                self._waiting_interactive += 1
+                try:
+                    self._condition.wait_for(lambda: self._free_slots > 0)
+                finally:
+                    self._waiting_interactive -= 1
+            else:
+                self._condition.wait_for(lambda: self._free_slots > 0 and self._waiting_interactive == 0)
+            self._free_slots -= 1
+
+    async def acquire_async(self, priority: str) -> None:
+        """acquireの非同期版（空きが出るまでイベントループを止めずに待つ）"""
+        if priority == PRIORITY_INTERACTIVE:
+            with self._condition:
+                self._waiting_interactive += 1
+        try:
+            while True:
+                with self._condition:
+                    if self._free_slots > 0 and (priority == PRIORITY_INTERACTIVE or self._waiting_interactive == 0):
+                        self._free_slots -= 1
+                        return
+                await asyncio.sleep(self.POLL_INTERVAL)
+        finally:
+            if priority == PRIORITY_INTERACTIVE:
+                with self._condition:
+                    self._waiting_interactive -= 1
+
+    def release(self) -> None:
+        with self._condition:
+            self._free_slots += 1
+            self._condition.notify_all()
+
+class _CircuitBreaker:
+    """連続した一時的エラーでeBayへの呼び出しを一定時間止める"""
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int, recovery_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            # 復旧待ち時間が過ぎたら1件だけ試しに通す
+            if time.monotonic() - self._opened_at >= self.recovery_timeout and not self._trial_in_flight:
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def cancel_trial(self) -> None:
+        """試行を実行しなかった場合に次の呼び出しへ試行を譲る"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(f"eBay circuit breaker opened after {self._failures} consecutive failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+class EbayCallScheduler:
+    """
+    Trading APIの呼び出しを管理する
+
+    - 1日あたりの呼び出し回数をキャッシュで数え、上限を超える呼び出しを止める
+      （同期処理は上限の一部を画面操作用に残して止める）
+    - 一時的なエラーはジッター付きの指数バックオフで再試行する
+    - 一時的なエラーが続いた場合はサーキットブレーカーを開き、すぐにエラーを返す
+    - 同時実行数に空きがない場合は画面操作からの呼び出しを優先する
+    """
+    QUOTA_CACHE_KEY_PREFIX = 'ebay_call_quota'
+    # 出品登録など、同じリクエストを再送すると二重に処理される呼び出し
+    NON_IDEMPOTENT_CALLS = {'AddItem', 'AddFixedPriceItem', 'RelistFixedPriceItem', 'RelistItem'}
+
+    def __init__(self):
+        self.daily_quota = getattr(settings, 'EBAY_DAILY_CALL_QUOTA', 5000)
+        self.background_reserve = getattr(settings, 'EBAY_BACKGROUND_QUOTA_RESERVE', 0.2)
+        self.max_retries = getattr(settings, 'EBAY_MAX_RETRIES', 3)
+        self.retry_base_delay = getattr(settings, 'EBAY_RETRY_BASE_DELAY', 0.5)
+        self.retry_max_delay = getattr(settings, 'EBAY_RETRY_MAX_DELAY', 8.0)
+        self.circuit_breaker = _CircuitBreaker(
+            getattr(settings, 'EBAY_CIRCUIT_FAILURE_THRESHOLD', 5),
+            getattr(settings, 'EBAY_CIRCUIT_RECOVERY_TIMEOUT', 60),
+        )
+        self.gate = _PriorityGate(getattr(settings, 'EBAY_MAX_CONCURRENT_REQUESTS', 5))
+
+    def call(self, func: Callable[[], Any], call_name: str, app_id: str,
+             priority: str = PRIORITY_INTERACTIVE) -> Any:
+        """
+        API呼び出しを実行
+
+        Args:
+            func: 実際にリクエストを送信する関数
+            call_name: APIのコール名（例：'AddFixedPriceItem'）
+            app_id: 呼び出し回数を数えるアプリケーションID
+            priority: PRIORITY_INTERACTIVE または PRIORITY_BACKGROUND
+
+        Returns:
+            funcの戻り値
+        """
+        attempt = 0
+        while True:
+            if not self.circuit_breaker.allow_request():
+                raise EbayCircuitOpenError(
+                    "eBay APIが不安定なため一時的に呼び出しを停止しています", transient=True, request_sent=False
+                )
+            try:
+                self._consume_quota(app_id, priority)
+            except EbayQuotaExceededError:
+                self.circuit_breaker.cancel_trial()
+                raise
+
+            self.gate.acquire(priority)
+            try:
+                result = func()
+            except EbayApiError as e:
+                if not self._record_error(call_name, e, attempt):
+                    raise
+            except Exception:
+                self.circuit_breaker.cancel_trial()
+                raise
+            else:
+                self.circuit_breaker.record_success()
+                return result
+            finally:
+                self.gate.release()
+
+            attempt += 1
+            delay = self._backoff_delay(attempt)
+            logger.warning(f"Retrying {call_name} in {delay:.2f}s (attempt {attempt}/{self.max_retries})")
+            time.sleep(delay)
+
+    async def async_call(self, func: Callable[[], Awaitable[Any]], call_name: str, app_id: str,
+                         priority: str = PRIORITY_INTERACTIVE) -> Any:
+        """
+        callの非同期版（同時実行数の空きと再試行を待つ間もイベントループを止めない）
+
+        Args:
+            func: 実際にリクエストを送信するコルーチン関数
+        """
+        attempt = 0
+        while True:
+            if not self.circuit_breaker.allow_request():
+                raise EbayCircuitOpenError(
+                    "eBay APIが不安定なため一時的に呼び出しを停止しています", transient=True, request_sent=False
+                )
+            try:
+                await sync_to_async(self._consume_quota)(app_id, priority)
+            except EbayQuotaExceededError:
+                self.circuit_breaker.cancel_trial()
+                raise
+
+            await self.gate.acquire_async(priority)
+            try:
+                result = await func()
+            except EbayApiError as e:
+                if not self._record_error(call_name, e, attempt):
+                    raise
+            except BaseException:
+                # リクエストのキャンセル（asyncio.CancelledError）を含む
+                self.circuit_breaker.cancel_trial()
+                raise
+            else:
+                self.circuit_breaker.record_success()
+                return result
+            finally:
+                self.gate.release()
+
+            attempt += 1
+            delay = self._backoff_delay(attempt)
+            logger.warning(f"Retrying {call_name} in {delay:.2f}s (attempt {attempt}/{self.max_retries})")
+            await asyncio.sleep(delay)
+
+    def set_max_concurrency(self, slots: int) -> None:
+        """同時実行数の上限を変更（実行中の呼び出しがない時に呼ぶこと）"""
+        self.gate = _PriorityGate(slots)
+
+    def status(self, app_id: str) -> Dict[str, Any]:
+        """呼び出し回数とサーキットブレーカーの状態を取得"""
+        used = cache.get(self._quota_cache_key(app_id), 0)
+        return {
+            'daily_quota': self.daily_quota,
+            'used': used,
+            'remaining': max(self.daily_quota - used, 0),
+            'circuit_state': self.circuit_breaker.state,
+        }
+
+    def _consume_quota(self, app_id: str, priority: str) -> None:
+        """呼び出し回数を1つ消費（上限を超えた場合はエラー）"""
+        limit = self.daily_quota
+        if priority == PRIORITY_BACKGROUND:
+            limit = int(self.daily_quota * (1 - self.background_reserve))
+
+        cache_key = self._quota_cache_key(app_id)
+        cache.add(cache_key, 0, 60 * 60 * 25)
+        try:
+            used = cache.incr(cache_key)
+        except ValueError:
+            # 日付が変わる瞬間などにキーが消えた場合
+            cache.set(cache_key, 1, 60 * 60 * 25)
+            used = 1
+
+        if used > limit:
+            cache.decr(cache_key)
+            raise EbayQuotaExceededError(
+                "本日のeBay API呼び出し回数の上限に達しました", request_sent=False
+            )
+
+    def _record_error(self, call_name: str, error: EbayApiError, attempt: int) -> bool:
+        """エラーをサーキットブレーカーに記録し、再試行するかどうかを返す"""
+        if error.transient:
+            self.circuit_breaker.record_failure()
+        else:
+            # リクエスト自体の誤りはeBayが正常に応答している
+            self.circuit_breaker.record_success()
+        return self._should_retry(call_name, error, attempt)
+
+    def _should_retry(self, call_name: str, error: EbayApiError, attempt: int) -> bool:
+        if not error.transient or attempt >= self.max_retries:
+            return False
+        if call_name in self.NON_IDEMPOTENT_CALLS:
+            # 処理済みかどうか分からない場合は二重登録を避けるため再送しない
+            return not error.request_sent or error.error_code is not None
+        return True
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """フルジッター付きの指数バックオフ"""
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt)))
+
+    def _quota_cache_key(self, app_id: str) -> str:
+        # eBayの呼び出し上限は日単位でリセットされるため日付ごとに数える
+        today = datetime.now(timezone.utc).strftime('%Y%m%d')
+        return f"{self.QUOTA_CACHE_KEY_PREFIX}:{app_id}:{today}"
+
+scheduler = EbayCallScheduler()
@@ -0,0 +1,44 @@
+from django.conf import settings
+import asyncio
+import httpx
+import threading
+import weakref
+
+class AsyncHttpClients:
+    """
+    イベントループごとに1つのhttpx.AsyncClientを共有する（接続プールを使い回す）
+
+    httpxのクライアントは作成したイベントループでしか使えないため、ループごとに作成する。
+    ASGIサーバーではプロセスに1つのループで動くため、プロセス内で1つのクライアントになる。
+    """
+    MAX_CONNECTIONS = int(getattr(settings, 'HTTP_CLIENT_MAX_CONNECTIONS', 100))
+    MAX_KEEPALIVE_CONNECTIONS = int(getattr(settings, 'HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS', 20))
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]' = weakref.WeakKeyDictionary()
+
+    def get(self) -> httpx.AsyncClient:
+        """実行中のイベントループのクライアントを取得"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.get(loop)
+            if client is None or client.is_closed:
+                client = self._clients[loop] = httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=self.MAX_CONNECTIONS,
+                        max_keepalive_connections=self.MAX_KEEPALIVE_CONNECTIONS,
+                    ),
+                    # requestsと同じくリダイレクトをたどる
+                    follow_redirects=True,
+                )
+            return client
+
+    async def aclose(self) -> None:
+        """実行中のイベントループのクライアントを閉じる"""
+        with self._lock:
+            client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+async_http = AsyncHttpClients()
@@ -0,0 +1,447 @@
+from django.core.cache import caches, DEFAULT_CACHE_ALIAS
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.files import locks
+from django.db import connections, router
+from django.utils import timezone
+from django.utils.module_loading import import_string
+import base64
+import logging
+import os
+import pickle
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+class CacheStats:
+    """
+    キャッシュの名前空間（キーの最初の':'より前）ごとのヒット・ミスの集計（プロセス内）
+    """
+    EVENTS = ('local_hits', 'shared_hits', 'misses', 'sets', 'deletes', 'lock_waits', 'errors')
+    MAX_NAMESPACES = 50  # これを超えた名前空間は'other'にまとめる
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def record(self, namespace: str, event: str, count: int = 1) -> None:
+        with self._lock:
+            counts = self._counts.get(namespace)
+            if counts is None:
+                if len(self._counts) >= self.MAX_NAMESPACES:
+                    namespace = 'other'
+                counts = self._counts.setdefault(namespace, dict.fromkeys(self.EVENTS, 0))
+            counts[event] += count
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            namespaces = {namespace: dict(counts) for namespace, counts in self._counts.items()}
+        total = dict.fromkeys(self.EVENTS, 0)
+        for counts in namespaces.values():
+            for event, count in counts.items():
+                total[event] += count
+            counts['hit_ratio'] = self._hit_ratio(counts)
+        total['hit_ratio'] = self._hit_ratio(total)
+        return {'total': total, 'namespaces': namespaces}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+    @staticmethod
+    def _hit_ratio(counts: Dict[str, int]) -> float:
+        hits = counts['local_hits'] + counts['shared_hits']
+        lookups = hits + counts['misses']
+        return hits / lookups if lookups else 0.0
+
+# DjangoはスレッドごとにキャッシュのインスタンスをつくるためLOCATIONごとにプロセス内で共有する
+_stats: Dict[str, CacheStats] = {}
+_stats_lock = threading.Lock()
+# get_or_setでプロセス内の同じキーの計算をまとめるためのロック
+_key_locks = [threading.RLock() for _ in range(64)]
+
+class LayeredCache(BaseCache):
+    """
+    プロセス内のLocMemCacheと、全ワーカーで共有するキャッシュ（ファイル・DB・Redis・memcached）の2層のキャッシュ
+
+    取得はプロセス内 -> 共有の順に行い、共有キャッシュにあった値はLOCAL_TIMEOUT秒だけプロセス内にも保持する。
+    他のワーカーでの更新・削除はプロセス内の値が期限切れになるまで（最大LOCAL_TIMEOUT秒）反映されないため、
+    バージョン番号や呼び出し回数のように常に最新の値が必要な名前空間はLOCAL_EXCLUDEに指定する。
+    add・incr・decrは常に共有キャッシュに対して行う（ワーカー間のロックやカウンタに使えるように）。
+    Djangoのファイル・DBのキャッシュのadd・incrはアトミックでないため、ファイルはキャッシュの
+    ディレクトリのロックファイルで排他し、DBは期限切れの行を削除してから主キーの一意性で
+    addを排他し、incrは読み込んだ値と一致する場合だけ更新する（一致しない場合は読み直す）。
+    incrは有効期限を変えない。
+
+    get_or_setはキャッシュにない場合にプロセス内のロックと共有キャッシュのロック（add）で
+    1つのワーカーだけが値を計算し、他のワーカーはその結果を待つ（キャッシュスタンピードの防止）。
+    共有キャッシュに接続できない場合はエラーを記録してプロセス内のキャッシュだけで動作する。
+
+    OPTIONS:
+        SHARED: 共有キャッシュの設定（'BACKEND'・'LOCATION'・'OPTIONS'）
+        LOCAL_TIMEOUT: プロセス内に保持する秒数（既定5秒）
+        LOCAL_MAX_ENTRIES: プロセス内に保持する最大件数（既定1000件）
+        LOCAL_EXCLUDE: プロセス内に保持しない名前空間のリスト
+        LOCK_TIMEOUT: get_or_setで他のワーカーの計算を待つ最大秒数（既定10秒）
+    """
+    LOCK_POLL_INTERVAL = 0.05
+    FILE_LOCK_STRIPES = 64  # ファイルのキャッシュのロックファイルの数
+    DB_INCR_RETRIES = 20
+
+    def __init__(self, location: str, params: Dict[str, Any]):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.name = location or DEFAULT_CACHE_ALIAS
+        self.local_timeout = int(options.get('LOCAL_TIMEOUT', 5))
+        self.local_exclude = frozenset(options.get('LOCAL_EXCLUDE', ()))
+        self.lock_timeout = float(options.get('LOCK_TIMEOUT', 10))
+
+        # キーの作り方は両方の層で同じにする
+        key_params = {
+            'KEY_PREFIX': params.get('KEY_PREFIX', ''),
+            'VERSION': params.get('VERSION', 1),
+            'KEY_FUNCTION': params.get('KEY_FUNCTION'),
+        }
+        self._local = LocMemCache(f'layered-{self.name}', {
+            **key_params,
+            'TIMEOUT': self.local_timeout,
+            'OPTIONS': {'MAX_ENTRIES': int(options.get('LOCAL_MAX_ENTRIES', 1000))},
+        })
+        shared = options.get('SHARED') or {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+        self._shared = import_string(shared['BACKEND'])(shared.get('LOCATION', ''), {
+            **key_params,
+            'TIMEOUT': params.get('TIMEOUT', 300),
+            'OPTIONS': shared.get('OPTIONS', {}),
+        })
+
+        with _stats_lock:
+            self.stats = _stats.setdefault(self.name, CacheStats())
+
+    def get(self, key, default=None, version=None):
+        namespace = self._namespace(key)
+        use_local = namespace not in self.local_exclude
+        if use_local:
+            value = self._local.get(key, _MISSING, version=version)
+            if value is not _MISSING:
+                self.stats.record(namespace, 'local_hits')
+                return value
+
+        try:
+            value = self._shared.get(key, _MISSING, version=version)
+        except Exception as e:
+            self._record_error(namespace, 'get', e)
+            return default
+        if value is _MISSING:
+            self.stats.record(namespace, 'misses')
+            return default
+
+        self.stats.record(namespace, 'shared_hits')
+        if use_local:
+            self._local.set(key, value, self.local_timeout, version=version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        namespace = self._namespace(key)
+        self.stats.record(namespace, 'sets')
+        try:
+            self._shared.set(key, value, timeout, version=version)
+        except Exception as e:
+            self._record_error(namespace, 'set', e)
+        self._set_local(namespace, key, value, timeout, version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        namespace = self._namespace(key)
+        try:
+            added = self._shared_add(key, value, timeout, version)
+        except Exception as e:
+            self._record_error(namespace, 'add', e)
+            return self._local.add(key, value, self._local_timeout(timeout), version=version)
+        if added:
+            self.stats.record(namespace, 'sets')
+            self._set_local(namespace, key, value, timeout, version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._local.delete(key, version=version)
+        try:
+            return self._shared.touch(key, timeout, version=version)
+        except Exception as e:
+            self._record_error(self._namespace(key), 'touch', e)
+            return False
+
+    def delete(self, key, version=None):
+        namespace = self._namespace(key)
+        self.stats.record(namespace, 'deletes')
+        deleted = self._local.delete(key, version=version)
+        try:
+            return self._shared.delete(key, version=version)
+        except Exception as e:
+            self._record_error(namespace, 'delete', e)
+            return deleted
+
+    def has_key(self, key, version=None):
+        return self.get(key, _MISSING, version=version) is not _MISSING
+
+    def incr(self, key, delta=1, version=None):
+        namespace = self._namespace(key)
+        try:
+            value = self._shared_incr(key, delta, version)
+        except ValueError:
+            raise
+        except Exception as e:
+            self._record_error(namespace, 'incr', e)
+            return self._local.incr(key, delta, version=version)
+        self._local.delete(key, version=version)
+        return value
+
+    def decr(self, key, delta=1, version=None):
+        return self.incr(key, -delta, version=version)
+
+    def get_many(self, keys: Iterable[Any], version=None) -> Dict[Any, Any]:
+        keys = list(keys)
+        found: Dict[Any, Any] = {}
+        remote = []
+        for key in keys:
+            namespace = self._namespace(key)
+            if namespace not in self.local_exclude:
+                value = self._local.get(key, _MISSING, version=version)
+                if value is not _MISSING:
+                    self.stats.record(namespace, 'local_hits')
+                    found[key] = value
+                    continue
+            remote.append(key)
+        if not remote:
+            return found
+
+        try:
+            shared_values = self._shared.get_many(remote, version=version)
+        except Exception as e:
+            self._record_error(self._namespace(remote[0]), 'get_many', e)
+            return found
+        for key in remote:
+            namespace = self._namespace(key)
+            if key not in shared_values:
+                self.stats.record(namespace, 'misses')
+                continue
+            self.stats.record(namespace, 'shared_hits')
+            found[key] = shared_values[key]
+            if namespace not in self.local_exclude:
+                self._local.set(key, shared_values[key], self.local_timeout, version=version)
+        return found
+
+    def set_many(self, data: Dict[Any, Any], timeout=DEFAULT_TIMEOUT, version=None) -> List[Any]:
+        failed: List[Any] = []
+        try:
+            failed = self._shared.set_many(data, timeout, version=version) or []
+        except Exception as e:
+            if data:
+                self._record_error(self._namespace(next(iter(data))), 'set_many', e)
+        for key, value in data.items():
+            namespace = self._namespace(key)
+            self.stats.record(namespace, 'sets')
+            self._set_local(namespace, key, value, timeout, version)
+        return failed
+
+    def delete_many(self, keys: Iterable[Any], version=None) -> None:
+        keys = list(keys)
+        for key in keys:
+            self.stats.record(self._namespace(key), 'deletes')
+        self._local.delete_many(keys, version=version)
+        try:
+            self._shared.delete_many(keys, version=version)
+        except Exception as e:
+            if keys:
+                self._record_error(self._namespace(keys[0]), 'delete_many', e)
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        """
+        キャッシュにない場合は1つのワーカーだけがdefaultを計算して保存し、他はその結果を待つ
+        """
+        value = self.get(key, _MISSING, version=version)
+        if value is not _MISSING:
+            return value
+
+        namespace = self._namespace(key)
+        with _key_locks[hash((self.name, key, version)) % len(_key_locks)]:
+            # 同じプロセスの他のスレッドが計算済みの場合
+            value = self.get(key, _MISSING, version=version)
+            if value is not _MISSING:
+                return value
+
+            lock_key = f"{key}:lock"
+            locked = self._acquire(lock_key, version)
+            if not locked:
+                self.stats.record(namespace, 'lock_waits')
+                value = self._wait_for(key, version)
+                if value is not _MISSING:
+                    return value
+                # 待っても保存されない場合（計算中のワーカーの失敗など）は自分で計算する
+                logger.warning(f"Timed out waiting for cache key {key}, computing it locally")
+            try:
+                if callable(default):
+                    default = default()
+                self.set(key, default, timeout, version=version)
+                return default
+            finally:
+                if locked:
+                    self._release(lock_key, version)
+
+    def clear(self):
+        self._local.clear()
+        try:
+            self._shared.clear()
+        except Exception as e:
+            self._record_error('all', 'clear', e)
+
+    def close(self, **kwargs):
+        self._shared.close(**kwargs)
+
+    def _acquire(self, lock_key: str, version) -> bool:
+        try:
+            return self._shared_add(lock_key, True, self.lock_timeout + 1, version)
+        except Exception as e:
+            self._record_error(self._namespace(lock_key), 'add', e)
+            return self._local.add(lock_key, True, self.lock_timeout + 1, version=version)
+
+    def _release(self, lock_key: str, version) -> None:
+        self._local.delete(lock_key, version=version)
+        try:
+            self._shared.delete(lock_key, version=version)
+        except Exception as e:
+            self._record_error(self._namespace(lock_key), 'delete', e)
+
+    def _wait_for(self, key, version) -> Any:
+        """他のワーカーが計算した値が共有キャッシュに保存されるのを待つ"""
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.LOCK_POLL_INTERVAL)
+            try:
+                value = self._shared.get(key, _MISSING, version=version)
+            except Exception as e:
+                self._record_error(self._namespace(key), 'get', e)
+                return _MISSING
+            if value is not _MISSING:
+                self._set_local(self._namespace(key), key, value, DEFAULT_TIMEOUT, version)
+                return value
+        return _MISSING
+
+    def _shared_add(self, key, value, timeout, version) -> bool:
+        """共有キャッシュにアトミックにadd"""
+        if isinstance(self._shared, FileBasedCache):
+            # FileBasedCache.addは存在の確認と書き込みの間に他のワーカーが書き込める
+            with self._file_lock(key, version):
+                return self._shared.add(key, value, timeout, version=version)
+        if isinstance(self._shared, DatabaseCache):
+            # DatabaseCache.addは期限切れの行を無条件に上書きするため先に削除し、
+            # 同時に追加した場合は主キーの重複で1つだけが成功するようにする
+            connection, table, quote_name = self._db_table()
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"DELETE FROM {table} WHERE {quote_name('cache_key')} = %s AND {quote_name('expires')} < %s",
+                    [self._shared.make_and_validate_key(key, version=version),
+                     connection.ops.adapt_datetimefield_value(timezone.now())],
+                )
+        return self._shared.add(key, value, timeout, version=version)
+
+    def _shared_incr(self, key, delta: int, version) -> int:
+        """共有キャッシュの値をアトミックに増やす（キーがない場合はValueError）"""
+        if isinstance(self._shared, FileBasedCache):
+            return self._file_incr(key, delta, version)
+        if isinstance(self._shared, DatabaseCache):
+            return self._db_incr(key, delta, version)
+        return self._shared.incr(key, delta, version=version)
+
+    def _file_incr(self, key, delta: int, version) -> int:
+        with self._file_lock(key, version):
+            try:
+                with open(self._shared._key_to_file(key, version), 'rb') as f:
+                    expires = pickle.load(f)
+                    value = pickle.loads(zlib.decompress(f.read()))
+            except (FileNotFoundError, EOFError):
+                raise ValueError(f"Key '{key}' not found")
+            remaining = None if expires is None else expires - time.time()
+            if remaining is not None and remaining <= 0:
+                raise ValueError(f"Key '{key}' not found")
+            value += delta
+            self._shared.set(key, value, remaining, version=version)
+            return value
+
+    def _db_incr(self, key, delta: int, version) -> int:
+        connection, table, quote_name = self._db_table()
+        db_key = self._shared.make_and_validate_key(key, version=version)
+        with connection.cursor() as cursor:
+            for _ in range(self.DB_INCR_RETRIES):
+                cursor.execute(
+                    f"SELECT {quote_name('value')} FROM {table} "
+                    f"WHERE {quote_name('cache_key')} = %s AND {quote_name('expires')} >= %s",
+                    [db_key, connection.ops.adapt_datetimefield_value(timezone.now())],
+                )
+                row = cursor.fetchone()
+                if row is None:
+                    raise ValueError(f"Key '{key}' not found")
+                encoded = connection.ops.process_clob(row[0])
+                value = pickle.loads(base64.b64decode(encoded.encode())) + delta
+                cursor.execute(
+                    f"UPDATE {table} SET {quote_name('value')} = %s "
+                    f"WHERE {quote_name('cache_key')} = %s AND {quote_name('value')} = %s",
+                    [base64.b64encode(pickle.dumps(value, self._shared.pickle_protocol)).decode('latin1'), db_key, encoded],
+                )
+                if cursor.rowcount == 1:
+                    return value
+        raise RuntimeError(f"Failed to increment {key} after {self.DB_INCR_RETRIES} retries")
+
+    def _db_table(self):
+        connection = connections[router.db_for_write(self._shared.cache_model_class)]
+        quote_name = connection.ops.quote_name
+        return connection, quote_name(self._shared._table), quote_name
+
+    @contextmanager
+    def _file_lock(self, key, version):
+        """ファイルのキャッシュのキーを他のワーカー・スレッドと排他する（キーごとに決まるロックファイル）"""
+        name = os.path.basename(self._shared._key_to_file(key, version))
+        self._shared._createdir()
+        path = os.path.join(self._shared._dir, f'layered-{int(name[:8], 16) % self.FILE_LOCK_STRIPES}.lock')
+        with open(path, 'ab') as f:
+            locks.lock(f, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(f)
+
+    def _set_local(self, namespace: str, key, value, timeout, version) -> None:
+        if namespace in self.local_exclude:
+            return
+        local_timeout = self._local_timeout(timeout)
+        if local_timeout is not None and local_timeout <= 0:
+            self._local.delete(key, version=version)
+        else:
+            self._local.set(key, value, local_timeout, version=version)
+
+    def _local_timeout(self, timeout) -> Optional[float]:
+        """プロセス内に保持する秒数（共有キャッシュの有効期限とLOCAL_TIMEOUTの短い方）"""
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def _record_error(self, namespace: str, operation: str, error: Exception) -> None:
+        self.stats.record(namespace, 'errors')
+        logger.warning(f"Shared cache {operation} failed ({namespace}): {str(error)}")
+
+    @staticmethod
+    def _namespace(key: Any) -> str:
+        return str(key).split(':', 1)[0]
+
+def get_cache_stats(alias: str = DEFAULT_CACHE_ALIAS) -> Optional[CacheStats]:
+    """キャッシュの集計（LayeredCacheでない場合はNone）"""
+    backend = caches[alias]
+    return backend.stats if isinstance(backend, LayeredCache) else None
@@ -0,0 +1,500 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
+from api.services.ebay import EbayService
+from api.services.ebay_scheduler import PRIORITY_BACKGROUND
+from api.services.profit_calculator import ProfitCalculator
+from api.services.scraping.yahoo_auction import YahooAuctionService
+from api.services.shipping_calculator import ShippingCalculator
+import copy
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# ステージの入力キューに入れる終了の合図
+_STOP = object()
+
+class PipelineStage:
+    """
+    パイプラインの1段（入力キューと同時実行数分のワーカー）
+
+    入力キューは上限付きのため、後段が詰まると前段のワーカーはput()で待機し、
+    未処理の商品がメモリ上に際限なく溜まることはない。
+    """
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Dict[str, Any]], concurrency: int, queue_size: int):
+        self.name = name
+        self.func = func
+        self.concurrency = concurrency
+        self.queue: 'queue.Queue' = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._running_workers = concurrency
+        self.processed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.max_backlog = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0  # 後段のキューが空くのを待った時間
+
+    def put(self, item: Any) -> None:
+        self.queue.put(item)
+        with self._lock:
+            self.max_backlog = max(self.max_backlog, self.queue.qsize())
+
+    def worker_finished(self) -> bool:
+        """ワーカーの終了を記録し、最後のワーカーの場合はTrue"""
+        with self._lock:
+            self._running_workers -= 1
+            return self._running_workers == 0
+
+    def stats(self, elapsed: float) -> Dict[str, Any]:
+        with self._lock:
+            completed = self.processed + self.failed
+            return {
+                'concurrency': self.concurrency,
+                'processed': self.processed,
+                'failed': self.failed,
+                'in_flight': self.in_flight,
+                'backlog': self.queue.qsize(),
+                'max_backlog': self.max_backlog,
+                'queue_size': self.queue.maxsize,
+                'throughput': round(self.processed / elapsed, 2) if elapsed > 0 else 0.0,  # 件/秒
+                'avg_latency_ms': round(self.busy_seconds / completed * 1000, 1) if completed else None,
+                'blocked_seconds': round(self.blocked_seconds, 3),
+            }
+
+class ListingPipeline:
+    """
+    ヤフオクの検索結果をeBayに出品するまでを段階的に処理する
+
+    検索 → 商品ページの取得 → 販売価格の計算 → 送料の計算 → eBayへの登録 の各段を
+    上限付きのキューでつなぎ、段ごとに設定した同時実行数で並行に処理する。
+    実行中は進捗をPUBLISH_INTERVAL秒ごとに共有キャッシュに書き込み、他のワーカーで
+    受け付けた停止（共有キャッシュの停止フラグ）を反映する。
+    """
+    STAGES = ('detail', 'pricing', 'shipping', 'register')
+    DEFAULT_CONCURRENCY = {'detail': 4, 'pricing': 1, 'shipping': 1, 'register': 2}
+    MAX_CONCURRENCY = 16
+    QUEUE_SIZE = int(getattr(settings, 'LISTING_PIPELINE_QUEUE_SIZE', 10))
+    MAX_ITEMS = int(getattr(settings, 'LISTING_PIPELINE_MAX_ITEMS', 100))
+    CACHE_TIMEOUT = int(getattr(settings, 'LISTING_PIPELINE_CACHE_TIMEOUT', 3600))
+    PUBLISH_INTERVAL = 1.0
+    CACHE_KEY = 'listing_pipeline:{id}'
+    CANCEL_KEY = 'listing_pipeline:{id}:cancel'
+    USER_KEY = 'listing_pipeline:user:{user_id}'
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_FAILED = 'failed'
+
+    # 出品データの既定値（listingで上書き可）
+    LISTING_DEFAULTS = {
+        'quantity': 1,
+        'listingDuration': 'GTC',
+        'listingType': 'FixedPriceItem',
+        'country': 'JP',
+        'paymentMethods': ['PayPal'],
+        'conditionId': '3000',
+        'returnPolicy': {'returnsAccepted': True, 'returnsPeriod': 'Days_30', 'returnsDescription': ''},
+        'shippingService': 'EconomyShippingFromOutsideUS',
+    }
+
+    def __init__(self, user_id: int, search_params: Dict[str, Any], listing: Dict[str, Any], service_id: int,
+                 country_code: str, package: Dict[str, Any], ship_date: Optional[date] = None,
+                 max_items: Optional[int] = None, dry_run: bool = False,
+                 concurrency: Optional[Dict[str, int]] = None, queue_size: Optional[int] = None):
+        """
+        Args:
+            search_params: YahooAuctionService.search_itemsの検索パラメータ
+            listing: 出品データの既定値（'categoryId'は必須）
+            service_id: 送料計算に使う配送サービス
+            country_code: 送料計算に使う配送先の国コード
+            package: 梱包サイズ（'length'、'width'、'height'、'weight'）
+            max_items: 処理する商品数の上限
+            dry_run: Trueの場合はeBayに登録せず、登録する出品データのみ返す
+            concurrency: 段ごとの同時実行数（'detail'、'pricing'、'shipping'、'register'）
+            queue_size: 段の間のキューの上限
+        """
+        if not listing.get('categoryId'):
+            raise ValidationError("出品するカテゴリが指定されていません")
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.search_params = search_params
+        self.listing = {**self.LISTING_DEFAULTS, **listing}
+        self.country_code = country_code
+        self.package = package
+        self.max_items = min(int(max_items or self.MAX_ITEMS), self.MAX_ITEMS)
+        self.dry_run = dry_run
+
+        # 為替レートと料金表は開始時に1回だけ読み込む
+        self.shipping_calculator = ShippingCalculator(service_id, ship_date)
+        self.profit_calculator = ProfitCalculator(service_id, country_code, ship_date)
+        self.ebay_service = None if dry_run else EbayService(user_id=user_id, priority=PRIORITY_BACKGROUND)
+        self.yahoo_service = YahooAuctionService()
+
+        concurrency = {**self.DEFAULT_CONCURRENCY, **(concurrency or {})}
+        size = max(1, int(queue_size or self.QUEUE_SIZE))
+        funcs = {
+            'detail': self._fetch_detail,
+            'pricing': self._price,
+            'shipping': self._quote_shipping,
+            'register': self._register,
+        }
+        self.search_stage = PipelineStage('search', lambda item: item, 1, 1)
+        self.stages = [
+            PipelineStage(name, funcs[name], max(1, min(int(concurrency[name]), self.MAX_CONCURRENCY)), size)
+            for name in self.STAGES
+        ]
+
+        self.status = self.STATUS_PENDING
+        self.error: Optional[str] = None
+        self.results: List[Dict[str, Any]] = []
+        self._results_lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+        self._threads: List[threading.Thread] = []
+
+    def run(self) -> Dict[str, Any]:
+        """パイプラインを実行し、完了まで待つ"""
+        self.start()
+        self.join()
+        return self.snapshot()
+
+    def start(self) -> None:
+        """パイプラインをバックグラウンドで開始"""
+        self.status = self.STATUS_RUNNING
+        self._started_at = time.monotonic()
+        for index, stage in enumerate(self.stages):
+            downstream = self.stages[index + 1] if index + 1 < len(self.stages) else None
+            for number in range(stage.concurrency):
+                thread = threading.Thread(
+                    target=self._work, args=(stage, downstream),
+                    name=f'listing-pipeline-{stage.name}-{number}', daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+        self.publish()
+        source = threading.Thread(target=self._produce, name='listing-pipeline-search', daemon=True)
+        source.start()
+        self._threads.append(source)
+        monitor = threading.Thread(target=self._monitor, name='listing-pipeline-monitor', daemon=True)
+        monitor.start()
+        self._threads.append(monitor)
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+    def cancel(self) -> None:
+        """未処理の商品を破棄して停止する（処理中の商品は完了を待つ）"""
+        self._cancelled.set()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """進捗・段ごとの統計・処理済みの結果"""
+        end = self._finished_at or time.monotonic()
+        elapsed = end - self._started_at if self._started_at else 0.0
+        with self._results_lock:
+            results = list(self.results)
+        return {
+            'id': self.id,
+            'status': self.status,
+            'error': self.error,
+            'dry_run': self.dry_run,
+            'elapsed_seconds': round(elapsed, 3),
+            'stages': {stage.name: stage.stats(elapsed) for stage in [self.search_stage] + self.stages},
+            'succeeded': sum(1 for result in results if result['success']),
+            'failed': sum(1 for result in results if not result['success']),
+            'results': results,
+        }
+
+    def publish(self) -> None:
+        """進捗を共有キャッシュに書き込む（他のワーカーから参照できるように）"""
+        cache.set(
+            self.CACHE_KEY.format(id=self.id),
+            {'user_id': self.user_id, 'snapshot': self.snapshot()},
+            self.CACHE_TIMEOUT,
+        )
+
+    def _monitor(self) -> None:
+        """完了まで進捗を共有キャッシュに書き込み、他のワーカーで受け付けた停止を反映する"""
+        cancel_key = self.CANCEL_KEY.format(id=self.id)
+        while not self._done.wait(self.PUBLISH_INTERVAL):
+            try:
+                if not self._cancelled.is_set() and cache.get(cancel_key):
+                    self.cancel()
+                self.publish()
+            except Exception as e:
+                logger.warning(f"Failed to publish listing pipeline {self.id}: {str(e)}")
+        try:
+            self.publish()
+        except Exception as e:
+            logger.warning(f"Failed to publish listing pipeline {self.id}: {str(e)}")
+
+    def _produce(self) -> None:
+        """検索結果を最初の段に流す（最初の段が詰まっている間は待機する）"""
+        stage = self.search_stage
+        first = self.stages[0]
+        try:
+            started_at = time.monotonic()
+            stage.in_flight = 1
+            items = self._search()
+            stage.busy_seconds = time.monotonic() - started_at
+            stage.in_flight = 0
+            for listing in items:
+                if self._cancelled.is_set():
+                    break
+                started_at = time.monotonic()
+                first.put({'listing': listing})
+                with stage._lock:
+                    stage.blocked_seconds += time.monotonic() - started_at
+                    stage.processed += 1
+        except Exception as e:
+            logger.error(f"Listing pipeline {self.id} search failed: {str(e)}")
+            stage.failed += 1
+            self.error = str(e)
+        finally:
+            stage.in_flight = 0
+            for _ in range(first.concurrency):
+                first.put(_STOP)
+            # ワーカースレッドで開いたDB接続を閉じる
+            connection.close()
+
+    def _work(self, stage: PipelineStage, downstream: Optional[PipelineStage]) -> None:
+        try:
+            while True:
+                item = stage.queue.get()
+                if item is _STOP:
+                    break
+                if self._cancelled.is_set():
+                    continue
+
+                with stage._lock:
+                    stage.in_flight += 1
+                started_at = time.monotonic()
+                try:
+                    item = stage.func(item)
+                    error = None
+                except Exception as e:
+                    error = str(e) or e.__class__.__name__
+                elapsed = time.monotonic() - started_at
+                with stage._lock:
+                    stage.in_flight -= 1
+                    stage.busy_seconds += elapsed
+                    if error is None:
+                        stage.processed += 1
+                    else:
+                        stage.failed += 1
+
+                if error is not None:
+                    self._add_result(item, stage.name, error)
+                elif downstream is not None:
+                    started_at = time.monotonic()
+                    downstream.put(item)
+                    with stage._lock:
+                        stage.blocked_seconds += time.monotonic() - started_at
+                else:
+                    self._add_result(item)
+        finally:
+            connection.close()
+            if stage.worker_finished():
+                if downstream is not None:
+                    for _ in range(downstream.concurrency):
+                        downstream.put(_STOP)
+                else:
+                    self._finish()
+
+    def _finish(self) -> None:
+        self._finished_at = time.monotonic()
+        if self._cancelled.is_set():
+            self.status = self.STATUS_CANCELLED
+        elif self.error is not None:
+            self.status = self.STATUS_FAILED
+        else:
+            self.status = self.STATUS_COMPLETED
+        self._done.set()
+        snapshot = self.snapshot()
+        logger.info(
+            f"Listing pipeline {self.id} {self.status}: {snapshot['succeeded']} succeeded, "
+            f"{snapshot['failed']} failed in {snapshot['elapsed_seconds']}s"
+        )
+
+    def _add_result(self, item: Dict[str, Any], failed_stage: Optional[str] = None, error: Optional[str] = None) -> None:
+        listing = item.get('listing', {})
+        result = {
+            'url': listing.get('url'),
+            'title': (item.get('detail') or listing).get('title'),
+            'success': error is None,
+        }
+        if error is not None:
+            result.update({'stage': failed_stage, 'error': error})
+        else:
+            result.update({
+                'start_price': item['pricing']['start_price'],
+                'shipping_cost': item['shipping']['shipping_cost'],
+                'registration': item['registration'],
+            })
+        with self._results_lock:
+            self.results.append(result)
+
+    def _search(self) -> List[Dict[str, Any]]:
+        result = self.yahoo_service.search_items(self.search_params)
+        return result['items'][:self.max_items]
+
+    def _fetch_detail(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        item['detail'] = self.yahoo_service.fetch_item_detail(item['listing'].get('url'))
+        return item
+
+    def _price(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """仕入れ価格と国内送料から目標利益率を満たす販売価格を求める（国際送料は購入者負担）"""
+        detail = item['detail']
+        purchase_price = ProfitCalculator.to_decimal(detail.get('buy_now_price') or detail.get('price'))
+        if purchase_price is None or purchase_price <= 0:
+            raise ValidationError("仕入れ価格が不正です")
+        cost_jpy = purchase_price + ProfitCalculator.parse_postage(detail.get('shipping') or item['listing'].get('shipping'))
+        cost = self.profit_calculator.to_sale_currency(cost_jpy)
+        item['pricing'] = {
+            'cost_jpy': float(cost_jpy),
+            'cost': float(cost),
+            'start_price': str(self.profit_calculator.target_price(cost)),
+        }
+        return item
+
+    def _quote_shipping(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        result = self.shipping_calculator.calculate_shipping_cost(
+            self.country_code,
+            int(self.package.get('length', 0)),
+            int(self.package.get('width', 0)),
+            int(self.package.get('height', 0)),
+            float(self.package.get('weight', 0)),
+        )
+        if not result['success']:
+            raise ValidationError(result['error'])
+        amount_jpy = Decimal(str(result['data']['total_amount']))
+        item['shipping'] = {
+            'shipping_cost_jpy': float(amount_jpy),
+            'shipping_cost': str(self.profit_calculator.to_sale_currency(amount_jpy)),
+        }
+        return item
+
+    def _register(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        product_data = self._build_product_data(item)
+        if self.dry_run:
+            item['registration'] = {'product_data': product_data}
+        else:
+            item['registration'] = self.ebay_service.register_product(product_data)
+        return item
+
+    def _build_product_data(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        detail = item['detail']
+        currency = self.profit_calculator.currency
+        listing = copy.deepcopy(self.listing)
+        return {
+            'title': detail['title'][:80],  # eBayのタイトルは80文字まで
+            'description': detail.get('description') or detail['title'],
+            'primaryCategory': {'categoryId': str(listing['categoryId'])},
+            'startPrice': {'value': item['pricing']['start_price'], 'currencyId': currency},
+            'quantity': listing['quantity'],
+            'listingDuration': listing['listingDuration'],
+            'listingType': listing['listingType'],
+            'country': listing['country'],
+            'currency': currency,
+            'paymentMethods': listing['paymentMethods'],
+            'condition': {'conditionId': str(listing['conditionId'])},
+            'returnPolicy': listing['returnPolicy'],
+            'pictureUrls': detail.get('image_urls', []),
+            'shippingDetails': {
+                'shippingServiceOptions': [{
+                    'shippingService': listing['shippingService'],
+                    'shippingServiceCost': {'value': item['shipping']['shipping_cost'], 'currencyId': currency},
+                }],
+            },
+        }
+
+class PipelineRegistry:
+    """
+    バックグラウンドで実行中・実行済みのパイプライン
+
+    パイプラインは開始したプロセスで実行する（プロセス内では古いものから破棄する）。
+    進捗は共有キャッシュにも書き込まれるため、他のワーカーでも参照・停止できる
+    （停止は実行中のプロセスが次に進捗を書き込む際に反映される）。
+    """
+    MAX_PIPELINES = 50
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pipelines: 'OrderedDict[str, ListingPipeline]' = OrderedDict()
+
+    def start(self, pipeline: ListingPipeline) -> ListingPipeline:
+        with self._lock:
+            while len(self._pipelines) >= self.MAX_PIPELINES:
+                oldest = next((key for key, value in self._pipelines.items()
+                               if value.status not in (ListingPipeline.STATUS_PENDING, ListingPipeline.STATUS_RUNNING)), None)
+                if oldest is None:
+                    raise ValidationError("実行中のパイプラインが多すぎます")
+                del self._pipelines[oldest]
+            self._pipelines[pipeline.id] = pipeline
+        pipeline.start()
+
+        # ユーザーごとのパイプラインの一覧（他のワーカーと同時に開始した場合は一覧から漏れることがあるが、
+        # 個別の参照・停止には影響しない）
+        key = ListingPipeline.USER_KEY.format(user_id=pipeline.user_id)
+        ids = [pipeline_id for pipeline_id in cache.get(key, []) if pipeline_id != pipeline.id]
+        cache.set(key, ids[-(self.MAX_PIPELINES - 1):] + [pipeline.id], ListingPipeline.CACHE_TIMEOUT)
+        return pipeline
+
+    def snapshot(self, pipeline_id: str, user_id: int) -> Optional[Dict[str, Any]]:
+        """パイプラインの進捗（このプロセスで実行中でなければ共有キャッシュから取得）"""
+        pipeline = self._get_local(pipeline_id, user_id)
+        if pipeline is not None:
+            return pipeline.snapshot()
+        entry = cache.get(ListingPipeline.CACHE_KEY.format(id=pipeline_id))
+        return entry['snapshot'] if entry is not None and entry['user_id'] == user_id else None
+
+    def cancel(self, pipeline_id: str, user_id: int) -> Optional[Dict[str, Any]]:
+        """パイプラインを停止し、進捗を返す（存在しない場合はNone）"""
+        pipeline = self._get_local(pipeline_id, user_id)
+        if pipeline is not None:
+            pipeline.cancel()
+            return pipeline.snapshot()
+        snapshot = self.snapshot(pipeline_id, user_id)
+        if snapshot is not None and snapshot['status'] in (ListingPipeline.STATUS_PENDING, ListingPipeline.STATUS_RUNNING):
+            cache.set(ListingPipeline.CANCEL_KEY.format(id=pipeline_id), True, ListingPipeline.CACHE_TIMEOUT)
+        return snapshot
+
+    def list(self, user_id: int) -> List[Dict[str, Any]]:
+        """ユーザーのパイプラインの進捗（開始した順）"""
+        with self._lock:
+            local = {pipeline.id: pipeline for pipeline in self._pipelines.values() if pipeline.user_id == user_id}
+        ids = cache.get(ListingPipeline.USER_KEY.format(user_id=user_id), [])
+        ids += [pipeline_id for pipeline_id in local if pipeline_id not in ids]
+        entries = cache.get_many([ListingPipeline.CACHE_KEY.format(id=pipeline_id) for pipeline_id in ids if pipeline_id not in local])
+
+        snapshots = []
+        for pipeline_id in ids:
+            if pipeline_id in local:
+                snapshots.append(local[pipeline_id].snapshot())
+                continue
+            entry = entries.get(ListingPipeline.CACHE_KEY.format(id=pipeline_id))
+            if entry is not None and entry['user_id'] == user_id:
+                snapshots.append(entry['snapshot'])
+        return snapshots
+
+    def _get_local(self, pipeline_id: str, user_id: int) -> Optional[ListingPipeline]:
+        with self._lock:
+            pipeline = self._pipelines.get(pipeline_id)
+        return pipeline if pipeline is not None and pipeline.user_id == user_id else None
+
+pipeline_registry = PipelineRegistry()
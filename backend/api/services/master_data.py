@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+from api.models.master import Service, Countries
+from api.services.rate_card import rate_card_index
+import hashlib
+import threading
+from typing import Dict, Tuple
+
+class MasterDataCache:
+    """
+    送料計算画面で使うマスタデータ（配送サービスと国の一覧）のレスポンスを事前に作成して保持する
+
+    マスタデータのバージョン（api.signalsで更新）ごとにJSONを一度だけ作成し、
+    その内容から強いETagを求める。
+    """
+    CACHE_KEY_PREFIX = 'master_data:shipping'
+    CACHE_TIMEOUT = 60 * 60 * 24
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[int, Tuple[str, bytes]] = {}
+
+    def get(self) -> Tuple[str, bytes]:
+        """
+        Returns:
+            tuple: ETag（引用符付き）とJSONレスポンスの本文
+        """
+        version = rate_card_index.version
+        entry = self._entries.get(version)
+        if entry is not None:
+            return entry
+
+        cache_key = f"{self.CACHE_KEY_PREFIX}:{version}"
+        # 複数のワーカーで同時に作成しないようにget_or_setを使う
+        entry = cache.get_or_set(cache_key, self._build, self.CACHE_TIMEOUT)
+        with self._lock:
+            # 古いバージョンは保持しない
+            self._entries = {version: entry}
+        return entry
+
+    @staticmethod
+    def _build() -> Tuple[str, bytes]:
+        services = Service.objects.all().values('id', 'service_name')
+        # 同じ国が複数の配送サービスに登録されている場合は1件にまとめる
+        countries = Countries.objects.values('country_code', 'country_name', 'country_name_jp').distinct()
+        body = JSONRenderer().render({
+            'success': True,
+            'message': 'データの取得に成功しました',
+            'data': {
+                'services': list(services),
+                'countries': list(countries)
+            }
+        })
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        return etag, body
+
+master_data_cache = MasterDataCache()
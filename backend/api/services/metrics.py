@@ -0,0 +1,112 @@
+import threading
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, Optional, Tuple
+
+class ApiCallMetrics:
+    """
+    外部API呼び出しの所要時間と結果をプロセス内で集計する
+
+    呼び出し名ごとに件数、結果（成功／エラー種別）、eBayのエラーコード、
+    所要時間のヒストグラム、レスポンスサイズを保持する。
+    """
+    # 所要時間のヒストグラムの区切り（秒）
+    LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    OUTCOME_SUCCESS = 'success'
+    OUTCOME_API_ERROR = 'api_error'  # eBayがエラーを返した
+    OUTCOME_HTTP_ERROR = 'http_error'  # HTTPステータスがエラー
+    OUTCOME_NETWORK_ERROR = 'network_error'  # 接続失敗・タイムアウト
+    OUTCOME_INVALID_RESPONSE = 'invalid_response'  # レスポンスを解析できない
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def record(self, api: str, call_name: str, latency: float, outcome: str,
+               response_size: int = 0, error_code: Optional[str] = None) -> None:
+        """
+        1回の呼び出し結果を記録
+
+        Args:
+            api: API種別（例：'trading', 'oauth'）
+            call_name: 呼び出し名（例：'AddFixedPriceItem'）
+            latency: 所要時間（秒）
+            outcome: 呼び出し結果（OUTCOME_*）
+            response_size: レスポンスのバイト数
+            error_code: eBayのエラーコード
+        """
+        bucket = bisect_left(self.LATENCY_BUCKETS, latency)
+        with self._lock:
+            stats = self._calls.get((api, call_name))
+            if stats is None:
+                stats = self._calls[(api, call_name)] = {
+                    'count': 0,
+                    'outcomes': Counter(),
+                    'error_codes': Counter(),
+                    'latency_sum': 0.0,
+                    'latency_max': 0.0,
+                    'latency_buckets': [0] * (len(self.LATENCY_BUCKETS) + 1),
+                    'response_bytes_sum': 0,
+                    'response_bytes_max': 0,
+                }
+            stats['count'] += 1
+            stats['outcomes'][outcome] += 1
+            if error_code:
+                stats['error_codes'][error_code] += 1
+            stats['latency_sum'] += latency
+            stats['latency_max'] = max(stats['latency_max'], latency)
+            stats['latency_buckets'][bucket] += 1
+            stats['response_bytes_sum'] += response_size
+            stats['response_bytes_max'] = max(stats['response_bytes_max'], response_size)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """集計結果を取得"""
+        with self._lock:
+            calls = {key: {**stats, 'latency_buckets': list(stats['latency_buckets'])} for key, stats in self._calls.items()}
+
+        result = {}
+        for (api, call_name), stats in sorted(calls.items()):
+            count = stats['count']
+            result.setdefault(api, {})[call_name] = {
+                'count': count,
+                'outcomes': dict(stats['outcomes']),
+                'error_rate': round(1 - stats['outcomes'][self.OUTCOME_SUCCESS] / count, 4),
+                'error_codes': dict(stats['error_codes']),
+                'latency': {
+                    'avg': round(stats['latency_sum'] / count, 4),
+                    'max': round(stats['latency_max'], 4),
+                    'p50': self._percentile(stats['latency_buckets'], count, 0.50),
+                    'p95': self._percentile(stats['latency_buckets'], count, 0.95),
+                    'p99': self._percentile(stats['latency_buckets'], count, 0.99),
+                    'histogram': {
+                        self._bucket_label(i): n for i, n in enumerate(stats['latency_buckets'])
+                    },
+                },
+                'response_bytes': {
+                    'avg': stats['response_bytes_sum'] // count,
+                    'max': stats['response_bytes_max'],
+                },
+            }
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._calls.clear()
+
+    def _percentile(self, buckets: list, count: int, quantile: float) -> Optional[float]:
+        """ヒストグラムからパーセンタイルを推定（該当する区切りの上限を返す）"""
+        target = quantile * count
+        cumulative = 0
+        for i, n in enumerate(buckets):
+            cumulative += n
+            if cumulative >= target:
+                return self.LATENCY_BUCKETS[i] if i < len(self.LATENCY_BUCKETS) else None
+        return None
+
+    def _bucket_label(self, index: int) -> str:
+        if index < len(self.LATENCY_BUCKETS):
+            return f"le_{self.LATENCY_BUCKETS[index]}"
+        return 'le_inf'
+
+api_metrics = ApiCallMetrics()
@@ -0,0 +1,227 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from api.services.shipping_calculator import ShippingCalculator
+import logging
+import time
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PackingItem:
+    item_id: Any
+    dimensions: Tuple[int, int, int]  # 長い順（cm）
+    weight: Decimal  # kg
+
+    @property
+    def volume(self) -> int:
+        length, width, height = self.dimensions
+        return length * width * height
+
+@dataclass
+class PackingBox:
+    name: str
+    dimensions: Tuple[int, int, int]  # 長い順（cm）
+    weight: Decimal  # 箱自体の重量（kg）
+
+    @property
+    def volume(self) -> int:
+        length, width, height = self.dimensions
+        return length * width * height
+
+    def fits(self, item: PackingItem) -> bool:
+        """向きを変えて1つの商品が入るか"""
+        return all(item_size <= box_size for item_size, box_size in zip(item.dimensions, self.dimensions))
+
+class PackageConsolidator:
+    """
+    複数の商品をまとめて発送する場合に、送料の合計が最も安い箱詰めを求める
+
+    商品を箱ごとのグループに分ける組み合わせを分枝限定法で探索し、グループごとに
+    送料が最も安い箱を料金表（メモリ上の料金表とLRUキャッシュ）から求める。
+    料金は重量に対して単調に増えるものとし、途中のグループの送料の合計が
+    それまでの最安値以上になった時点でその分岐を打ち切る。
+    制限時間を超えた場合はそれまでの最安の箱詰めを返す（'optimal'がFalse）。
+
+    箱に入るかどうかは、各商品が向きを変えて箱に入り、かつ商品の体積の合計が
+    箱の容積のFILL_RATIO以下であることで判定する（厳密な3次元の配置は求めない）。
+    """
+    FILL_RATIO = Decimal('0.9')
+    TIME_BUDGET_MS = int(getattr(settings, 'SHIPPING_CONSOLIDATION_TIME_BUDGET_MS', 200))
+
+    def __init__(self, service_id: int, ship_date: Optional[date] = None, allow_oversize: bool = False):
+        self.calculator = ShippingCalculator(service_id, ship_date)
+        # Falseの場合はサイズ超過の追加料金がかかる箱を使わない
+        self.allow_oversize = allow_oversize
+
+    def optimize(self, country_code: str, items: List[Dict[str, Any]], boxes: List[Dict[str, Any]],
+                 time_budget_ms: Optional[int] = None) -> Dict[str, Any]:
+        """
+        送料の合計が最も安い箱詰めを求める
+
+        Args:
+            country_code: 配送先の国コード
+            items: 'length'、'width'、'height'、'weight'（と任意の'id'）を持つ商品のリスト
+            boxes: 'name'、'length'、'width'、'height'（と任意の箱の重量'weight'）を持つ箱のリスト
+            time_budget_ms: 探索の制限時間（ミリ秒。省略時はSHIPPING_CONSOLIDATION_TIME_BUDGET_MS）
+
+        Returns:
+            dict: 箱ごとの商品と送料（packages）、送料の合計、1商品ずつ発送した場合の送料の合計
+        """
+        if country_code not in self.calculator.card.countries:
+            raise ValidationError(f"配送先の国（{country_code}）が設定されていません")
+        self.country_code = country_code
+        # 大きい商品から順に割り当てると早い段階で打ち切れる
+        self.items = sorted(self._parse_items(items), key=lambda item: item.volume, reverse=True)
+        self.boxes = [box for box in self._parse_boxes(boxes) if self._within_limits(box)]
+        if not self.boxes:
+            raise ValidationError("サイズ制限内の箱がありません")
+
+        # 箱ごとに単独で入る商品の集合（ビットマスク）と体積の上限
+        self.box_masks = [
+            sum(1 << i for i, item in enumerate(self.items) if box.fits(item))
+            for box in self.boxes
+        ]
+        self.box_capacities = [box.volume * self.FILL_RATIO for box in self.boxes]
+        self.group_costs: Dict[int, Optional[Tuple[Decimal, int, Dict[str, Any]]]] = {}
+
+        singles = []
+        for i, item in enumerate(self.items):
+            cost = self._group_cost(1 << i)
+            if cost is None:
+                raise ValidationError(f"商品（ID: {item.item_id}）が入る箱がありません")
+            singles.append(cost[0])
+        separate_amount = sum(singles)
+
+        budget = self.TIME_BUDGET_MS if time_budget_ms is None else time_budget_ms
+        started_at = time.perf_counter()
+        self.deadline = started_at + budget / 1000
+        self.best_amount = separate_amount
+        self.best_groups = [1 << i for i in range(len(self.items))]
+        self.nodes = 0
+        self.timed_out = False
+        self._search(0, [], [], Decimal('0'))
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+
+        logger.info(
+            f"Consolidated {len(self.items)} items into {len(self.best_groups)} packages "
+            f"({self.nodes} nodes, {elapsed_ms:.1f}ms, optimal={not self.timed_out})"
+        )
+        return {
+            'packages': [self._format(group) for group in self.best_groups],
+            'total_amount': float(self.best_amount),
+            'separate_amount': float(separate_amount),
+            'optimal': not self.timed_out,
+            'evaluated': self.nodes,
+            'elapsed_ms': round(elapsed_ms, 1),
+        }
+
+    def _search(self, index: int, groups: List[int], costs: List[Decimal], total: Decimal) -> None:
+        """index番目の商品を既存のグループか新しいグループに割り当てる"""
+        if self.timed_out:
+            return
+        self.nodes += 1
+        if time.perf_counter() > self.deadline:
+            self.timed_out = True
+            return
+        if index == len(self.items):
+            if total < self.best_amount:
+                self.best_amount = total
+                self.best_groups = list(groups)
+            return
+
+        bit = 1 << index
+        for j, group in enumerate(groups):
+            cost = self._group_cost(group | bit)
+            if cost is None:
+                continue
+            previous = costs[j]
+            new_total = total - previous + cost[0]
+            if new_total >= self.best_amount:
+                continue
+            groups[j], costs[j] = group | bit, cost[0]
+            self._search(index + 1, groups, costs, new_total)
+            groups[j], costs[j] = group, previous
+
+        cost = self._group_cost(bit)
+        if total + cost[0] < self.best_amount:
+            groups.append(bit)
+            costs.append(cost[0])
+            self._search(index + 1, groups, costs, total + cost[0])
+            groups.pop()
+            costs.pop()
+
+    def _group_cost(self, group: int) -> Optional[Tuple[Decimal, int, Dict[str, Any]]]:
+        """商品のグループを最も安く送れる箱の送料・箱の番号・計算結果（入る箱がない場合はNone）"""
+        if group in self.group_costs:
+            return self.group_costs[group]
+
+        members = [item for i, item in enumerate(self.items) if group >> i & 1]
+        volume = sum(item.volume for item in members)
+        weight = sum((item.weight for item in members), Decimal('0'))
+        best = None
+        for b, box in enumerate(self.boxes):
+            if group & ~self.box_masks[b] or volume > self.box_capacities[b]:
+                continue
+            length, width, height = box.dimensions
+            result = self.calculator.calculate_shipping_cost(
+                self.country_code, length, width, height, float(weight + box.weight)
+            )
+            if not result['success']:
+                continue
+            amount = Decimal(str(result['data']['total_amount']))
+            if best is None or amount < best[0]:
+                best = (amount, b, result['data'])
+        self.group_costs[group] = best
+        return best
+
+    def _format(self, group: int) -> Dict[str, Any]:
+        amount, b, quote = self.group_costs[group]
+        box = self.boxes[b]
+        members = [item for i, item in enumerate(self.items) if group >> i & 1]
+        length, width, height = box.dimensions
+        return {
+            'box': box.name,
+            'length': length,
+            'width': width,
+            'height': height,
+            'items': [item.item_id for item in members],
+            'weight': float(sum((item.weight for item in members), box.weight)),
+            'quote': quote,
+        }
+
+    def _within_limits(self, box: PackingBox) -> bool:
+        length, width, height = box.dimensions
+        is_oversized, _ = self.calculator.check_size_restrictions(length, width, height)
+        return self.allow_oversize or not is_oversized
+
+    @staticmethod
+    def _parse_items(items: List[Dict[str, Any]]) -> List[PackingItem]:
+        parsed = []
+        for index, item in enumerate(items):
+            try:
+                dimensions = tuple(sorted((int(item['length']), int(item['width']), int(item['height'])), reverse=True))
+                weight = Decimal(str(float(item['weight'])))
+            except (KeyError, TypeError, ValueError, OverflowError, InvalidOperation):
+                raise ValidationError(f"商品（{index + 1}件目）の寸法・重量が不正です")
+            if min(dimensions) <= 0 or not weight.is_finite() or weight <= 0:
+                raise ValidationError(f"商品（{index + 1}件目）の寸法・重量が不正です")
+            parsed.append(PackingItem(item.get('id', index), dimensions, weight))
+        return parsed
+
+    @staticmethod
+    def _parse_boxes(boxes: List[Dict[str, Any]]) -> List[PackingBox]:
+        parsed = []
+        for index, box in enumerate(boxes):
+            try:
+                dimensions = tuple(sorted((int(box['length']), int(box['width']), int(box['height'])), reverse=True))
+                weight = Decimal(str(float(box.get('weight') or 0)))
+            except (KeyError, TypeError, ValueError, OverflowError, InvalidOperation):
+                raise ValidationError(f"箱（{index + 1}件目）の寸法・重量が不正です")
+            if min(dimensions) <= 0 or not weight.is_finite() or weight < 0:
+                raise ValidationError(f"箱（{index + 1}件目）の寸法・重量が不正です")
+            parsed.append(PackingBox(str(box.get('name') or f'Box {index + 1}'), dimensions, weight))
+        return parsed
@@ -0,0 +1,129 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from api.services.scraping.yahoo_auction import YahooAuctionService
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class ProductDataService:
+    """
+    仕入れ元の商品ページを取得して商品情報を返す
+
+    取得結果はURLごとに共有キャッシュ（django.core.cache）に保存し、
+    同じ商品の再取得ではページを取得しない。
+    """
+    CACHE_KEY_PREFIX = 'product_data'
+    CACHE_TIMEOUT = int(getattr(settings, 'PRODUCT_DATA_CACHE_TIMEOUT', 600))
+
+    @classmethod
+    def get_cached(cls, url: str) -> Optional[Dict[str, Any]]:
+        return cache.get(cls._cache_key(url))
+
+    @classmethod
+    def fetch(cls, url: str) -> Dict[str, Any]:
+        """商品情報を取得（キャッシュがない場合は商品ページを取得してキャッシュする）"""
+        detail = cls.get_cached(url)
+        if detail is None:
+            detail = YahooAuctionService().fetch_item_detail(url)
+            cache.set(cls._cache_key(url), detail, cls.CACHE_TIMEOUT)
+        return detail
+
+    @classmethod
+    def _cache_key(cls, url: str) -> str:
+        return f"{cls.CACHE_KEY_PREFIX}:{hashlib.sha256(url.encode('utf-8')).hexdigest()}"
+
+class ProductDataJobs:
+    """
+    商品ページの取得をバックグラウンドで実行する
+
+    ジョブの状態と結果は共有キャッシュ（product_data_job:<ID>）に保存するため、
+    どのワーカーからでも参照できる。取得自体は登録したプロセスのスレッドで実行し、
+    同じURLの取得がこのプロセスで実行中の場合は新しいジョブを作らずに実行中のジョブを返す。
+    """
+    MAX_WORKERS = int(getattr(settings, 'PRODUCT_DATA_MAX_WORKERS', 4))
+    MAX_JOBS = 500  # プロセスごとの実行中・待機中のジョブ数の上限
+    CACHE_KEY_PREFIX = 'product_data_job'
+    CACHE_TIMEOUT = int(getattr(settings, 'PRODUCT_DATA_JOB_TIMEOUT', 3600))
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active: Dict[str, str] = {}  # URL -> 実行中のジョブID
+        self._done: Dict[str, threading.Event] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def submit(self, url: str) -> Dict[str, Any]:
+        """ジョブを登録（同じURLのジョブが実行中の場合はそのジョブ）"""
+        with self._lock:
+            job_id = self._active.get(url)
+            if job_id is not None:
+                job = self.get(job_id)
+                if job is not None:
+                    return job
+            if len(self._active) >= self.MAX_JOBS:
+                raise ValidationError("実行中のジョブが多すぎます。しばらくしてから再度お試しください")
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.MAX_WORKERS, thread_name_prefix='product-data')
+            job = {
+                'id': uuid.uuid4().hex,
+                'url': url,
+                'status': self.STATUS_PENDING,
+                'result': None,
+                'error': None,
+                'created_at': time.time(),
+                'finished_at': None,
+            }
+            self._save(job)
+            self._active[url] = job['id']
+            self._done[job['id']] = threading.Event()
+            self._executor.submit(self._run, dict(job))
+            return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return cache.get(self._cache_key(job_id))
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """ジョブの完了を最大timeout秒待ってからジョブの状態を返す（他のプロセスのジョブは待たない）"""
+        with self._lock:
+            done = self._done.get(job_id)
+        if done is not None:
+            done.wait(timeout)
+        return self.get(job_id)
+
+    def _run(self, job: Dict[str, Any]) -> None:
+        try:
+            job['status'] = self.STATUS_RUNNING
+            self._save(job)
+            try:
+                result, error, job_status = ProductDataService.fetch(job['url']), None, self.STATUS_COMPLETED
+            except Exception as e:
+                logger.error(f"Failed to fetch product data {job['url']}: {str(e)}")
+                result, error, job_status = None, str(e), self.STATUS_FAILED
+            job.update({'status': job_status, 'result': result, 'error': error, 'finished_at': time.time()})
+            self._save(job)
+        finally:
+            with self._lock:
+                self._active.pop(job['url'], None)
+                done = self._done.pop(job['id'])
+            done.set()
+
+    def _save(self, job: Dict[str, Any]) -> None:
+        cache.set(self._cache_key(job['id']), job, self.CACHE_TIMEOUT)
+
+    @classmethod
+    def _cache_key(cls, job_id: str) -> str:
+        return f"{cls.CACHE_KEY_PREFIX}:{job_id}"
+
+product_data_jobs = ProductDataJobs()
@@ -0,0 +1,181 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from api.services.currency import CurrencyService
+from api.services.shipping_calculator import ShippingCalculator
+import logging
+import re
+from datetime import date
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP, ROUND_UP
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class ProfitCalculator:
+    """
+    Yahoo!オークションの商品をeBayで販売した場合の仕入れ原価・販売価格・利益率をまとめて計算する
+
+    為替レートと料金表は最初に1回だけ取得し、仕入れ価格・国内送料・国際送料・原価・販売価格を
+    列ごとにまとめて求める（国際送料はShippingCalculator.calculate_shipping_costsで一括計算）。
+    """
+    FINAL_VALUE_FEE_RATE = Decimal(str(getattr(settings, 'EBAY_FINAL_VALUE_FEE_RATE', '0.1325')))  # eBayの落札手数料率
+    FIXED_FEE = Decimal(str(getattr(settings, 'EBAY_FIXED_FEE', '0.30')))  # 1注文あたりの固定手数料（USD）
+    TARGET_MARGIN = Decimal(str(getattr(settings, 'PROFIT_TARGET_MARGIN', '0.20')))  # 目標利益率
+    DEFAULT_DOMESTIC_SHIPPING = Decimal(str(getattr(settings, 'PROFIT_DEFAULT_DOMESTIC_SHIPPING', '1000')))  # 送料が不明な場合の国内送料（円）
+
+    CENT = Decimal('0.01')
+    POSTAGE_PATTERN = re.compile(r'([0-9][0-9,]*)\s*円')
+
+    def __init__(self, service_id: int, country_code: str, ship_date: Optional[date] = None,
+                 target_margin: Optional[Decimal] = None, currency: str = 'USD'):
+        self.calculator = ShippingCalculator(service_id, ship_date)
+        self.country_code = country_code
+        try:
+            self.target_margin = self.TARGET_MARGIN if target_margin is None else Decimal(str(target_margin))
+        except InvalidOperation:
+            raise ValidationError("目標利益率が不正です")
+        if not self.target_margin.is_finite() or not Decimal('0') <= self.target_margin < 1 - self.FINAL_VALUE_FEE_RATE:
+            raise ValidationError("目標利益率が不正です")
+        self.currency = currency
+        self.rate_quote = CurrencyService.get_rate_quote('JPY', currency)
+        # 固定手数料はUSDのため販売通貨に換算しておく
+        self.fixed_fee = (
+            self.FIXED_FEE * Decimal(str(CurrencyService.get_exchange_rate('USD', currency)))
+        ).quantize(self.CENT, rounding=ROUND_HALF_UP)
+
+    def calculate(self, listings: List[Dict[str, Any]], package: Dict[str, Any],
+                  use_buy_now: bool = False) -> Dict[str, Any]:
+        """
+        商品ごとの原価と販売価格を計算し、利益率の高い順に並べる
+
+        Args:
+            listings: YahooAuctionService.search_itemsの'items'（'ebay_price'に想定販売価格、
+                      'length'・'width'・'height'・'weight'に商品ごとの梱包サイズを指定可）
+            package: 商品ごとの指定がない場合の梱包サイズ（'length'、'width'、'height'、'weight'）
+            use_buy_now: Trueの場合は即決価格がある商品は即決価格で仕入れる
+
+        Returns:
+            dict: 為替レートと商品ごとの計算結果（results。想定販売価格の利益率の高い順、
+                  想定販売価格がない商品は目標利益率での販売価格の安い順に後ろに並べる）
+        """
+        count = len(listings)
+        errors: List[Optional[str]] = [None] * count
+
+        # 仕入れ価格・国内送料（円）
+        purchase_prices = [Decimal('0')] * count
+        for i, listing in enumerate(listings):
+            price = listing.get('buy_now_price') if use_buy_now and listing.get('buy_now_price') else listing.get('price')
+            value = self.to_decimal(price)
+            if value is None or value <= 0:
+                errors[i] = '仕入れ価格が不正です'
+            else:
+                purchase_prices[i] = value
+        domestic_shipping = [self.parse_postage(listing.get('shipping')) for listing in listings]
+
+        # 国際送料（円）
+        packages = [
+            {
+                'country_code': self.country_code,
+                **{key: listing.get(key) or package.get(key) for key in ('length', 'width', 'height', 'weight')},
+            }
+            for listing in listings
+        ]
+        quotes = self.calculator.calculate_shipping_costs(packages)
+        international_shipping = [Decimal('0')] * count
+        for i, quote in enumerate(quotes):
+            if not quote['success']:
+                errors[i] = errors[i] or quote['error']
+            else:
+                international_shipping[i] = Decimal(str(quote['data']['total_amount']))
+
+        # 原価（円・販売通貨）
+        landed_jpy = [sum(costs) for costs in zip(purchase_prices, domestic_shipping, international_shipping)]
+        landed = [self.to_sale_currency(cost) for cost in landed_jpy]
+
+        target_prices = [self.target_price(cost) for cost in landed]
+
+        # 想定販売価格での利益と利益率
+        ebay_prices = [self.to_decimal(listing.get('ebay_price')) for listing in listings]
+        ebay_prices = [price if price is not None and price > 0 else None for price in ebay_prices]
+        profits = [
+            (price - (price * self.FINAL_VALUE_FEE_RATE).quantize(self.CENT, rounding=ROUND_HALF_UP) - self.fixed_fee - cost)
+            if price else None
+            for price, cost in zip(ebay_prices, landed)
+        ]
+        margins = [
+            (profit / price).quantize(Decimal('0.0001'), rounding=ROUND_HALF_UP) if profit is not None else None
+            for profit, price in zip(profits, ebay_prices)
+        ]
+
+        results = []
+        for i, listing in enumerate(listings):
+            if errors[i] is not None:
+                results.append({'url': listing.get('url'), 'title': listing.get('title'), 'success': False, 'error': errors[i]})
+                continue
+            results.append({
+                'url': listing.get('url'),
+                'title': listing.get('title'),
+                'success': True,
+                'purchase_price': float(purchase_prices[i]),
+                'domestic_shipping': float(domestic_shipping[i]),
+                'international_shipping': float(international_shipping[i]),
+                'landed_cost_jpy': float(landed_jpy[i]),
+                'landed_cost': float(landed[i]),
+                'target_price': float(target_prices[i]),
+                'ebay_price': float(ebay_prices[i]) if ebay_prices[i] else None,
+                'profit': float(profits[i]) if profits[i] is not None else None,
+                'margin': float(margins[i]) if margins[i] is not None else None,
+            })
+
+        results.sort(key=self._sort_key)
+        succeeded = sum(1 for result in results if result['success'])
+        logger.info(f"Calculated profit for {count} listings ({succeeded} succeeded)")
+        return {
+            'currency': self.currency,
+            'rate': self.rate_quote['rate'],
+            'rate_as_of': self.rate_quote['as_of'],
+            'rate_source': self.rate_quote['source'],
+            'fixed_fee': float(self.fixed_fee),
+            'target_margin': float(self.target_margin),
+            'results': results,
+            'succeeded': succeeded,
+            'failed': count - succeeded,
+        }
+
+    def to_sale_currency(self, amount_jpy: Decimal) -> Decimal:
+        """円の金額を販売通貨に換算"""
+        return (amount_jpy * Decimal(str(self.rate_quote['rate']))).quantize(self.CENT, rounding=ROUND_HALF_UP)
+
+    def target_price(self, cost: Decimal) -> Decimal:
+        """販売通貨の原価から目標利益率を満たす販売価格を求める"""
+        # 価格 - 価格 * 手数料率 - 固定手数料 - 原価 = 価格 * 目標利益率
+        divisor = 1 - self.FINAL_VALUE_FEE_RATE - self.target_margin
+        return ((cost + self.fixed_fee) / divisor).quantize(self.CENT, rounding=ROUND_UP)
+
+    @staticmethod
+    def _sort_key(result: Dict[str, Any]):
+        if not result['success']:
+            return (2, 0)
+        if result['margin'] is not None:
+            return (0, -result['margin'])
+        return (1, result['target_price'])
+
+    @classmethod
+    def parse_postage(cls, text: Optional[str]) -> Decimal:
+        """検索結果の送料表示から国内送料（円）を求める（不明な場合はDEFAULT_DOMESTIC_SHIPPING）"""
+        if text:
+            if '無料' in text:
+                return Decimal('0')
+            match = cls.POSTAGE_PATTERN.search(text)
+            if match:
+                return Decimal(match.group(1).replace(',', ''))
+        return cls.DEFAULT_DOMESTIC_SHIPPING
+
+    @staticmethod
+    def to_decimal(value: Any) -> Optional[Decimal]:
+        if value is None or value == '':
+            return None
+        try:
+            result = Decimal(str(value).replace(',', '').replace('円', '').strip())
+        except InvalidOperation:
+            return None
+        return result if result.is_finite() else None
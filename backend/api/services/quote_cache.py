@@ -0,0 +1,73 @@
+from django.conf import settings
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+class QuoteCache:
+    """
+    送料計算結果のLRUキャッシュ
+
+    料金表のバージョンが変わると（マスタデータの変更時）保持している結果をすべて破棄する。
+    """
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Hashable, Dict[str, Any]]' = OrderedDict()
+        self._version: Optional[int] = None
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, key: Hashable, version: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def set(self, key: Hashable, version: int, value: Dict[str, Any]) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': self._hits / lookups if lookups else 0.0,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations,
+                'rate_card_version': self._version,
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._hits = self._misses = self._evictions = self._invalidations = 0
+
+    def _check_version(self, version: int) -> None:
+        if version != self._version:
+            if self._entries:
+                self._entries.clear()
+                self._invalidations += 1
+            self._version = version
+
+quote_cache = QuoteCache(int(getattr(settings, 'SHIPPING_QUOTE_CACHE_SIZE', 10000)))
@@ -0,0 +1,212 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from api.models.master import (
+    Service,
+    Countries,
+    Shipping,
+    ShippingRateCard,
+    ShippingSurcharge,
+)
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class SurchargeEntry:
+    surcharge_type: str
+    rate: Decimal  # 割合（%）
+    fixed_amount: Optional[Decimal]
+    start_date: date
+    end_date: Optional[date]
+
+@dataclass
+class ZoneRates:
+    """ゾーンごとの料金表（重量区分の昇順）"""
+    weights: List[int] = field(default_factory=list)
+    prices: List[Decimal] = field(default_factory=list)
+
+    def lookup(self, weight: Decimal) -> Optional[Tuple[int, Decimal]]:
+        """指定重量以上で最小の重量区分と基本料金（該当なしの場合はNone）"""
+        position = bisect.bisect_left(self.weights, weight)
+        if position == len(self.weights):
+            return None
+        return self.weights[position], self.prices[position]
+
+@dataclass
+class SurchargeSchedule:
+    """
+    追加料金の適用期間表
+
+    追加料金の開始日・終了日の翌日を境界として期間に分け、期間ごとに有効な追加料金を事前に求めておく。
+    """
+    boundaries: List[date] = field(default_factory=list)  # 有効な追加料金が変わる日（昇順）
+    periods: List[List[SurchargeEntry]] = field(default_factory=lambda: [[]])  # periods[i]はboundaries[i - 1]からの期間
+
+    @classmethod
+    def build(cls, surcharges: List[SurchargeEntry]) -> 'SurchargeSchedule':
+        boundaries = sorted(
+            {surcharge.start_date for surcharge in surcharges}
+            | {surcharge.end_date + timedelta(days=1) for surcharge in surcharges if surcharge.end_date is not None}
+        )
+        periods: List[List[SurchargeEntry]] = [[]]
+        for boundary in boundaries:
+            periods.append([
+                surcharge for surcharge in surcharges
+                if surcharge.start_date <= boundary and (surcharge.end_date is None or boundary <= surcharge.end_date)
+            ])
+        return cls(boundaries, periods)
+
+    def active_on(self, ship_date: date) -> List[SurchargeEntry]:
+        """指定日に有効な追加料金（終了日は当日を含む）"""
+        return self.periods[bisect.bisect_right(self.boundaries, ship_date)]
+
+@dataclass
+class RateCard:
+    """配送サービスごとの料金表・配送先・追加料金"""
+    service_id: int
+    service_name: str
+    zones: Dict[str, ZoneRates] = field(default_factory=dict)
+    countries: Dict[str, str] = field(default_factory=dict)  # 国コード -> ゾーン
+    surcharges: List[SurchargeEntry] = field(default_factory=list)
+    surcharge_schedule: SurchargeSchedule = field(default_factory=SurchargeSchedule)
+    version: Optional[int] = None  # 読み込んだ時点のマスタデータのバージョン
+
+class RateCardIndex:
+    """
+    送料計算に使うマスタデータをメモリ上に保持する
+
+    マスタデータが変更されると共有キャッシュのバージョンが上がり（api.signals）、
+    次の参照時に全サービス分をまとめて読み直す。
+    共有キャッシュのバージョンはVERSION_CHECK_INTERVAL秒ごとにしか確認しないため、
+    他のプロセスでの変更はその間だけ遅れて反映される（このプロセスでの変更はすぐに反映される）。
+    """
+    VERSION_KEY = 'rate_card:version'
+    VERSION_CHECK_INTERVAL = float(getattr(settings, 'SHIPPING_RATE_CARD_VERSION_CHECK_INTERVAL', 1))
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        # 最後に共有キャッシュから読んだバージョンと読んだ時刻
+        self._shared_version: Optional[int] = None
+        self._checked_at = 0.0
+        self._cards: Dict[int, RateCard] = {}
+        self._deferred = threading.local()
+
+    @contextmanager
+    def defer_invalidation(self):
+        """
+        ブロック内のシグナルによる無効化をまとめ、トランザクションのコミット後に1回だけ行う
+
+        大量の行を削除・更新する場合に、行ごとにバージョンを上げないようにする。
+        """
+        depth = getattr(self._deferred, 'depth', 0)
+        self._deferred.depth = depth + 1
+        try:
+            yield
+        finally:
+            self._deferred.depth = depth
+        if depth == 0:
+            transaction.on_commit(self.bump_version)
+
+    @property
+    def invalidation_deferred(self) -> bool:
+        return getattr(self._deferred, 'depth', 0) > 0
+
+    def get_card(self, service_id: int) -> RateCard:
+        """配送サービスの料金表を取得（存在しない場合はService.DoesNotExist）"""
+        cards = self._get_cards()
+        try:
+            return cards[int(service_id)]
+        except (KeyError, TypeError, ValueError):
+            raise Service.DoesNotExist(f"配送サービス（ID: {service_id}）が存在しません")
+
+    def get_cards(self) -> List[RateCard]:
+        """全配送サービスの料金表（ID順）"""
+        cards = self._get_cards()
+        return [cards[service_id] for service_id in sorted(cards)]
+
+    @property
+    def version(self) -> int:
+        """現在のマスタデータのバージョン"""
+        now = time.monotonic()
+        version = self._shared_version
+        if version is None or now - self._checked_at >= self.VERSION_CHECK_INTERVAL:
+            version = cache.get(self.VERSION_KEY, 0)
+            self._shared_version, self._checked_at = version, now
+        return version
+
+    def bump_version(self) -> None:
+        """マスタデータの変更を通知（全プロセスのインデックスを無効にする）"""
+        cache.add(self.VERSION_KEY, 0, None)
+        try:
+            cache.incr(self.VERSION_KEY)
+        except ValueError:
+            cache.set(self.VERSION_KEY, 1, None)
+        with self._lock:
+            self._version = None
+            self._shared_version = None
+
+    def _get_cards(self) -> Dict[int, RateCard]:
+        version = self.version
+        if self._version == version:
+            return self._cards
+
+        with self._lock:
+            if self._version != version:
+                cards = self._load()
+                for card in cards.values():
+                    card.version = version
+                self._cards = cards
+                self._version = version
+            return self._cards
+
+    @staticmethod
+    def _load() -> Dict[int, RateCard]:
+        cards = {
+            service_id: RateCard(service_id=service_id, service_name=service_name)
+            for service_id, service_name in Service.objects.values_list('id', 'service_name')
+        }
+
+        for country_code, zone, service_id in Countries.objects.values_list('country_code', 'zone', 'service_id'):
+            cards[service_id].countries[country_code] = zone
+
+        # 取り込んだ料金表がある配送サービスは有効な料金表の行のみを使う（取り込み中・無効の行は使わない）
+        active_cards = dict(
+            ShippingRateCard.objects.filter(status=ShippingRateCard.STATUS_ACTIVE).values_list('service_id', 'id')
+        )
+        # 同じ重量区分が複数ある場合は最新のレコード（IDが最大のもの）を使う
+        prices: Dict[Tuple[int, str], Dict[int, Decimal]] = {}
+        for service_id, zone, weight, basic_price, rate_card_id in (
+            Shipping.objects.order_by('id').values_list('service_id', 'zone', 'weight', 'basic_price', 'rate_card_id')
+        ):
+            if rate_card_id != active_cards.get(service_id):
+                continue
+            prices.setdefault((service_id, zone), {})[weight] = basic_price
+        for (service_id, zone), weight_prices in prices.items():
+            weights = sorted(weight_prices)
+            cards[service_id].zones[zone] = ZoneRates(weights, [weight_prices[w] for w in weights])
+
+        for surcharge in ShippingSurcharge.objects.order_by('start_date', 'id'):
+            cards[surcharge.service_id].surcharges.append(SurchargeEntry(
+                surcharge_type=surcharge.surcharge_type,
+                rate=surcharge.rate,
+                fixed_amount=surcharge.fixed_amount,
+                start_date=surcharge.start_date,
+                end_date=surcharge.end_date,
+            ))
+        for card in cards.values():
+            card.surcharge_schedule = SurchargeSchedule.build(card.surcharges)
+
+        logger.info(f"Loaded rate cards for {len(cards)} services ({len(prices)} zones)")
+        return cards
+
+rate_card_index = RateCardIndex()
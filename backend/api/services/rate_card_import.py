@@ -0,0 +1,240 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from api.models.master import (
+    Service,
+    Countries,
+    Shipping,
+    ShippingRateCard,
+    ShippingSurcharge,
+)
+from api.services.rate_card import rate_card_index
+import logging
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+class RateCardImporter:
+    """
+    配送サービスの料金表（m_shipping）・配送先（m_countries）・追加料金（m_shipping_surcharge）を一括で取り込む
+
+    料金表の行は一定件数ごとに検証してbulk_createで書き込む。すべての書き込みを1つのトランザクションで行い、
+    最後に新しい料金表を有効にして古い料金表の行を削除するため、参照側が取り込み途中の料金表や
+    新旧の重複した行を見ることはない。
+    """
+    CHUNK_SIZE = 1000
+    MAX_ERRORS = 50
+
+    RATE_FIELDS = ('zone', 'weight', 'basic_price')
+    COUNTRY_FIELDS = ('country_code', 'country_name', 'country_name_jp', 'zone')
+    SURCHARGE_FIELDS = ('surcharge_type', 'rate', 'fixed_amount', 'start_date', 'end_date')
+
+    def __init__(self, service_id: int):
+        try:
+            self.service = Service.objects.get(id=service_id)
+        except (Service.DoesNotExist, ValueError, TypeError):
+            raise ValidationError(f"配送サービス（ID: {service_id}）が存在しません")
+
+    def run(self, rates: Iterable[Dict[str, str]], countries: Optional[Iterable[Dict[str, str]]] = None,
+            surcharges: Optional[Iterable[Dict[str, str]]] = None, source: Optional[str] = None,
+            dry_run: bool = False) -> Dict[str, Any]:
+        """
+        料金表を取り込んで有効にする
+
+        Args:
+            rates: 'zone'、'weight'、'basic_price'を持つ行
+            countries: 'country_code'、'country_name'、'country_name_jp'、'zone'を持つ行（指定時は追加・更新）
+            surcharges: 'surcharge_type'、'rate'、'fixed_amount'、'start_date'、'end_date'を持つ行（指定時は置き換え）
+            source: 取り込み元のファイル名
+            dry_run: Trueの場合は検証のみ行い、書き込みは取り消す
+
+        Returns:
+            dict: 取り込んだ料金表のバージョンと件数
+        """
+        try:
+            with transaction.atomic(), rate_card_index.defer_invalidation():
+                report = self._run(rates, countries, surcharges, source)
+                if dry_run:
+                    raise _DryRun(report)
+        except _DryRun as e:
+            return {**e.report, 'dry_run': True}
+
+        logger.info(
+            f"Imported rate card v{report['version']} for service {self.service.id}: "
+            f"{report['rates']} rates, {report['countries_created']} countries created, "
+            f"{report['countries_updated']} countries updated, {report['surcharges']} surcharges"
+        )
+        return {**report, 'dry_run': False}
+
+    def _run(self, rates, countries, surcharges, source) -> Dict[str, Any]:
+        # 同じ配送サービスの取り込みを直列化する
+        Service.objects.select_for_update().get(id=self.service.id)
+        latest = ShippingRateCard.objects.filter(service=self.service).aggregate(Max('version'))['version__max']
+        rate_card = ShippingRateCard.objects.create(
+            service=self.service,
+            version=(latest or 0) + 1,
+            source=source,
+        )
+
+        row_count = 0
+        seen: Set[Tuple[str, int]] = set()
+        for chunk in self._chunks(self._require(rates, self.RATE_FIELDS, 'rates')):
+            rows = self._validate_rates(chunk, seen)
+            Shipping.objects.bulk_create(
+                [Shipping(service=self.service, rate_card=rate_card, **row) for row in rows],
+                batch_size=self.CHUNK_SIZE,
+            )
+            row_count += len(rows)
+        if row_count == 0:
+            raise ValidationError("料金表の行がありません")
+
+        country_report = {'countries_created': 0, 'countries_updated': 0}
+        if countries is not None:
+            country_report = self._upsert_countries(self._require(countries, self.COUNTRY_FIELDS, 'countries'))
+
+        surcharge_count = None
+        if surcharges is not None:
+            surcharge_count = self._replace_surcharges(self._require(surcharges, self.SURCHARGE_FIELDS, 'surcharges'))
+
+        # 新しい料金表を有効にし、それ以前の行（取り込み機能以前の行を含む）を削除する
+        previous = ShippingRateCard.objects.filter(service=self.service).exclude(id=rate_card.id)
+        previous.filter(status=ShippingRateCard.STATUS_ACTIVE).update(status=ShippingRateCard.STATUS_RETIRED)
+        Shipping.objects.filter(service=self.service).exclude(rate_card=rate_card).delete()
+        rate_card.status = ShippingRateCard.STATUS_ACTIVE
+        rate_card.row_count = row_count
+        rate_card.activated_at = timezone.now()
+        rate_card.save(update_fields=['status', 'row_count', 'activated_at'])
+
+        return {
+            'service_id': self.service.id,
+            'version': rate_card.version,
+            'rates': row_count,
+            **country_report,
+            'surcharges': surcharge_count,
+        }
+
+    def _validate_rates(self, chunk: List[Tuple[int, Dict[str, str]]], seen: Set[Tuple[str, int]]) -> List[Dict[str, Any]]:
+        rows = []
+        errors = []
+        for line, row in chunk:
+            try:
+                zone = self._zone(row.get('zone'))
+                weight = int(str(row.get('weight', '')).strip())
+                basic_price = Decimal(str(row.get('basic_price', '')).strip())
+                if weight <= 0 or not basic_price.is_finite() or basic_price < 0:
+                    raise ValueError
+            except (ValueError, InvalidOperation):
+                errors.append(f"rates {line}行目: 値が不正です")
+                continue
+            if (zone, weight) in seen:
+                errors.append(f"rates {line}行目: ゾーン{zone}・{weight}kgの行が重複しています")
+                continue
+            seen.add((zone, weight))
+            rows.append({'zone': zone, 'weight': weight, 'basic_price': basic_price})
+        self._raise_errors(errors)
+        return rows
+
+    def _upsert_countries(self, rows: Iterator[Tuple[int, Dict[str, str]]]) -> Dict[str, int]:
+        """配送サービスの配送先の国を追加・更新"""
+        values: Dict[str, Dict[str, str]] = {}
+        errors = []
+        for line, row in rows:
+            code = str(row.get('country_code', '')).strip().upper()
+            try:
+                zone = self._zone(row.get('zone'))
+            except ValueError:
+                errors.append(f"countries {line}行目: ゾーンが不正です")
+                continue
+            if len(code) != 2 or not row.get('country_name') or not row.get('country_name_jp'):
+                errors.append(f"countries {line}行目: 値が不正です")
+                continue
+            values[code] = {'country_name': row['country_name'].strip(), 'country_name_jp': row['country_name_jp'].strip(), 'zone': zone}
+        self._raise_errors(errors)
+
+        existing = {
+            country.country_code: country
+            for country in Countries.objects.filter(service=self.service, country_code__in=values)
+        }
+
+        updated = []
+        for code, country in existing.items():
+            for field, value in values[code].items():
+                setattr(country, field, value)
+            updated.append(country)
+        created = [
+            Countries(country_code=code, service=self.service, **value)
+            for code, value in values.items() if code not in existing
+        ]
+        Countries.objects.bulk_update(updated, ['country_name', 'country_name_jp', 'zone'], batch_size=self.CHUNK_SIZE)
+        Countries.objects.bulk_create(created, batch_size=self.CHUNK_SIZE)
+        return {'countries_created': len(created), 'countries_updated': len(updated)}
+
+    def _replace_surcharges(self, rows: Iterator[Tuple[int, Dict[str, str]]]) -> int:
+        """配送サービスの追加料金を置き換える"""
+        surcharges = []
+        errors = []
+        for line, row in rows:
+            try:
+                start_date = parse_date(str(row.get('start_date', '')).strip())
+                end_date = parse_date(str(row['end_date']).strip()) if row.get('end_date') else None
+                fixed_amount = Decimal(str(row['fixed_amount']).strip()) if row.get('fixed_amount') else None
+                surcharge = ShippingSurcharge(
+                    service=self.service,
+                    surcharge_type=str(row.get('surcharge_type', '')).strip().upper(),
+                    rate=Decimal(str(row.get('rate') or '0').strip()),
+                    fixed_amount=fixed_amount,
+                    start_date=start_date,
+                    end_date=end_date,
+                )
+                if not surcharge.surcharge_type or start_date is None or (end_date is not None and end_date < start_date):
+                    raise ValueError
+            except (ValueError, InvalidOperation):
+                errors.append(f"surcharges {line}行目: 値が不正です")
+                continue
+            surcharges.append(surcharge)
+        self._raise_errors(errors)
+
+        ShippingSurcharge.objects.filter(service=self.service).delete()
+        ShippingSurcharge.objects.bulk_create(surcharges, batch_size=self.CHUNK_SIZE)
+        return len(surcharges)
+
+    @staticmethod
+    def _zone(value: Optional[str]) -> str:
+        zone = str(value or '').strip().upper()
+        if len(zone) != 1:
+            raise ValueError(value)
+        return zone
+
+    def _require(self, rows: Iterable[Dict[str, str]], fields: Tuple[str, ...], name: str) -> Iterator[Tuple[int, Dict[str, str]]]:
+        """行番号（ヘッダーを1行目とする）を付けて返す。必須の列がない場合はエラー"""
+        iterator = iter(rows)
+        first = next(iterator, None)
+        if first is None:
+            return
+        missing = [field for field in fields if field not in first and field not in ('fixed_amount', 'end_date')]
+        if missing:
+            raise ValidationError(f"{name}に必要な列がありません: {', '.join(missing)}")
+        yield 2, first
+        for line, row in enumerate(iterator, start=3):
+            yield line, row
+
+    def _chunks(self, rows: Iterator[Tuple[int, Dict[str, str]]]) -> Iterator[List[Tuple[int, Dict[str, str]]]]:
+        while True:
+            chunk = list(islice(rows, self.CHUNK_SIZE))
+            if not chunk:
+                return
+            yield chunk
+
+    def _raise_errors(self, errors: List[str]) -> None:
+        if errors:
+            raise ValidationError(errors[:self.MAX_ERRORS])
+
+class _DryRun(Exception):
+    """検証のみの場合にトランザクションを取り消すための例外"""
+    def __init__(self, report: Dict[str, Any]):
+        super().__init__('dry run')
+        self.report = report
@@ -1,17 +1,29 @@
 import requests
+import httpx
 from bs4 import BeautifulSoup
+from ..http_client import async_http
+import asyncio
+import json
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
 class YahooAuctionService:
     BASE_URL = "https://auctions.yahoo.co.jp/search/search"
+    # 商品ページの取得のタイムアウト（秒）
+    REQUEST_TIMEOUT = 15
+    ITEM_URL_PATTERN = re.compile(r'^https://(page\.auctions\.yahoo\.co\.jp/jp/auction|auctions\.yahoo\.co\.jp/jp/auction)/([0-9A-Za-z]+)')
+    PAGE_DATA_PATTERN = re.compile(r'var\s+pageData\s*=\s*(\{.*?\});', re.S)
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    }
+    RESULTS_PER_PAGE = 100
+    MAX_PAGES = 5
 
     def __init__(self):
         self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self.session.headers.update(self.HEADERS)
 
     def search_items(self, params):
         """
@@ -52,22 +64,14 @@ class YahooAuctionService:
             soup = BeautifulSoup(first_page.text, 'html.parser')
             
             # 総件数を取得
-            total_count_elem = soup.select_one('.SearchMode__result')
-            total_count = 0
-            if total_count_elem:
-                count_text = total_count_elem.text
-                import re
-                count_match = re.search(r'約([0-9,]+)件', count_text)
-                if count_match:
-                    total_count = int(count_match.group(1).replace(',', ''))
+            total_count = self._parse_total_count(soup)
 
             # 最初のページの結果を解析
             items = self._parse_search_results(soup)
             
             # 残りのページを取得（最大5ページまで）
-            max_pages = min(5, (total_count + 99) // 100)
-            for page in range(2, max_pages + 1):
-                search_params['b'] = str((page - 1) * 100 + 1)
+            for page in range(2, self._page_count(total_count) + 1):
+                search_params['b'] = self._page_start(page)
                 response = self.session.get(self.BASE_URL, params=search_params)
                 response.raise_for_status()
                 soup = BeautifulSoup(response.text, 'html.parser')
@@ -85,6 +89,62 @@ class YahooAuctionService:
             logger.error(f"スクレイピングエラー: {str(e)}")
             raise
 
+    async def async_search_items(self, params):
+        """
+        search_itemsの非同期版（httpxで取得し、2ページ目以降は同時に取得する）
+
+        HTMLの解析はイベントループを止めないように別スレッドで行う。
+        """
+        client = async_http.get()
+        search_params = {k: v for k, v in params.items() if v is not None}
+        try:
+            first_page = await client.get(self.BASE_URL, params=search_params, headers=self.HEADERS, timeout=self.REQUEST_TIMEOUT)
+            first_page.raise_for_status()
+            total_count, items = await asyncio.to_thread(self._parse_first_page, first_page.text)
+
+            responses = await asyncio.gather(*[
+                client.get(self.BASE_URL, params={**search_params, 'b': self._page_start(page)},
+                           headers=self.HEADERS, timeout=self.REQUEST_TIMEOUT)
+                for page in range(2, self._page_count(total_count) + 1)
+            ])
+            for response in responses:
+                response.raise_for_status()
+                items.extend(await asyncio.to_thread(self._parse_page, response.text))
+
+            return {
+                'items': items,
+                'total_count': total_count
+            }
+
+        except httpx.HTTPError as e:
+            logger.error(f"リクエストエラー: {str(e)}")
+            raise
+        except Exception as e:
+            logger.error(f"スクレイピングエラー: {str(e)}")
+            raise
+
+    def fetch_item_detail(self, url):
+        """
+        商品ページを取得して商品情報を抽出する
+
+        Args:
+            url (str): 商品ページのURL（https://page.auctions.yahoo.co.jp/jp/auction/...）
+
+        Returns:
+            dict: 商品ID、タイトル、価格、即決価格、画像URL、商品説明、商品の状態などを含む辞書
+        """
+        match = self.ITEM_URL_PATTERN.match(url or '')
+        if not match:
+            raise ValueError(f"ヤフオクの商品URLではありません: {url}")
+
+        try:
+            response = self.session.get(url, timeout=self.REQUEST_TIMEOUT)
+            response.raise_for_status()
+            return self._parse_item_detail(match.group(2), url, BeautifulSoup(response.text, 'html.parser'))
+        except requests.RequestException as e:
+            logger.error(f"リクエストエラー: {str(e)}")
+            raise
+
     def search_categories(self, params):
         """
         カテゴリ検索を実行
@@ -94,6 +154,34 @@ class YahooAuctionService:
             'categories': []
         }
 
+    def _parse_first_page(self, html):
+        """最初のページの総件数と商品情報"""
+        soup = BeautifulSoup(html, 'html.parser')
+        return self._parse_total_count(soup), self._parse_search_results(soup)
+
+    def _parse_page(self, html):
+        """2ページ目以降の商品情報"""
+        return self._parse_search_results(BeautifulSoup(html, 'html.parser'))
+
+    @staticmethod
+    def _parse_total_count(soup):
+        """検索結果の総件数（表示がない場合は0）"""
+        total_count_elem = soup.select_one('.SearchMode__result')
+        if total_count_elem:
+            count_match = re.search(r'約([0-9,]+)件', total_count_elem.text)
+            if count_match:
+                return int(count_match.group(1).replace(',', ''))
+        return 0
+
+    @classmethod
+    def _page_count(cls, total_count):
+        return min(cls.MAX_PAGES, (total_count + cls.RESULTS_PER_PAGE - 1) // cls.RESULTS_PER_PAGE)
+
+    @classmethod
+    def _page_start(cls, page):
+        """ページの開始番号（検索パラメータ'b'）"""
+        return str((page - 1) * cls.RESULTS_PER_PAGE + 1)
+
     def _parse_search_results(self, soup):
         """
         検索結果のHTMLをパースして商品情報を抽出する
@@ -161,4 +249,57 @@ class YahooAuctionService:
                 logger.warning(f"商品情報の抽出に失敗: {str(e)}")
                 continue
 
-        return items 
\ No newline at end of file
+        return items
+
+    def _parse_item_detail(self, auction_id, url, soup):
+        """
+        商品ページのHTMLをパースして商品情報を抽出する
+
+        ページに埋め込まれたpageData（JSON）を優先し、取得できない項目はHTMLとOGPから補う。
+        """
+        page_data = {}
+        for script in soup.find_all('script'):
+            match = self.PAGE_DATA_PATTERN.search(script.string or '')
+            if match:
+                try:
+                    page_data = json.loads(match.group(1)).get('items', {})
+                except (ValueError, AttributeError):
+                    logger.warning(f"pageDataの解析に失敗: {url}")
+                break
+
+        def meta(prop):
+            elem = soup.select_one(f'meta[property="{prop}"]')
+            return elem.get('content') if elem else None
+
+        def text(selector):
+            elem = soup.select_one(selector)
+            return elem.get_text(' ', strip=True) if elem else None
+
+        def price(value):
+            match = re.search(r'[0-9][0-9,]*', str(value or ''))
+            return match.group(0).replace(',', '') if match else None
+
+        images = [img.get('src') for img in soup.select('.ProductImage__image img') if img.get('src')]
+        if not images and meta('og:image'):
+            images = [meta('og:image')]
+
+        title = page_data.get('productName') or text('.ProductTitle__text') or meta('og:title')
+        current_price = price(page_data.get('price')) or price(text('.Price--current .Price__value'))
+        if not title or not current_price:
+            raise ValueError(f"商品情報を取得できませんでした: {url}")
+
+        return {
+            'auction_id': page_data.get('productID') or auction_id,
+            'url': url,
+            'title': title,
+            'price': current_price,
+            'buy_now_price': price(page_data.get('bidorbuy')) or price(text('.Price--buynow .Price__value')),
+            'image_urls': images,
+            'description': text('.ProductExplanation__commentBody') or meta('og:description'),
+            'condition': page_data.get('itemCondition') or text('.ProductDetail__item--condition .ProductDetail__description'),
+            'category_id': page_data.get('productCategoryID'),
+            'seller': page_data.get('sellerId'),
+            'end_time': page_data.get('endtime'),
+            'bid_count': page_data.get('bids'),
+            'shipping': text('.Price__postage'),
+        }
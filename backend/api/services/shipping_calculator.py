@@ -1,13 +1,16 @@
+import math
 from datetime import date
 from decimal import Decimal
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 
+from django.utils import timezone
 from api.models.master import (
     Service,
     Countries,
     Shipping,
-    ShippingSurcharge,
 )
+from api.services.rate_card import rate_card_index, SurchargeEntry
+from api.services.quote_cache import quote_cache
 
 class ShippingCalculator:
     # FedExのサイズ制限定数
@@ -15,8 +18,11 @@ class ShippingCalculator:
     OVERSIZE_LENGTH_LIMIT = 243  # cm
     OVERSIZE_LENGTH_GIRTH_LIMIT = 330  # cm
     OVERSIZE_SURCHARGE = Decimal('2500.00')  # 追加料金
-    def __init__(self, service_id: int):
-        self.service = Service.objects.get(id=service_id)
+    def __init__(self, service_id: int, ship_date: Optional[date] = None):
+        # マスタデータはメモリ上の料金表から参照する（クエリは発行しない）
+        self.card = rate_card_index.get_card(service_id)
+        # 追加料金の適用日（省略時は当日）
+        self.ship_date = ship_date
 
     def calculate_dimensional_weight(self, length: int, width: int, height: int) -> Decimal:
         """寸法重量を計算"""
@@ -42,15 +48,16 @@ class ShippingCalculator:
         return False, Decimal('0')
 
     def get_surcharges(self, base_price: Decimal) -> Dict[str, Decimal]:
-        """現在適用される追加料金を取得"""
-        today = date.today()
-        surcharges = {}
-        
-        active_surcharges = ShippingSurcharge.objects.filter(
-            service=self.service,
-            start_date__lte=today
-        ).filter(end_date__isnull=True)
+        """発送日（省略時は当日）に適用される追加料金を取得"""
+        return self._apply_surcharges(self._active_surcharges(), base_price)
 
+    def _active_surcharges(self) -> List[SurchargeEntry]:
+        """発送日に有効な追加料金の一覧"""
+        return self.card.surcharge_schedule.active_on(self.ship_date or timezone.localdate())
+
+    @staticmethod
+    def _apply_surcharges(active_surcharges: List[SurchargeEntry], base_price: Decimal) -> Dict[str, Decimal]:
+        surcharges = {}
         for surcharge in active_surcharges:
             amount = Decimal('0')
             if surcharge.rate:
@@ -65,64 +72,46 @@ class ShippingCalculator:
                               height: int, weight: float) -> Dict[str, Any]:
         """送料を計算"""
         try:
-            country = Countries.objects.get(country_code=country_code, service=self.service)
+            zone = self.card.countries.get(country_code)
+            if zone is None:
+                raise Countries.DoesNotExist(f"配送先の国（{country_code}）が設定されていません")
             weight_decimal = Decimal(str(weight))
+            if not weight_decimal.is_finite() or weight_decimal <= 0:
+                return {
+                    'success': False,
+                    'error': f'重量が不正です: {weight}'
+                }
             dim_weight = self.calculate_dimensional_weight(length, width, height)
             
             # 実重量と容積重量の大きい方を使用
             calc_weight = max(weight_decimal, dim_weight)
-            # 基本送料を取得
-            try:
-                # 重量区分の一覧を取得
-                weight_ranges = Shipping.objects.filter(
-                    service=self.service,
-                    zone=country.zone
-                ).order_by('weight').values_list('weight', flat=True)
-
-                # 適切な重量区分を見つける
-                target_weight = None
-                for w in weight_ranges:
-                    if calc_weight <= w:
-                        target_weight = w
-                        break
-                if not target_weight:
-                    return {
-                        'success': False,
-                        'error': f'この重量（{calc_weight}kg）での配送料金が設定されていません'
-                    }
 
-                # 重複チェックのためにすべてのマッチするレコードを取得
-                matching_rates = Shipping.objects.filter(
-                    service=self.service,
-                    zone=country.zone,
-                    weight=target_weight
-                ).values('id', 'service_id', 'zone', 'weight', 'basic_price')
-
-                # 最新のレコード（IDが最大のもの）を取得
-                shipping_rate = Shipping.objects.filter(
-                    service=self.service,
-                    zone=country.zone,
-                    weight=target_weight
-                ).order_by('-id').first()
-
-                if not shipping_rate:
-                    return {
-                        'success': False,
-                        'error': f'送料の取得に失敗しました'
-                    }
+            # 重量区分は整数（kg）のため、実重量を切り上げた値が同じなら料金も同じになる
+            ship_date = self.ship_date or timezone.localdate()
+            cache_key = (self.card.service_id, country_code, length, width, height, math.ceil(weight_decimal), ship_date)
+            cached = quote_cache.get(cache_key, self.card.version)
+            if cached is not None:
+                return {
+                    'success': True,
+                    'message': 'データの取得に成功しました',
+                    'data': {**cached, 'weight_used': float(calc_weight)}
+                }
 
-                basic_price = shipping_rate.basic_price
-            except Exception as e:
+            # 適切な重量区分と基本送料を取得（同じ重量区分は最新のレコードを使用）
+            zone_rates = self.card.zones.get(zone)
+            match = zone_rates.lookup(calc_weight) if zone_rates is not None else None
+            if match is None:
                 return {
                     'success': False,
-                    'error': f'送料の取得に失敗しました: {str(e)}'
+                    'error': f'この重量（{calc_weight}kg）での配送料金が設定されていません'
                 }
+            target_weight, basic_price = match
 
             # サイズ制限チェックと追加料金計算
             is_oversized, size_surcharge = self.check_size_restrictions(length, width, height)
 
             # その他の追加料金（燃料サーチャージなど）
-            surcharges = self.get_surcharges(basic_price)
+            surcharges = self._apply_surcharges(self.card.surcharge_schedule.active_on(ship_date), basic_price)
             if is_oversized:
                 surcharges['OVERSIZE'] = size_surcharge
             
@@ -130,22 +119,158 @@ class ShippingCalculator:
             total_surcharges = sum(surcharges.values())
             total_amount = basic_price + total_surcharges
 
+            data = {
+                'base_rate': float(basic_price),
+                'surcharges': {k: float(v) for k, v in surcharges.items()},
+                'total_amount': float(total_amount),
+                'weight_used': float(calc_weight),
+                'zone': zone,
+                'is_oversized': is_oversized,
+                'weight_range': float(target_weight)  # デバッグ用に重量区分も返す
+            }
+            quote_cache.set(cache_key, self.card.version, data)
             return {
                 'success': True,
                 'message': 'データの取得に成功しました',
-                'data': {
-                    'base_rate': float(basic_price),
-                    'surcharges': {k: float(v) for k, v in surcharges.items()},
-                    'total_amount': float(total_amount),
-                    'weight_used': float(calc_weight),
-                    'zone': country.zone,
-                    'is_oversized': is_oversized,
-                    'weight_range': float(target_weight)  # デバッグ用に重量区分も返す
-                }
+                'data': data
             }
 
         except (Countries.DoesNotExist, Shipping.DoesNotExist) as e:
             return {
                 'success': False,
                 'error': str(e)
-            } 
\ No newline at end of file
+            }
+
+    def calculate_shipping_costs(self, packages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        複数の荷物の送料をまとめて計算
+
+        1件ずつ計算せず、寸法重量・重量区分・サイズ制限・追加料金を列ごとにまとめて求める。
+        重量区分はゾーンごとに重量の昇順に並べ、料金表と1回の走査で突き合わせる。
+
+        Args:
+            packages: 'country_code'、'length'、'width'、'height'、'weight'を持つ辞書のリスト
+
+        Returns:
+            list: calculate_shipping_costと同じ形式の結果（入力と同じ順序）
+        """
+        count = len(packages)
+        results: List[Optional[Dict[str, Any]]] = [None] * count
+
+        # 入力値を列に分解（不正な行はその行だけエラーにする）
+        lengths, widths, heights, weights = [0] * count, [0] * count, [0] * count, [Decimal('0')] * count
+        for i, package in enumerate(packages):
+            try:
+                lengths[i] = int(package.get('length', 0))
+                widths[i] = int(package.get('width', 0))
+                heights[i] = int(package.get('height', 0))
+                weights[i] = Decimal(str(float(package.get('weight', 0))))
+            except (TypeError, ValueError) as e:
+                results[i] = {'success': False, 'error': f'入力値が不正です: {str(e)}'}
+                continue
+            if not all([package.get('country_code'), lengths[i], widths[i], heights[i], weights[i]]):
+                results[i] = {'success': False, 'error': '必要なパラメータが不足しています'}
+            elif not weights[i].is_finite() or weights[i] <= 0:
+                results[i] = {'success': False, 'error': f"重量が不正です: {package.get('weight')}"}
+
+        # 寸法重量と計算重量（実重量と容積重量の大きい方、エラーの行は計算しない）
+        calc_weights = [
+            max(weight, Decimal(str((length * width * height) / 5000))) if result is None else Decimal('0')
+            for length, width, height, weight, result in zip(lengths, widths, heights, weights, results)
+        ]
+
+        # ゾーンごとに行をまとめる
+        zones = [self.card.countries.get(package.get('country_code')) for package in packages]
+        rows_by_zone: Dict[str, List[int]] = {}
+        for i, zone in enumerate(zones):
+            if results[i] is not None:
+                continue
+            if zone is None:
+                results[i] = {'success': False, 'error': f"配送先の国（{packages[i].get('country_code')}）が設定されていません"}
+                continue
+            rows_by_zone.setdefault(zone, []).append(i)
+
+        # 重量区分の検索（計算重量の昇順に並べて料金表を1回だけ走査する）
+        bands: List[Optional[Tuple[int, Decimal]]] = [None] * count
+        for zone, rows in rows_by_zone.items():
+            zone_rates = self.card.zones.get(zone)
+            band_weights = zone_rates.weights if zone_rates is not None else []
+            position = 0
+            for i in sorted(rows, key=calc_weights.__getitem__):
+                while position < len(band_weights) and band_weights[position] < calc_weights[i]:
+                    position += 1
+                if position == len(band_weights):
+                    results[i] = {
+                        'success': False,
+                        'error': f'この重量（{calc_weights[i]}kg）での配送料金が設定されていません'
+                    }
+                    continue
+                bands[i] = (band_weights[position], zone_rates.prices[position])
+
+        # サイズ制限（長さ + 胴回り）
+        girth_totals = [length + 2 * (width + height) for length, width, height in zip(lengths, widths, heights)]
+        size_surcharges = [
+            self.OVERSIZE_SURCHARGE
+            if length > self.OVERSIZE_LENGTH_LIMIT or total > self.OVERSIZE_LENGTH_GIRTH_LIMIT
+            else Decimal('1000.00') if length > self.NORMAL_LENGTH_LIMIT
+            else None
+            for length, total in zip(lengths, girth_totals)
+        ]
+
+        # 有効な追加料金は全件で共通なので1回だけ求める
+        active_surcharges = self._active_surcharges()
+        for i in range(count):
+            if results[i] is not None:
+                continue
+            target_weight, basic_price = bands[i]
+            surcharges = self._apply_surcharges(active_surcharges, basic_price)
+            if size_surcharges[i] is not None:
+                surcharges['OVERSIZE'] = size_surcharges[i]
+            results[i] = {
+                'success': True,
+                'data': {
+                    'base_rate': float(basic_price),
+                    'surcharges': {k: float(v) for k, v in surcharges.items()},
+                    'total_amount': float(basic_price + sum(surcharges.values())),
+                    'weight_used': float(calc_weights[i]),
+                    'zone': zones[i],
+                    'is_oversized': size_surcharges[i] is not None,
+                    'weight_range': float(target_weight)
+                }
+            }
+
+        return results
+
+    @classmethod
+    def compare_services(cls, country_code: str, length: int, width: int, height: int, weight: float,
+                         service_ids: Optional[List[int]] = None,
+                         ship_date: Optional[date] = None) -> List[Dict[str, Any]]:
+        """
+        1つの荷物の送料を複数の配送サービスで計算し、合計金額の安い順に並べる
+
+        配送できないサービス（配送先や重量の対象外）は'available'をFalseにして末尾に並べる。
+
+        Args:
+            service_ids: 比較する配送サービスのID（省略時は全サービス）
+            ship_date: 追加料金の適用日（省略時は当日）
+        """
+        cards = rate_card_index.get_cards()
+        if service_ids is not None:
+            requested = {int(service_id) for service_id in service_ids}
+            missing = requested - {card.service_id for card in cards}
+            if missing:
+                raise Service.DoesNotExist(f"配送サービス（ID: {', '.join(map(str, sorted(missing)))}）が存在しません")
+            cards = [card for card in cards if card.service_id in requested]
+
+        quotes = []
+        for card in cards:
+            result = cls(card.service_id, ship_date).calculate_shipping_cost(country_code, length, width, height, weight)
+            quote = {'service_id': card.service_id, 'service_name': card.service_name, 'available': result['success']}
+            if result['success']:
+                quote.update(result['data'])
+            else:
+                quote['reason'] = result['error']
+            quotes.append(quote)
+
+        quotes.sort(key=lambda quote: (not quote['available'], quote.get('total_amount', 0)))
+        return quotes
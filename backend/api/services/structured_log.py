@@ -0,0 +1,31 @@
+import json
+import logging
+import random
+from typing import Any
+
+class SampledLogger:
+    """
+    1行1イベントのJSON形式でログを出力する
+
+    INFOのイベントはsample_rateの割合だけ出力し（リクエスト数が多い場合のログI/Oを抑える）、
+    WARNING以上は常に出力する。出力した行にはsample_rateを含めるため、集計時に件数を補正できる。
+    """
+    def __init__(self, logger: logging.Logger, sample_rate: float):
+        self.logger = logger
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+
+    def info(self, event: str, **fields: Any) -> None:
+        if self.sample_rate >= 1 or random.random() < self.sample_rate:
+            self._log(logging.INFO, event, fields, self.sample_rate)
+
+    def warning(self, event: str, **fields: Any) -> None:
+        self._log(logging.WARNING, event, fields, 1.0)
+
+    def error(self, event: str, exc_info: bool = False, **fields: Any) -> None:
+        self._log(logging.ERROR, event, fields, 1.0, exc_info)
+
+    def _log(self, level: int, event: str, fields: dict, sample_rate: float, exc_info: bool = False) -> None:
+        if not self.logger.isEnabledFor(level):
+            return
+        record = {'event': event, 'sample_rate': sample_rate, **fields}
+        self.logger.log(level, json.dumps(record, ensure_ascii=False, default=str), exc_info=exc_info)
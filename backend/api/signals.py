@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models.master import Service, Countries, Shipping, ShippingRateCard, ShippingSurcharge
+from .services.rate_card import rate_card_index
+
+@receiver([post_save, post_delete], sender=Service)
+@receiver([post_save, post_delete], sender=Countries)
+@receiver([post_save, post_delete], sender=Shipping)
+@receiver([post_save, post_delete], sender=ShippingSurcharge)
+@receiver([post_save, post_delete], sender=ShippingRateCard)
+def invalidate_rate_card(sender, **kwargs):
+    """送料のマスタデータが変更されたら料金表のインデックスを無効にする
+
+    bulk_createやQuerySet.updateではシグナルが送られないため、
+    その場合は呼び出し側でrate_card_index.bump_version()を呼ぶこと。
+    """
+    if rate_card_index.invalidation_deferred:
+        return
+    rate_card_index.bump_version()
@@ -1,2 +1,19 @@
 # api/test/__init__.py
-from .user import UserTest  # その他必要なモデルもここでインポート
\ No newline at end of file
+from .query_budget import ShippingQueryBudgetTest, SettingQueryBudgetTest, EbayQueryBudgetTest
+from .layered_cache import LayeredCacheTest, LayeredFileCacheTest, LayeredDatabaseCacheTest
+from .package_consolidation import PackageConsolidatorTest
+from .ebay_item_cache import EbayItemCacheTest
+from .ebay_scheduler import EbayCallSchedulerTest, PriorityGateTest
+from .metrics import ApiCallMetricsTest
+from .ebay_repricing import EbayRepricingTest
+from .ebay_response import DecodeResponseTest
+from .currency import CurrencyServiceTest
+from .currency_history import ExchangeRateHistoryTest
+from .currency_refresher import ExchangeRateRefresherTest
+from .rate_card import SurchargeScheduleTest
+from .rate_card_import import RateCardImporterTest
+from .quote_cache import QuoteCacheTest, ShippingQuoteCacheTest
+from .profit import ProfitCalculatorTest
+from .listing_pipeline import ListingPipelineTest
+from .product_data import ProductDataViewTest
+from .async_api import AsyncAPIViewTest
\ No newline at end of file
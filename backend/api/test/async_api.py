@@ -0,0 +1,111 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import path
+from rest_framework.authtoken.models import Token
+from api.management.commands.benchmark_ebay_decoder import build_add_item_response
+from api.models import User, EbayListing
+from api.models.master import Setting
+from api.services.ebay import EbayService
+from api.services.ebay_response import decode_response
+from api.services.ebay_scheduler import scheduler
+from api.views.async_api import AsyncAPIView
+from api.views.ebay import AsyncEbayRegisterView
+from .utils import isolated_cache
+
+class WhoAmIView(AsyncAPIView):
+    authentication_required = True
+
+    async def get(self, request):
+        return self.respond({'username': request.user.username})
+
+# ASYNC_VIEWS_ENABLEDの設定によらず非同期版のビューを呼ぶためのURL
+urlpatterns = [
+    path('whoami/', WhoAmIView.as_view()),
+    path('ebay/register/', AsyncEbayRegisterView.as_view()),
+]
+
+PRODUCT_DATA = {
+    'title': 'Camera',
+    'description': 'Camera',
+    'primaryCategory': {'categoryId': '1'},
+    'startPrice': {'value': '100.00', 'currencyId': 'USD'},
+    'quantity': 1,
+    'listingDuration': 'GTC',
+    'listingType': 'FixedPriceItem',
+    'country': 'JP',
+    'currency': 'USD',
+    'paymentMethods': ['PayPal'],
+    'condition': {'conditionId': '3000'},
+    'returnPolicy': {'returnsAccepted': True, 'returnsPeriod': 'Days_30', 'returnsDescription': ''},
+    'pictureUrls': [],
+    'shippingDetails': {
+        'shippingServiceOptions': [{
+            'shippingService': 'EconomyShippingFromOutsideUS',
+            'shippingServiceCost': {'value': '10.00', 'currencyId': 'USD'},
+        }],
+    },
+}
+
+@isolated_cache
+@override_settings(ROOT_URLCONF='api.test.async_api')
+class AsyncAPIViewTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='async', email='async@example.com', password='password')
+        cls.inactive = User.objects.create_user(
+            username='inactive', email='inactive@example.com', password='password', is_active=False,
+        )
+        cls.token = Token.objects.create(user=cls.user).key
+        cls.inactive_token = Token.objects.create(user=cls.inactive).key
+        Setting.objects.create(
+            id=cls.user, ebay_client_id='client', ebay_client_secret='secret',
+            ebay_dev_id='dev', ebay_auth_token='token',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    async def assertUnauthorized(self, **headers):
+        response = await self.async_client.get('/whoami/', headers=headers)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Token')
+
+    async def test_missing_or_malformed_header(self):
+        await self.assertUnauthorized()
+        await self.assertUnauthorized(authorization=f'Bearer {self.token}')
+        await self.assertUnauthorized(authorization='Token')
+        await self.assertUnauthorized(authorization=f'Token {self.token} extra')
+        await self.assertUnauthorized(authorization='Token unknown')
+
+    async def test_inactive_user(self):
+        await self.assertUnauthorized(authorization=f'Token {self.inactive_token}')
+
+    async def test_valid_token(self):
+        response = await self.async_client.get('/whoami/', headers={'authorization': f'Token {self.token}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'username': 'async'})
+
+    async def test_register_goes_through_scheduler(self):
+        post_request = mock.AsyncMock(return_value=decode_response(build_add_item_response(fee_count=2, warning_count=0)))
+        with mock.patch.object(EbayService, '_async_post_request', post_request), \
+                mock.patch.object(scheduler, 'async_call', wraps=scheduler.async_call) as async_call:
+            response = await self.async_client.post(
+                '/ebay/register/', PRODUCT_DATA, content_type='application/json',
+                headers={'authorization': f'Token {self.token}'},
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['success'])
+        async_call.assert_called_once()
+        self.assertEqual(async_call.call_args.args[1:3], ('AddFixedPriceItem', 'client'))
+        post_request.assert_awaited_once()
+        self.assertTrue(await EbayListing.objects.filter(user_id=self.user.id).aexists())
+
+    async def test_register_bad_json(self):
+        response = await self.async_client.post(
+            '/ebay/register/', '[', content_type='application/json',
+            headers={'authorization': f'Token {self.token}'},
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,88 @@
+import threading
+import time
+from unittest import mock
+import requests
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from api.services.currency import CurrencyService
+from .utils import isolated_cache
+
+RATES = {'USD': 1.0, 'JPY': 150.0, 'EUR': 0.9}
+
+def fake_response(rates=RATES):
+    response = mock.Mock()
+    response.json.return_value = {'rates': rates}
+    return response
+
+@isolated_cache
+@mock.patch.object(CurrencyService, '_record_history')
+class CurrencyServiceTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        CurrencyService.clear_local_cache()
+
+    def test_single_flight(self, record_history):
+        calls = []
+        started = threading.Event()
+
+        def slow_get(url, **kwargs):
+            calls.append(url)
+            started.set()
+            time.sleep(0.2)
+            return fake_response()
+
+        results = []
+        with mock.patch('api.services.currency.requests.get', side_effect=slow_get):
+            leader = threading.Thread(target=lambda: results.append(CurrencyService.refresh_rate_table('USD')))
+            leader.start()
+            started.wait(1)
+            # 取得中に呼び出したスレッドは外部APIを呼ばずに結果を待つ
+            threads = [
+                threading.Thread(target=lambda: results.append(CurrencyService.refresh_rate_table('USD')))
+                for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in [leader, *threads]:
+                thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 9)
+        self.assertTrue(all(table is results[0] for table in results))
+
+    def test_last_known_good_on_failure(self, record_history):
+        table = {'base': 'USD', 'rates': RATES, 'fetched_at': time.time() - CurrencyService.CACHE_TIMEOUT * 2}
+        cache.set(CurrencyService._last_known_good_key('USD'), table, None)
+
+        with mock.patch('api.services.currency.requests.get', side_effect=requests.exceptions.ConnectionError):
+            quote = CurrencyService.get_rate_quote('USD', 'JPY')
+
+        self.assertEqual(quote['rate'], 150.0)
+        self.assertTrue(quote['stale'])
+        self.assertEqual(quote['source'], CurrencyService.SOURCE_LAST_KNOWN_GOOD)
+
+    def test_last_known_good_prefers_newer_table(self, record_history):
+        fetched_at = time.time() - CurrencyService.CACHE_TIMEOUT * 2
+        local = {'base': 'USD', 'rates': RATES, 'fetched_at': fetched_at}
+        shared = {'base': 'USD', 'rates': {**RATES, 'JPY': 155.0}, 'fetched_at': fetched_at + 60}
+        CurrencyService._set_local_table('USD', local)
+        cache.set(CurrencyService._last_known_good_key('USD'), shared, None)
+        self.assertEqual(CurrencyService._get_last_known_good('USD'), shared)
+
+        # プロセス内の方が新しい場合はプロセス内のレート表を使う
+        local['fetched_at'] = fetched_at + 120
+        self.assertEqual(CurrencyService._get_last_known_good('USD'), local)
+
+    def test_default_rate_without_last_known_good(self, record_history):
+        with mock.patch('api.services.currency.requests.get', side_effect=requests.exceptions.ConnectionError):
+            quote = CurrencyService.get_rate_quote('USD', 'JPY')
+        self.assertEqual(quote['source'], CurrencyService.SOURCE_DEFAULT)
+        self.assertTrue(quote['stale'])
+
+    def test_convert_amounts_round_half_up(self, record_history):
+        self.assertEqual(
+            CurrencyService.convert_amounts(['0.125', '1.005', 2.675, '-0.125'], 'USD', 'EUR', rate=1),
+            ['0.13', '1.01', '2.68', '-0.13'],
+        )
+        self.assertEqual(CurrencyService.convert_amounts(['1000'], 'JPY', 'USD', 0, rate=0.0065), ['7'])
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api.models import User, ExchangeRateHistory
+from api.services.currency_history import ExchangeRateHistoryService
+from .utils import isolated_cache
+
+def local(*args):
+    return timezone.make_aware(datetime(*args))
+
+# 取得日時 -> 1USDあたりの円
+HISTORY = [
+    (local(2024, 1, 1), 140.0),
+    (local(2024, 1, 2, 12), 145.0),
+    (local(2024, 1, 3), 150.0),
+]
+
+@isolated_cache
+class ExchangeRateHistoryTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='history', email='history@example.com', password='password')
+        ExchangeRateHistory.objects.bulk_create([
+            ExchangeRateHistory(base_currency='USD', fetched_at=fetched_at, rates={'USD': 1.0, 'JPY': jpy})
+            for fetched_at, jpy in HISTORY
+        ])
+
+    def setUp(self):
+        cache.clear()
+        ExchangeRateHistoryService.clear_local_cache()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def rate(self, at):
+        return ExchangeRateHistoryService.get_rate_as_of('USD', 'JPY', at)
+
+    def history(self, dates):
+        return self.client.get('/api/v1/currency/history/', {
+            'from_currency': 'USD', 'to_currency': 'JPY', 'dates': ','.join(dates),
+        })
+
+    def test_as_of_boundaries(self):
+        # 取得日時ちょうどの場合はその時点のレート表を使う
+        result = self.rate(local(2024, 1, 2, 12))
+        self.assertEqual(result['rate'], 145.0)
+        self.assertEqual(datetime.fromisoformat(result['as_of']), local(2024, 1, 2, 12))
+        self.assertEqual(self.rate(local(2024, 1, 2, 12) - timedelta(microseconds=1))['rate'], 140.0)
+        self.assertEqual(self.rate(local(2030, 1, 1))['rate'], 150.0)
+        with self.assertRaises(ValidationError):
+            self.rate(local(2023, 12, 31, 23, 59))
+
+    def test_record_bumps_version(self):
+        self.assertEqual(self.rate(local(2030, 1, 1))['rate'], 150.0)
+        table = {'base': 'USD', 'rates': {'USD': 1.0, 'JPY': 155.0}, 'fetched_at': local(2024, 1, 4).timestamp()}
+        self.assertTrue(ExchangeRateHistoryService.record(table))
+        self.assertEqual(self.rate(local(2030, 1, 1))['rate'], 155.0)
+
+        # レートが変わっていない場合は保存せず、バージョンも上げない
+        version = cache.get(ExchangeRateHistoryService._version_key('USD'))
+        self.assertFalse(ExchangeRateHistoryService.record({**table, 'fetched_at': local(2024, 1, 5).timestamp()}))
+        self.assertEqual(cache.get(ExchangeRateHistoryService._version_key('USD')), version)
+
+    def test_backfill_bumps_version(self):
+        self.assertEqual(self.rate(local(2023, 12, 31, 23, 59) + timedelta(minutes=1))['rate'], 140.0)
+        ExchangeRateHistoryService.backfill([
+            {'base': 'USD', 'fetched_at': local(2023, 12, 31), 'rates': {'USD': 1.0, 'JPY': 135.0}},
+            # 既にある日時は無視する
+            {'base': 'USD', 'fetched_at': local(2024, 1, 1), 'rates': {'USD': 1.0, 'JPY': 999.0}},
+        ])
+        self.assertEqual(self.rate(local(2023, 12, 31, 12))['rate'], 135.0)
+        self.assertEqual(self.rate(local(2024, 1, 1))['rate'], 140.0)
+
+    def test_view_date_only_is_end_of_day(self):
+        response = self.history(['2024-01-02', '2024-01-02T00:00:00', '2024-01-02T12:00:00'])
+        self.assertEqual(response.status_code, 200)
+        rates = response.json()['data']['rates']
+        self.assertEqual([rate['rate'] for rate in rates], [145.0, 140.0, 145.0])
+        self.assertEqual(rates[0]['date'], '2024-01-02')
+
+    def test_view_date_limit(self):
+        dates = [(local(2024, 1, 3) + timedelta(days=i)).date().isoformat() for i in range(367)]
+        self.assertEqual(self.history(dates[:366]).status_code, 200)
+        self.assertEqual(self.history(dates).status_code, 400)
+        self.assertEqual(self.history([]).status_code, 400)
+        self.assertEqual(self.history(['2024-13-01']).status_code, 400)
+
+    def test_view_before_first_entry(self):
+        response = self.history(['2023-12-31'])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['success'])
@@ -0,0 +1,69 @@
+import threading
+import time
+from unittest import mock
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from api.services.currency import CurrencyService
+from api.services.currency_refresher import ExchangeRateRefresher, refresher
+from .utils import isolated_cache
+
+@isolated_cache
+@mock.patch.object(CurrencyService, '_record_history')
+class ExchangeRateRefresherTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        CurrencyService.clear_local_cache()
+
+    def test_one_worker_per_interval(self, record_history):
+        calls = []
+        started = threading.Event()
+
+        def slow_get(url, **kwargs):
+            calls.append(url)
+            started.set()
+            time.sleep(0.2)
+            response = mock.Mock()
+            response.json.return_value = {'rates': {'USD': 1.0, 'JPY': 150.0}}
+            return response
+
+        workers = [ExchangeRateRefresher(['USD']) for _ in range(3)]
+        refreshed = []
+        with mock.patch('api.services.currency.requests.get', side_effect=slow_get):
+            leader = threading.Thread(target=lambda: refreshed.append(workers[0].run_once()))
+            leader.start()
+            started.wait(1)
+            # 取得中は共有キャッシュのロックを取れないため他のワーカーは取得しない
+            self.assertEqual(workers[1].run_once(), [])
+            leader.join()
+            # 取得し直した後は期限が近づくまで取得しない
+            CurrencyService.clear_local_cache()
+            self.assertEqual(workers[2].run_once(), [])
+
+        self.assertEqual(refreshed, [['USD']])
+        self.assertEqual(len(calls), 1)
+
+    def test_refresh_when_table_is_old(self, record_history):
+        worker = ExchangeRateRefresher(['USD'])
+        with mock.patch.object(CurrencyService, 'get_table_age', return_value=worker.REFRESH_AFTER), \
+                mock.patch.object(CurrencyService, 'refresh_rate_table') as refresh_rate_table:
+            self.assertEqual(worker.run_once(), ['USD'])
+        refresh_rate_table.assert_called_once_with('USD')
+        # 取得後はロックを解放する
+        self.assertTrue(cache.add(f"{CurrencyService.CACHE_KEY_PREFIX}:refresh_lock:USD", True, 1))
+
+    def test_thread_disabled_by_default(self, record_history):
+        config = apps.get_app_config('api')
+        with mock.patch.object(refresher, 'start') as start:
+            # EXCHANGE_RATE_REFRESHER_ENABLEDが未設定の場合
+            with override_settings():
+                del settings.EXCHANGE_RATE_REFRESHER_ENABLED
+                config.ready()
+            start.assert_not_called()
+
+            with override_settings(EXCHANGE_RATE_REFRESHER_ENABLED=True):
+                config.ready()
+            start.assert_called_once_with()
+        self.assertIsNone(refresher._thread)
@@ -0,0 +1,92 @@
+import threading
+import time
+from unittest import mock
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from api.models import User
+from api.models.master import Setting
+from api.services.ebay import EbayService
+from api.services.ebay_response import decode_response
+from .utils import isolated_cache
+
+REVISE_RESPONSE = b"""<?xml version="1.0" encoding="utf-8"?>
+<ReviseInventoryStatusResponse xmlns="urn:ebay:apis:eBLBaseComponents">
+<Ack>Success</Ack>
+<InventoryStatus><ItemID>1</ItemID><StartPrice>12.0</StartPrice><Quantity>1</Quantity></InventoryStatus>
+</ReviseInventoryStatusResponse>"""
+
+@isolated_cache
+class EbayItemCacheTest(TestCase):
+    """GetItemの結果のキャッシュ（ユーザーごと）"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user(username=f'seller{i}', email=f'seller{i}@example.com', password='password') for i in range(2)]
+        for user in cls.users:
+            Setting.objects.create(
+                id=user, ebay_client_id='client', ebay_client_secret='secret',
+                ebay_dev_id='dev', ebay_auth_token=f'token-{user.id}',
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.fetched = []
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def fake_fetch(self, service, item_id):
+        with self.lock:
+            self.fetched.append((service.user_id, item_id))
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+        if item_id == 'missing':
+            raise ValidationError("商品情報が見つかりません")
+        return {'ItemID': item_id, 'Title': f'{service.auth_token} {item_id}'}
+
+    def patch_fetch(self):
+        test = self
+        return mock.patch.object(EbayService, '_fetch_item', lambda service, item_id: test.fake_fetch(service, item_id))
+
+    def test_get_items_uses_cache(self):
+        service = EbayService(user_id=self.users[0].id)
+        with self.patch_fetch():
+            service.get_items(['1', '2'])
+            self.fetched.clear()
+            result = service.get_items(['1', '2', '3', '1'])
+        self.assertEqual(list(result['items']), ['1', '2', '3'])
+        self.assertEqual(self.fetched, [(self.users[0].id, '3')])
+
+    def test_get_items_fetches_missing_concurrently(self):
+        service = EbayService(user_id=self.users[0].id)
+        with self.patch_fetch():
+            result = service.get_items(['1', '2', '3', '4', 'missing'])
+        self.assertEqual(sorted(result['items']), ['1', '2', '3', '4'])
+        self.assertEqual(list(result['errors']), ['missing'])
+        self.assertGreater(self.max_active, 1)
+        self.assertLessEqual(self.max_active, EbayService.MAX_CONCURRENT_REQUESTS)
+
+    def test_cache_is_per_user(self):
+        # 他のユーザーの認証情報で取得した商品情報は返さない
+        first, second = (EbayService(user_id=user.id) for user in self.users)
+        with self.patch_fetch():
+            first.get_item('1')
+            item = second.get_item('1')
+        self.assertEqual(item['Title'], f'token-{self.users[1].id} 1')
+        self.assertEqual(len(self.fetched), 2)
+
+    def test_revise_invalidates_cache(self):
+        service = EbayService(user_id=self.users[0].id)
+        with self.patch_fetch(), \
+                mock.patch.object(EbayService, '_post_request', return_value=decode_response(REVISE_RESPONSE)):
+            service.get_item('1')
+            service.get_item('1')
+            self.assertEqual(len(self.fetched), 1)
+            results = service.revise_inventory_status([{'item_id': '1', 'price': '12.00'}])
+            service.get_item('1')
+        self.assertEqual(results, [{'item_id': '1', 'price': '12.0', 'quantity': '1'}])
+        self.assertEqual(len(self.fetched), 2)
@@ -0,0 +1,81 @@
+import threading
+from decimal import Decimal
+from unittest import mock
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from api.models import User, EbayListing
+from api.models.master import Setting
+from api.services.ebay import EbayService
+from api.services.ebay_repricing import EbayRepricingService
+from .utils import isolated_cache
+
+@isolated_cache
+class EbayRepricingTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reprice', email='reprice@example.com', password='password')
+        Setting.objects.create(
+            id=cls.user, ebay_client_id='client', ebay_client_secret='secret',
+            ebay_dev_id='dev', ebay_auth_token='token',
+        )
+        EbayListing.objects.bulk_create([
+            EbayListing(user=cls.user, item_id='low', current_price=Decimal('20.00'), quantity=5, quantity_sold=2),
+            EbayListing(user=cls.user, item_id='high', current_price=Decimal('100.00'), quantity=1),
+        ] + [
+            EbayListing(user=cls.user, item_id=f'item{i}', current_price=Decimal('10.00'), quantity=1)
+            for i in range(10)
+        ])
+
+    def setUp(self):
+        self.calls = []
+        self.lock = threading.Lock()
+        self.service = EbayRepricingService(user_id=self.user.id)
+
+    def fake_revise(self, service, changes):
+        with self.lock:
+            self.calls.append([change['item_id'] for change in changes])
+        if any(change['item_id'] == 'item0' for change in changes):
+            raise ValidationError("APIリクエストに失敗しました")
+        return []
+
+    def reprice(self, changes):
+        test = self
+        with mock.patch.object(EbayService, 'revise_inventory_status', lambda service, chunk: test.fake_revise(service, chunk)):
+            return self.service.reprice(changes)
+
+    def price(self, item_id):
+        return EbayListing.objects.get(item_id=item_id).current_price
+
+    def test_threshold(self):
+        # しきい値はmax(MIN_PRICE_CHANGE（0.50）, 元の価格 × MIN_PRICE_CHANGE_RATIO（1%）)
+        result = self.service.reprice([
+            {'item_id': 'low', 'price': '20.40'},
+            {'item_id': 'high', 'price': '100.90'},
+        ], dry_run=True)
+        self.assertEqual([skip['reason'] for skip in result['skipped']], ['below_threshold'] * 2)
+
+        result = self.service.reprice([
+            {'item_id': 'low', 'price': '20.50'},
+            {'item_id': 'high', 'price': '101.00'},
+        ], dry_run=True)
+        self.assertEqual([change['item_id'] for change in result['applied']], ['low', 'high'])
+
+    def test_chunks_and_write_back(self):
+        changes = [{'item_id': f'item{i}', 'price': '12.00'} for i in range(10)]
+        changes.append({'item_id': 'low', 'quantity': 1})
+        result = self.reprice(changes)
+
+        # ReviseInventoryStatusは4件ずつ（失敗した呼び出しの商品だけが失敗になる）
+        self.assertEqual(result['calls'], 3)
+        self.assertEqual(sorted(self.calls), [
+            ['item0', 'item1', 'item2', 'item3'], ['item4', 'item5', 'item6', 'item7'], ['item8', 'item9', 'low'],
+        ])
+        self.assertEqual([change['item_id'] for change in result['failed']], ['item0', 'item1', 'item2', 'item3'])
+        self.assertEqual(len(result['applied']), 7)
+
+        # 反映した変更だけをローカルの出品テーブルに書き戻す
+        for i in range(10):
+            self.assertEqual(self.price(f'item{i}'), Decimal('10.00' if i < 4 else '12.00'))
+        # 在庫数は販売済みを除いた数で指定される
+        self.assertEqual(EbayListing.objects.get(item_id='low').quantity, 3)
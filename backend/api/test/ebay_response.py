@@ -0,0 +1,96 @@
+from xml.etree import ElementTree
+from django.test import SimpleTestCase
+from api.management.commands.benchmark_ebay_decoder import (
+    build_add_item_response, build_get_item_response, decode_get_item, legacy_decode_get_item,
+)
+from api.services.ebay import EbayService
+from api.services.ebay_response import NS, decode_response
+
+FAILURE_RESPONSE = f"""<?xml version="1.0" encoding="UTF-8"?>
+<AddFixedPriceItemResponse xmlns="{NS}">
+<Ack>Failure</Ack>
+<Errors><ShortMessage>Invalid category</ShortMessage><LongMessage>The category is not valid.</LongMessage>
+<ErrorCode>87</ErrorCode><SeverityCode>Error</SeverityCode><ErrorClassification>RequestError</ErrorClassification></Errors>
+<Errors><ShortMessage>Internal error</ShortMessage><LongMessage>Internal error to the application.</LongMessage>
+<ErrorCode>10007</ErrorCode><SeverityCode>Error</SeverityCode><ErrorClassification>SystemError</ErrorClassification></Errors>
+</AddFixedPriceItemResponse>""".encode('utf-8')
+
+REVISE_RESPONSE = f"""<?xml version="1.0" encoding="UTF-8"?>
+<ReviseInventoryStatusResponse xmlns="{NS}">
+<Ack>Success</Ack>
+<InventoryStatus><ItemID>1</ItemID><StartPrice>12.0</StartPrice><Quantity>1</Quantity></InventoryStatus>
+<InventoryStatus><ItemID>2</ItemID><StartPrice>15.0</StartPrice><Quantity>3</Quantity></InventoryStatus>
+<Fees><ItemID>1</ItemID>
+<Fee><Name>InsertionFee</Name><Fee currencyID="USD">0.0</Fee></Fee>
+<Fee><Name>ListingFee</Name><Fee currencyID="USD">0.35</Fee></Fee></Fees>
+<Fees><ItemID>2</ItemID>
+<Fee><Name>InsertionFee</Name><Fee currencyID="USD">0.0</Fee></Fee>
+<Fee><Name>ListingFee</Name><Fee currencyID="USD">0.40</Fee></Fee></Fees>
+</ReviseInventoryStatusResponse>""".encode('utf-8')
+
+def tag(name):
+    return f'{{{NS}}}{name}'
+
+def legacy_errors(content):
+    """変更前の_post_requestと同じ探索（警告も区別しない）"""
+    root = ElementTree.fromstring(content)
+    messages, codes, transient = [], [], False
+    for error in root.findall(f".//{tag('Errors')}"):
+        error_id = error.find(tag('ErrorCode'))
+        error_message = error.find(tag('LongMessage'))
+        classification = error.find(tag('ErrorClassification'))
+        if error_message is not None:
+            messages.append(f"Error {error_id.text if error_id is not None else 'Unknown'}: {error_message.text}")
+            if error_id is not None:
+                codes.append(error_id.text)
+            if classification is not None and classification.text == 'SystemError':
+                transient = True
+    return messages, codes[0] if codes else None, transient
+
+def legacy_fees(content):
+    """'.//Fee'の探索（金額は入れ子のFee要素から取得）"""
+    fees = []
+    for fee in ElementTree.fromstring(content).iter(tag('Fee')):
+        name = fee.find(tag('Name'))
+        amount = fee.find(tag('Fee'))
+        if name is not None and amount is not None:
+            fees.append((name.text, amount.text, amount.get('currencyID')))
+    return fees
+
+def fees(response):
+    return [(fee.name, fee.amount, fee.currency_id) for fee in response.fees]
+
+class DecodeResponseTest(SimpleTestCase):
+    """一度の走査での解析結果が変更前の探索と一致する"""
+
+    def test_success(self):
+        content = build_get_item_response(specifics=2, pictures=1)
+        response = decode_response(content)
+        self.assertEqual(response.ack, 'Success')
+        self.assertEqual(response.errors, [])
+        self.assertEqual(decode_get_item(content), legacy_decode_get_item(content))
+
+    def test_warning_with_item_id(self):
+        content = build_add_item_response(fee_count=3, warning_count=1)
+        response, error = EbayService._decode_trading_response('AddFixedPriceItem', content)
+        self.assertEqual(response.item_id, ElementTree.fromstring(content).find(f".//{tag('ItemID')}").text)
+        self.assertEqual(fees(response), legacy_fees(content))
+        self.assertEqual(len(response.fees), 3)
+        # 警告のみの場合はエラーにしない（変更前はエラーとして扱っていた）
+        self.assertEqual([f"Error {e.code}: {e.long_message}" for e in response.errors], legacy_errors(content)[0])
+        self.assertEqual(response.error_list, [])
+        self.assertIsNone(error)
+
+    def test_failure_with_multiple_errors(self):
+        response, error = EbayService._decode_trading_response('AddFixedPriceItem', FAILURE_RESPONSE)
+        self.assertEqual(response.ack, 'Failure')
+        messages, error_code, transient = legacy_errors(FAILURE_RESPONSE)
+        self.assertEqual(error.messages, messages)
+        self.assertEqual(error.error_code, error_code)
+        self.assertEqual(error.transient, transient)
+        self.assertTrue(error.transient)
+
+    def test_multiple_fees_blocks(self):
+        response = decode_response(REVISE_RESPONSE)
+        self.assertEqual(fees(response), legacy_fees(REVISE_RESPONSE))
+        self.assertEqual(len(response.fees), 4)
@@ -0,0 +1,186 @@
+import threading
+import time
+from unittest import mock
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from api.services.ebay_scheduler import (
+    EbayCallScheduler, EbayApiError, EbayCircuitOpenError, EbayQuotaExceededError,
+    PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, _CircuitBreaker, _PriorityGate,
+)
+from .utils import isolated_cache
+
+class FakeCall:
+    """指定した順にエラーを送出し、最後は'ok'を返すAPI呼び出し"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.attempts = 0
+
+    def __call__(self):
+        self.attempts += 1
+        if self.errors:
+            error = self.errors.pop(0) if len(self.errors) > 1 else self.errors[0]
+            if error is not None:
+                raise error
+        return 'ok'
+
+def transient(request_sent=True, error_code=None):
+    return EbayApiError("一時的なエラー", error_code=error_code, transient=True, request_sent=request_sent)
+
+@isolated_cache
+class EbayCallSchedulerTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.scheduler = EbayCallScheduler()
+        self.scheduler.daily_quota = 10
+        self.scheduler.background_reserve = 0.2
+        self.scheduler.max_retries = 3
+        self.scheduler.circuit_breaker = _CircuitBreaker(failure_threshold=100, recovery_timeout=60)
+        self.sleep = mock.patch('api.services.ebay_scheduler.time.sleep').start()
+        mock.patch('api.services.ebay_scheduler.random.uniform', return_value=0).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def used(self):
+        return self.scheduler.status('app')['used']
+
+    def test_retries_transient_errors(self):
+        func = FakeCall(transient(), transient(), None)
+        self.assertEqual(self.scheduler.call(func, 'GetItem', 'app'), 'ok')
+        self.assertEqual(func.attempts, 3)
+        self.assertEqual(self.sleep.call_count, 2)
+        self.assertEqual(self.used(), 3)
+
+    def test_gives_up_after_max_retries(self):
+        func = FakeCall(transient())
+        with self.assertRaises(EbayApiError):
+            self.scheduler.call(func, 'GetItem', 'app')
+        self.assertEqual(func.attempts, self.scheduler.max_retries + 1)
+
+    def test_does_not_retry_request_errors(self):
+        func = FakeCall(EbayApiError("入力エラー", error_code='37'))
+        with self.assertRaises(EbayApiError):
+            self.scheduler.call(func, 'GetItem', 'app')
+        self.assertEqual(func.attempts, 1)
+
+    def test_non_idempotent_calls(self):
+        # 届いたかどうか分からない出品登録は二重登録を避けるため再送しない
+        func = FakeCall(transient(request_sent=True), None)
+        with self.assertRaises(EbayApiError):
+            self.scheduler.call(func, 'AddFixedPriceItem', 'app')
+        self.assertEqual(func.attempts, 1)
+
+        # 送信前の失敗と、eBayがエラーコードを返した（処理していない）場合は再送する
+        for error in (transient(request_sent=False), transient(request_sent=True, error_code='10007')):
+            func = FakeCall(error, None)
+            self.assertEqual(self.scheduler.call(func, 'AddFixedPriceItem', 'app'), 'ok')
+            self.assertEqual(func.attempts, 2)
+
+        # 冪等な呼び出しは届いた可能性があっても再送する
+        func = FakeCall(transient(request_sent=True), None)
+        self.assertEqual(self.scheduler.call(func, 'GetItem', 'app'), 'ok')
+        self.assertEqual(func.attempts, 2)
+
+    def test_quota_background_reserve(self):
+        func = FakeCall(None)
+        for _ in range(8):
+            self.scheduler.call(func, 'GetItem', 'app', PRIORITY_BACKGROUND)
+        # 同期処理は上限の2割を画面操作用に残して止まる（拒否した呼び出しは数えない）
+        with self.assertRaises(EbayQuotaExceededError):
+            self.scheduler.call(func, 'GetItem', 'app', PRIORITY_BACKGROUND)
+        self.assertEqual(self.used(), 8)
+
+        for _ in range(2):
+            self.scheduler.call(func, 'GetItem', 'app', PRIORITY_INTERACTIVE)
+        with self.assertRaises(EbayQuotaExceededError):
+            self.scheduler.call(func, 'GetItem', 'app', PRIORITY_INTERACTIVE)
+        self.assertEqual(self.used(), 10)
+        self.assertEqual(func.attempts, 10)
+
+    def test_circuit_breaker(self):
+        breaker = self.scheduler.circuit_breaker = _CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+        self.scheduler.max_retries = 0
+        for _ in range(2):
+            with self.assertRaises(EbayApiError):
+                self.scheduler.call(FakeCall(transient()), 'GetItem', 'app')
+        self.assertEqual(breaker.state, _CircuitBreaker.OPEN)
+
+        func = FakeCall(None)
+        with self.assertRaises(EbayCircuitOpenError):
+            self.scheduler.call(func, 'GetItem', 'app')
+        self.assertEqual(func.attempts, 0)
+
+        # 復旧待ち時間が過ぎると1件だけ試しに通し、試行中の他の呼び出しは止める
+        breaker._opened_at -= 60
+        self.assertEqual(breaker.state, _CircuitBreaker.HALF_OPEN)
+        blocked = []
+
+        def trial():
+            blocked.append(not breaker.allow_request())
+            raise transient()
+
+        with self.assertRaises(EbayApiError):
+            self.scheduler.call(trial, 'GetItem', 'app')
+        self.assertEqual(blocked, [True])
+        # 試行が失敗すると再び開く
+        self.assertEqual(breaker.state, _CircuitBreaker.OPEN)
+
+        breaker._opened_at -= 60
+        self.assertEqual(self.scheduler.call(FakeCall(None), 'GetItem', 'app'), 'ok')
+        self.assertEqual(breaker.state, _CircuitBreaker.CLOSED)
+
+    def test_cancel_trial_on_quota_exceeded(self):
+        breaker = self.scheduler.circuit_breaker = _CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+        self.scheduler.max_retries = 0
+        with self.assertRaises(EbayApiError):
+            self.scheduler.call(FakeCall(transient()), 'GetItem', 'app')
+        breaker._opened_at -= 60
+
+        # 呼び出し回数の上限で試行を実行しなかった場合は次の呼び出しに試行を譲る
+        self.scheduler.daily_quota = self.used()
+        with self.assertRaises(EbayQuotaExceededError):
+            self.scheduler.call(FakeCall(None), 'GetItem', 'app')
+        self.assertTrue(breaker.allow_request())
+
+    async def test_async_call_retries(self):
+        attempts = []
+
+        async def func():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise transient()
+            return 'ok'
+
+        self.assertEqual(await self.scheduler.async_call(func, 'GetItem', 'app'), 'ok')
+        self.assertEqual(len(attempts), 2)
+
+class PriorityGateTest(SimpleTestCase):
+
+    def wait_until(self, condition):
+        deadline = time.monotonic() + 2
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.005)
+
+    def test_interactive_before_background(self):
+        gate = _PriorityGate(1)
+        gate.acquire(PRIORITY_INTERACTIVE)
+        order = []
+
+        def worker(priority):
+            gate.acquire(priority)
+            order.append(priority)
+            gate.release()
+
+        background = threading.Thread(target=worker, args=(PRIORITY_BACKGROUND,))
+        background.start()
+        time.sleep(0.05)
+        interactive = threading.Thread(target=worker, args=(PRIORITY_INTERACTIVE,))
+        interactive.start()
+        self.wait_until(lambda: gate._waiting_interactive == 1)
+
+        # 先に待っていた同期処理より画面操作を先に通す
+        gate.release()
+        background.join(2)
+        interactive.join(2)
+        self.assertEqual(order, [PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND])
@@ -0,0 +1,152 @@
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from api.services.layered_cache import LayeredCache
+
+class LayeredCacheTest(SimpleTestCase):
+    """2層のキャッシュ（共有キャッシュは別名のLocMemCacheで代用）"""
+
+    def setUp(self):
+        self.cache = LayeredCache('test', {
+            'KEY_PREFIX': 'test',
+            'OPTIONS': {
+                'SHARED': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'layered-test-shared'},
+                'LOCAL_TIMEOUT': 60,
+                'LOCAL_EXCLUDE': ['counter'],
+                'LOCK_TIMEOUT': 2,
+            },
+        })
+        self.cache.clear()
+        self.cache.stats.reset()
+
+    def test_local_tier(self):
+        self.cache.set('item:1', 'value')
+        # 他のワーカーでの更新（共有キャッシュのみ）はプロセス内の値が期限切れになるまで反映されない
+        self.cache._shared.set('item:1', 'updated')
+        self.assertEqual(self.cache.get('item:1'), 'value')
+        self.cache._local.clear()
+        self.assertEqual(self.cache.get('item:1'), 'updated')
+        self.assertEqual(self.cache.get('item:2'), None)
+
+        stats = self.cache.stats.snapshot()['namespaces']['item']
+        self.assertEqual((stats['local_hits'], stats['shared_hits'], stats['misses']), (1, 1, 1))
+
+    def test_local_exclude(self):
+        self.cache.add('counter:a', 0)
+        self.cache.incr('counter:a')
+        self.cache._shared.incr('counter:a')
+        self.assertEqual(self.cache.get('counter:a'), 2)
+        with self.assertRaises(ValueError):
+            self.cache.incr('counter:b')
+
+    def test_get_many(self):
+        self.cache.set_many({'item:1': 1, 'item:2': 2})
+        self.cache._local.delete('item:2')
+        self.assertEqual(self.cache.get_many(['item:1', 'item:2', 'item:3']), {'item:1': 1, 'item:2': 2})
+        self.cache.delete_many(['item:1', 'item:2'])
+        self.assertEqual(self.cache.get_many(['item:1', 'item:2']), {})
+
+    def test_get_or_set_computes_once(self):
+        calls = []
+        started = threading.Event()
+
+        def build():
+            calls.append(1)
+            started.wait(1)
+            return 'built'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.cache.get_or_set('master:1', build, 60)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        started.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['built'] * 8)
+        self.assertEqual(len(calls), 1)
+
+    def test_get_or_set_waits_for_other_worker(self):
+        # 他のワーカーが計算中（共有キャッシュのロックを取得済み）
+        self.cache._shared.add('master:1:lock', True, 60)
+        timer = threading.Timer(0.2, lambda: self.cache._shared.set('master:1', 'remote'))
+        timer.start()
+        self.assertEqual(self.cache.get_or_set('master:1', lambda: 'local', 60), 'remote')
+        timer.join()
+        self.assertEqual(self.cache.stats.snapshot()['namespaces']['master']['lock_waits'], 1)
+
+class LayeredFileCacheTest(SimpleTestCase):
+    """共有キャッシュがファイルの場合のadd・incr（ワーカー間でアトミック）"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cache = LayeredCache('test-file', {
+            'OPTIONS': {
+                'SHARED': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': self.dir},
+                'LOCAL_EXCLUDE': ['counter', 'lock'],
+            },
+        })
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def run_threads(self, target, count=8):
+        threads = [threading.Thread(target=target) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_concurrent_incr(self):
+        self.cache.add('counter:a', 0, 60)
+        self.run_threads(lambda: [self.cache.incr('counter:a') for _ in range(25)])
+        self.assertEqual(self.cache.get('counter:a'), 200)
+        # 有効期限は既定のTIMEOUT（300秒）に戻らない
+        with open(self.cache._shared._key_to_file('counter:a'), 'rb') as f:
+            self.assertLessEqual(pickle.load(f), time.time() + 60)
+
+    def test_concurrent_add(self):
+        results = []
+        self.run_threads(lambda: results.append(self.cache.add('lock:a', True, 60)))
+        self.assertEqual(results.count(True), 1)
+
+class LayeredDatabaseCacheTest(TestCase):
+    """共有キャッシュがDBの場合のadd・incr"""
+    TABLE = 'layered_test_cache'
+
+    def setUp(self):
+        call_command('createcachetable', self.TABLE, verbosity=0)
+        self.cache = LayeredCache('test-db', {
+            'OPTIONS': {
+                'SHARED': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': self.TABLE},
+                'LOCAL_EXCLUDE': ['counter', 'lock'],
+            },
+        })
+
+    def expires(self, key):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT expires FROM {self.TABLE} WHERE cache_key = %s", [self.cache._shared.make_key(key)])
+            return cursor.fetchone()[0]
+
+    def test_incr(self):
+        self.cache.add('counter:a', 0, 60)
+        expires = self.expires('counter:a')
+        self.assertEqual(self.cache.incr('counter:a'), 1)
+        self.assertEqual(self.cache.incr('counter:a', 2), 3)
+        self.assertEqual(self.cache.get('counter:a'), 3)
+        self.assertEqual(self.expires('counter:a'), expires)
+        with self.assertRaises(ValueError):
+            self.cache.incr('counter:b')
+
+    def test_add_over_expired_row(self):
+        self.cache._shared.set('lock:a', 'old', 0)
+        self.assertTrue(self.cache.add('lock:a', 'new', 60))
+        self.assertFalse(self.cache.add('lock:a', 'other', 60))
+        self.assertEqual(self.cache.get('lock:a'), 'new')
@@ -0,0 +1,106 @@
+import threading
+import time
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from api.models import User
+from api.services.listing_pipeline import ListingPipeline
+from .utils import isolated_cache
+
+# 段ごとに結果を格納するキー
+RESULT_KEYS = {'detail': 'detail', 'pricing': 'pricing', 'shipping': 'shipping', 'register': 'registration'}
+
+def stub(name, delay=0.0):
+    def func(item):
+        if delay:
+            time.sleep(delay)
+        item[name] = {'start_price': '10.00', 'shipping_cost': '5.00', 'title': item['listing']['title']}
+        return item
+    return func
+
+@isolated_cache
+@mock.patch('api.services.listing_pipeline.YahooAuctionService')
+@mock.patch('api.services.listing_pipeline.ProfitCalculator')
+@mock.patch('api.services.listing_pipeline.ShippingCalculator')
+class ListingPipelineTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='pipeline', email='pipeline@example.com', password='password')
+
+    def setUp(self):
+        cache.clear()
+
+    def pipeline(self, count, funcs, queue_size=2):
+        pipeline = ListingPipeline(
+            user_id=self.user.id, search_params={'p': 'camera'}, listing={'categoryId': '1'},
+            service_id=1, country_code='US', package={}, dry_run=True,
+            concurrency={name: 1 for name in ListingPipeline.STAGES}, queue_size=queue_size,
+        )
+        pipeline.yahoo_service.search_items.return_value = {
+            'items': [{'url': f'item{i}', 'title': f'Item {i}'} for i in range(count)],
+        }
+        for stage in pipeline.stages:
+            stage.func = funcs.get(stage.name) or stub(RESULT_KEYS[stage.name])
+        return pipeline
+
+    def test_backpressure(self, *mocks):
+        pipeline = self.pipeline(20, {'register': stub('registration', 0.01)})
+        snapshot = pipeline.run()
+        self.assertEqual(snapshot['status'], ListingPipeline.STATUS_COMPLETED)
+        self.assertEqual(snapshot['succeeded'], 20)
+        # 後段が遅くてもキューの上限を超えて溜まらない
+        for stage in pipeline.stages:
+            self.assertLessEqual(stage.max_backlog, 2)
+        self.assertGreater(snapshot['stages']['detail']['blocked_seconds'], 0)
+
+    def test_cancel_drains_queues(self, *mocks):
+        release = threading.Event()
+        registering = threading.Event()
+
+        def register(item):
+            registering.set()
+            release.wait(5)
+            return stub('registration')(item)
+
+        pipeline = self.pipeline(20, {'register': register})
+        pipeline.start()
+        self.assertTrue(registering.wait(5))
+        pipeline.cancel()
+        release.set()
+        pipeline.join(5)
+
+        snapshot = pipeline.snapshot()
+        self.assertEqual(snapshot['status'], ListingPipeline.STATUS_CANCELLED)
+        self.assertLess(len(snapshot['results']), 20)
+        self.assertTrue(all(stage.queue.empty() for stage in pipeline.stages))
+
+    def test_stage_error(self, *mocks):
+        def price(item):
+            if item['listing']['url'] == 'item1':
+                raise ValueError('仕入れ価格が不正です')
+            return stub('pricing')(item)
+
+        snapshot = self.pipeline(3, {'pricing': price}).run()
+        self.assertEqual(snapshot['status'], ListingPipeline.STATUS_COMPLETED)
+        self.assertEqual((snapshot['succeeded'], snapshot['failed']), (2, 1))
+        failed = next(result for result in snapshot['results'] if not result['success'])
+        self.assertEqual(failed['url'], 'item1')
+        self.assertEqual(failed['stage'], 'pricing')
+        self.assertEqual(failed['error'], '仕入れ価格が不正です')
+        self.assertEqual(snapshot['stages']['pricing']['failed'], 1)
+
+    @mock.patch('api.views.pipeline.pipeline_registry')
+    def test_view_dry_run(self, pipeline_registry, *mocks):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        data = {
+            'search': {'p': 'camera'}, 'listing': {'categoryId': '1'}, 'package': {},
+            'service_id': 1, 'country_code': 'US',
+        }
+        for value, dry_run in (('false', False), ('0', False), ('true', True), (True, True)):
+            with mock.patch('api.services.listing_pipeline.EbayService'):
+                response = client.post('/api/v1/listing-pipeline/', {**data, 'dry_run': value}, format='json')
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.json()['data']['dry_run'], dry_run)
@@ -0,0 +1,43 @@
+from django.test import SimpleTestCase
+from api.services.metrics import ApiCallMetrics
+
+class ApiCallMetricsTest(SimpleTestCase):
+
+    def setUp(self):
+        self.metrics = ApiCallMetrics()
+
+    def record(self, latency, count, outcome=ApiCallMetrics.OUTCOME_SUCCESS, error_code=None):
+        for _ in range(count):
+            self.metrics.record('trading', 'GetItem', latency, outcome, 1000, error_code)
+
+    def test_percentiles(self):
+        self.record(0.03, 60)
+        self.record(0.2, 35)
+        self.record(1.5, 4, ApiCallMetrics.OUTCOME_NETWORK_ERROR)
+        self.record(40, 1, ApiCallMetrics.OUTCOME_API_ERROR, '931')
+
+        stats = self.metrics.snapshot()['trading']['GetItem']
+        self.assertEqual(stats['count'], 100)
+        # パーセンタイルは該当する区切りの上限
+        self.assertEqual((stats['latency']['p50'], stats['latency']['p95'], stats['latency']['p99']), (0.05, 0.25, 2.5))
+        self.assertEqual(stats['latency']['max'], 40)
+        self.assertEqual(stats['latency']['histogram']['le_0.05'], 60)
+        self.assertEqual(stats['latency']['histogram']['le_inf'], 1)
+        self.assertEqual(stats['outcomes'], {'success': 95, 'network_error': 4, 'api_error': 1})
+        self.assertEqual(stats['error_rate'], 0.05)
+        self.assertEqual(stats['error_codes'], {'931': 1})
+        self.assertEqual(stats['response_bytes'], {'avg': 1000, 'max': 1000})
+
+    def test_bucket_boundaries(self):
+        # 区切りちょうどの値はその区切りに入り、最大の区切りを超えた値のパーセンタイルはNone
+        self.record(0.05, 1)
+        self.record(60, 1)
+        latency = self.metrics.snapshot()['trading']['GetItem']['latency']
+        self.assertEqual(latency['histogram']['le_0.05'], 1)
+        self.assertEqual(latency['p50'], 0.05)
+        self.assertIsNone(latency['p99'])
+
+    def test_reset(self):
+        self.record(0.1, 3)
+        self.metrics.reset()
+        self.assertEqual(self.metrics.snapshot(), {})
@@ -0,0 +1,54 @@
+from decimal import Decimal
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from api.models.master import Service, Countries, Shipping
+from api.services.package_consolidation import PackageConsolidator
+from api.services.quote_cache import quote_cache
+from api.services.rate_card import rate_card_index
+from .utils import isolated_cache
+
+@isolated_cache
+class PackageConsolidatorTest(TestCase):
+    """送料の合計が最も安い箱詰め（分枝限定法）"""
+
+    BOXES = [{'name': 'M', 'length': 30, 'width': 20, 'height': 10}]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.service = Service.objects.create(service_name='Service')
+        Countries.objects.create(country_code='US', country_name='US', country_name_jp='US', zone='A', service=cls.service)
+        Shipping.objects.bulk_create([
+            Shipping(service=cls.service, zone='A', weight=weight, basic_price=Decimal(1000 + weight * 100))
+            for weight in range(1, 31)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        quote_cache.clear()
+        rate_card_index.bump_version()
+        self.items = [{'id': i, 'length': 10, 'width': 10, 'height': 10, 'weight': 0.5} for i in range(3)]
+
+    def test_consolidates_when_cheaper(self):
+        result = PackageConsolidator(self.service.id).optimize('US', self.items, self.BOXES)
+        self.assertTrue(result['optimal'])
+        self.assertEqual(len(result['packages']), 1)
+        self.assertEqual(sorted(result['packages'][0]['items']), [0, 1, 2])
+        self.assertLess(result['total_amount'], result['separate_amount'])
+
+    def test_item_without_box(self):
+        items = self.items + [{'id': 'large', 'length': 50, 'width': 50, 'height': 50, 'weight': 1}]
+        with self.assertRaises(ValidationError):
+            PackageConsolidator(self.service.id).optimize('US', items, self.BOXES)
+
+    def test_invalid_weight(self):
+        items = self.items + [{'id': 'nan', 'length': 10, 'width': 10, 'height': 10, 'weight': 'nan'}]
+        with self.assertRaises(ValidationError):
+            PackageConsolidator(self.service.id).optimize('US', items, self.BOXES)
+
+    def test_time_budget_exhausted(self):
+        # 制限時間を使い切った場合は1商品ずつ発送する箱詰めを返す
+        result = PackageConsolidator(self.service.id).optimize('US', self.items, self.BOXES, time_budget_ms=0)
+        self.assertFalse(result['optimal'])
+        self.assertEqual(len(result['packages']), len(self.items))
+        self.assertEqual(result['total_amount'], result['separate_amount'])
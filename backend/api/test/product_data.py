@@ -0,0 +1,43 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from api.models import User
+from .utils import isolated_cache
+
+@isolated_cache
+@mock.patch('api.views.product_data.product_data_jobs')
+class ProductDataViewTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='product', email='product@example.com', password='password')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def post(self, url):
+        return self.client.post('/api/v1/product-register/', {
+            'source': 'yahoo_auction', 'url': url, 'categoryId': '1',
+        }, format='json')
+
+    def test_authentication_required(self, product_data_jobs):
+        self.assertEqual(self.post('https://page.auctions.yahoo.co.jp/jp/auction/x1').status_code, 401)
+        self.assertEqual(self.client.get('/api/v1/product-register/jobs/abc/').status_code, 401)
+        product_data_jobs.submit.assert_not_called()
+
+    def test_invalid_url(self, product_data_jobs):
+        self.client.force_authenticate(self.user)
+        for url in ('https://example.com/jp/auction/x1', 'http://127.0.0.1:8000/', 'page.auctions.yahoo.co.jp'):
+            self.assertEqual(self.post(url).status_code, 400)
+        product_data_jobs.submit.assert_not_called()
+
+    def test_valid_url_submits_job(self, product_data_jobs):
+        self.client.force_authenticate(self.user)
+        job = {'id': 'job', 'status': 'running'}
+        product_data_jobs.submit.return_value = job
+        product_data_jobs.wait.return_value = job
+        response = self.post('https://page.auctions.yahoo.co.jp/jp/auction/x1')
+        self.assertEqual(response.status_code, 202)
+        product_data_jobs.submit.assert_called_once_with('https://page.auctions.yahoo.co.jp/jp/auction/x1')
@@ -0,0 +1,104 @@
+from decimal import Decimal
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from api.models import User
+from api.models.master import Service, Countries, Shipping
+from api.services.currency import CurrencyService
+from api.services.profit_calculator import ProfitCalculator
+from api.services.quote_cache import quote_cache
+from api.services.rate_card import rate_card_index
+from .utils import isolated_cache
+
+RATE_QUOTE = {'rate': 0.01, 'as_of': None, 'stale': False, 'source': CurrencyService.SOURCE_LIVE}
+PACKAGE = {'length': 10, 'width': 10, 'height': 10, 'weight': 1}
+
+@isolated_cache
+@mock.patch.object(CurrencyService, 'get_exchange_rate', return_value=1.0)
+@mock.patch.object(CurrencyService, 'get_rate_quote', return_value=RATE_QUOTE)
+class ProfitCalculatorTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='profit', email='profit@example.com', password='password')
+        cls.service = Service.objects.create(service_name='Service')
+        Countries.objects.create(
+            country_code='US', country_name='US', country_name_jp='US', zone='A', service=cls.service,
+        )
+        Shipping.objects.create(service=cls.service, zone='A', weight=1, basic_price=Decimal('2000'))
+
+    def setUp(self):
+        cache.clear()
+        quote_cache.clear()
+        rate_card_index.bump_version()
+
+    def calculator(self, country_code='US'):
+        return ProfitCalculator(self.service.id, country_code, target_margin='0.2')
+
+    def test_target_price(self, get_rate_quote, get_exchange_rate):
+        calculator = self.calculator()
+        cent = Decimal('0.01')
+
+        def margin_left(price, cost):
+            # 価格 - 手数料 - 固定手数料 - 原価 - 価格 * 目標利益率
+            return price - price * calculator.FINAL_VALUE_FEE_RATE - calculator.fixed_fee - cost - price * calculator.target_margin
+
+        for cost in (Decimal('0'), Decimal('12.34'), Decimal('100.00'), Decimal('999.99')):
+            price = calculator.target_price(cost)
+            self.assertEqual(price, price.quantize(cent))
+            # 目標利益率を満たす最小の価格（1セント単位）
+            self.assertGreaterEqual(margin_left(price, cost), 0)
+            self.assertLess(margin_left(price - cent, cost), 0)
+
+    def test_parse_postage(self, get_rate_quote, get_exchange_rate):
+        self.assertEqual(ProfitCalculator.parse_postage('送料無料'), Decimal('0'))
+        self.assertEqual(ProfitCalculator.parse_postage('送料 1,200円'), Decimal('1200'))
+        self.assertEqual(ProfitCalculator.parse_postage(None), ProfitCalculator.DEFAULT_DOMESTIC_SHIPPING)
+        self.assertEqual(ProfitCalculator.parse_postage(''), ProfitCalculator.DEFAULT_DOMESTIC_SHIPPING)
+        self.assertEqual(ProfitCalculator.parse_postage('着払い'), ProfitCalculator.DEFAULT_DOMESTIC_SHIPPING)
+
+    def test_error_rows(self, get_rate_quote, get_exchange_rate):
+        listings = [
+            {'url': 'bad', 'price': 'abc'},
+            {'url': 'zero', 'price': '0'},
+            {'url': 'ok', 'price': '1000', 'shipping': '送料無料'},
+        ]
+        result = self.calculator().calculate(listings, PACKAGE)
+        self.assertEqual((result['succeeded'], result['failed']), (1, 2))
+        self.assertEqual([row['url'] for row in result['results']], ['ok', 'bad', 'zero'])
+        self.assertEqual(result['results'][1]['error'], '仕入れ価格が不正です')
+        # 原価 = (1000 + 0 + 2000)円 * 0.01
+        self.assertEqual(result['results'][0]['landed_cost'], 30.0)
+
+        # 配送先に登録されていない国は送料のエラーになる
+        result = self.calculator('ZZ').calculate(listings[2:], PACKAGE)
+        self.assertFalse(result['results'][0]['success'])
+        self.assertTrue(result['results'][0]['error'])
+
+    def test_sort_order(self, get_rate_quote, get_exchange_rate):
+        listings = [
+            {'url': 'no-price-expensive', 'price': '5000', 'shipping': '送料無料'},
+            {'url': 'failed', 'price': ''},
+            {'url': 'low-margin', 'price': '1000', 'shipping': '送料無料', 'ebay_price': '40'},
+            {'url': 'no-price-cheap', 'price': '1000', 'shipping': '送料無料'},
+            {'url': 'high-margin', 'price': '1000', 'shipping': '送料無料', 'ebay_price': '80'},
+        ]
+        results = self.calculator().calculate(listings, PACKAGE)['results']
+        self.assertEqual(
+            [row['url'] for row in results],
+            ['high-margin', 'low-margin', 'no-price-cheap', 'no-price-expensive', 'failed'],
+        )
+        self.assertGreater(results[0]['margin'], results[1]['margin'])
+        self.assertLess(results[2]['target_price'], results[3]['target_price'])
+
+    def test_view_use_buy_now(self, get_rate_quote, get_exchange_rate):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        data = {
+            'service_id': self.service.id, 'country_code': 'US', 'package': PACKAGE,
+            'items': [{'url': 'item', 'price': '1000', 'buy_now_price': '3000'}],
+        }
+        for value, purchase_price in (('false', 1000.0), ('0', 1000.0), ('true', 3000.0), (True, 3000.0)):
+            response = client.post('/api/v1/profit/calculate/', {**data, 'use_buy_now': value}, format='json')
+            self.assertEqual(response.json()['data']['results'][0]['purchase_price'], purchase_price)
@@ -0,0 +1,164 @@
+from datetime import date
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api.models import User, EbayListing
+from api.models.master import Service, Countries, Shipping, ShippingSurcharge, Setting
+from api.services.ebay_inventory import EbayInventoryService
+from api.services.ebay_repricing import EbayRepricingService
+from api.services.quote_cache import quote_cache
+from api.services.rate_card import rate_card_index
+from api.services.shipping_calculator import ShippingCalculator
+from .utils import isolated_cache
+
+# 各処理で発行してよいクエリ数の上限（超えた場合はテストが失敗する）
+RATE_CARD_LOAD_QUERIES = 5  # 配送サービス・国・有効な料金表・料金・追加料金
+MASTER_DATA_QUERIES = 2  # 配送サービス・国
+SETTING_GET_QUERIES = 1
+SETTING_PUT_QUERIES = 2
+EBAY_LISTING_QUERIES = 1
+EBAY_UPSERT_QUERIES = 3  # 既存の出品・作成・更新
+EBAY_REPRICE_DRY_RUN_QUERIES = 2  # 認証情報・既存の出品
+
+@isolated_cache
+class ShippingQueryBudgetTest(TestCase):
+    """送料計算はマスタデータの読み込み後はクエリを発行しない"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.services = [Service.objects.create(service_name=f'Service {i}') for i in range(3)]
+        for service in cls.services:
+            Countries.objects.bulk_create([
+                Countries(country_code=code, country_name=code, country_name_jp=code, zone=zone, service=service)
+                for code, zone in (('US', 'A'), ('GB', 'B'), ('AU', 'C'))
+            ])
+            Shipping.objects.bulk_create([
+                Shipping(service=service, zone=zone, weight=weight, basic_price=Decimal(1000 + weight * 100))
+                for zone in 'ABC' for weight in range(1, 31)
+            ])
+            ShippingSurcharge.objects.create(
+                service=service, surcharge_type='FUEL', rate=Decimal('10.00'), start_date=date(2020, 1, 1),
+            )
+
+    def setUp(self):
+        cache.clear()
+        quote_cache.clear()
+        rate_card_index.bump_version()
+        self.client = APIClient()
+        self.service_id = self.services[0].id
+
+    def test_rate_card_load(self):
+        with self.assertNumQueries(RATE_CARD_LOAD_QUERIES):
+            rate_card_index.get_cards()
+        with self.assertNumQueries(0):
+            rate_card_index.get_cards()
+
+    def test_quote(self):
+        rate_card_index.get_cards()
+        with self.assertNumQueries(0):
+            result = ShippingCalculator(self.service_id).calculate_shipping_cost('US', 30, 20, 10, 2.5)
+        self.assertEqual(result['data']['weight_range'], 3)
+
+    def test_batch(self):
+        rate_card_index.get_cards()
+        packages = [
+            {'country_code': code, 'length': 30, 'width': 20, 'height': 10, 'weight': weight}
+            for code in ('US', 'GB', 'AU') for weight in range(1, 30)
+        ]
+        with self.assertNumQueries(0):
+            results = ShippingCalculator(self.service_id).calculate_shipping_costs(packages)
+        self.assertEqual(len(results), len(packages))
+
+    def test_batch_invalid_weight(self):
+        # 重量が有限の正の数でない行はその行だけエラーになる
+        packages = [
+            {'country_code': 'US', 'length': 30, 'width': 20, 'height': 10, 'weight': weight}
+            for weight in ('nan', 'inf', -1, 2)
+        ]
+        results = ShippingCalculator(self.service_id).calculate_shipping_costs(packages)
+        self.assertEqual([result['success'] for result in results], [False, False, False, True])
+        result = ShippingCalculator(self.service_id).calculate_shipping_cost('US', 30, 20, 10, float('nan'))
+        self.assertFalse(result['success'])
+
+    def test_compare(self):
+        rate_card_index.get_cards()
+        with self.assertNumQueries(0):
+            quotes = ShippingCalculator.compare_services('GB', 30, 20, 10, 5)
+        self.assertEqual(len(quotes), len(self.services))
+
+    def test_master_data(self):
+        rate_card_index.get_cards()
+        with self.assertNumQueries(MASTER_DATA_QUERIES):
+            response = self.client.get('/api/v1/shipping-calculator/')
+        self.assertEqual(response.status_code, 200)
+        # 同じ国が複数の配送サービスに登録されていても国の一覧は重複しない
+        self.assertEqual(len(response.json()['data']['countries']), 3)
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/shipping-calculator/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+@isolated_cache
+class SettingQueryBudgetTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='setting', password='password')
+        Setting.objects.create(id=cls.user, ebay_client_id='client')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_get(self):
+        with self.assertNumQueries(SETTING_GET_QUERIES):
+            response = self.client.get('/api/v1/setting/')
+        self.assertEqual(response.json()['data']['id'], self.user.id)
+
+    def test_put(self):
+        with self.assertNumQueries(SETTING_PUT_QUERIES):
+            response = self.client.put('/api/v1/setting/', {'ebay_dev_id': 'dev'}, format='json')
+        self.assertEqual(response.json()['data']['ebay_dev_id'], 'dev')
+
+@isolated_cache
+class EbayQueryBudgetTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='ebay', password='password')
+        Setting.objects.create(
+            id=cls.user, ebay_client_id='client', ebay_client_secret='secret',
+            ebay_dev_id='dev', ebay_auth_token='token',
+        )
+        EbayListing.objects.bulk_create([
+            EbayListing(user=cls.user, item_id=str(110000000000 + i), title=f'Item {i}',
+                        current_price=Decimal('100.00'), currency='USD', quantity=1)
+            for i in range(50)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_listings(self):
+        with self.assertNumQueries(EBAY_LISTING_QUERIES):
+            response = self.client.get('/api/v1/ebay/listings/')
+        self.assertEqual(len(response.json()['data']), 50)
+
+    def test_upsert(self):
+        service = EbayInventoryService(user_id=self.user.id)
+        items = [
+            {'item_id': str(110000000000 + i), 'title': f'Item {i}', 'current_price': Decimal('120.00')}
+            for i in range(25, 100)
+        ]
+        with self.assertNumQueries(EBAY_UPSERT_QUERIES):
+            created, updated = service._upsert(items, timezone.now())
+        self.assertEqual((created, updated), (50, 25))
+
+    def test_reprice_dry_run(self):
+        changes = [{'item_id': str(110000000000 + i), 'price': '150.00'} for i in range(50)]
+        with self.assertNumQueries(EBAY_REPRICE_DRY_RUN_QUERIES):
+            result = EbayRepricingService(user_id=self.user.id).reprice(changes, dry_run=True)
+        self.assertEqual(len(result['applied']), 50)
@@ -0,0 +1,80 @@
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from api.models.master import Service, Countries, Shipping
+from api.services.quote_cache import QuoteCache, quote_cache
+from api.services.rate_card import rate_card_index
+from api.services.shipping_calculator import ShippingCalculator
+from .utils import isolated_cache
+
+class QuoteCacheTest(SimpleTestCase):
+
+    def test_lru_eviction(self):
+        entries = QuoteCache(2)
+        entries.set('a', 1, {'value': 'a'})
+        entries.set('b', 1, {'value': 'b'})
+        # 参照したエントリは最近使ったものとして残る
+        self.assertEqual(entries.get('a', 1), {'value': 'a'})
+        entries.set('c', 1, {'value': 'c'})
+        self.assertIsNone(entries.get('b', 1))
+        self.assertEqual(entries.get('a', 1), {'value': 'a'})
+        self.assertEqual(entries.get('c', 1), {'value': 'c'})
+        self.assertEqual(entries.stats()['size'], 2)
+        self.assertEqual(entries.stats()['evictions'], 1)
+
+    def test_version_change_misses(self):
+        entries = QuoteCache(10)
+        entries.set('a', 1, {'value': 'a'})
+        self.assertIsNone(entries.get('a', 2))
+        # 古いバージョンの結果は戻っても使わない
+        self.assertIsNone(entries.get('a', 1))
+        stats = entries.stats()
+        self.assertEqual((stats['size'], stats['invalidations'], stats['rate_card_version']), (0, 1, 1))
+
+    def test_disabled(self):
+        entries = QuoteCache(0)
+        entries.set('a', 1, {'value': 'a'})
+        self.assertIsNone(entries.get('a', 1))
+
+@isolated_cache
+class ShippingQuoteCacheTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.service = Service.objects.create(service_name='Service')
+        Countries.objects.create(
+            country_code='US', country_name='US', country_name_jp='US', zone='A', service=cls.service,
+        )
+        Shipping.objects.bulk_create([
+            Shipping(service=cls.service, zone='A', weight=weight, basic_price=Decimal(1000 * weight))
+            for weight in range(1, 6)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        quote_cache.clear()
+        quote_cache.reset_stats()
+        rate_card_index.bump_version()
+
+    def quote(self, weight):
+        return ShippingCalculator(self.service.id).calculate_shipping_cost('US', 10, 10, 10, weight)['data']
+
+    def test_ceil_weight_shares_entry(self):
+        first = self.quote(2.1)
+        second = self.quote(2.7)
+        self.assertEqual(quote_cache.stats()['hits'], 1)
+        self.assertEqual(second['weight_range'], first['weight_range'])
+        self.assertEqual(second['total_amount'], first['total_amount'])
+        # 料金は同じでも実際に使った重量はそれぞれの値を返す
+        self.assertEqual((first['weight_used'], second['weight_used']), (2.1, 2.7))
+
+        self.quote(3.1)
+        self.assertEqual(quote_cache.stats()['hits'], 1)
+
+    def test_rate_card_change_misses(self):
+        self.assertEqual(self.quote(2)['weight_range'], 2.0)
+        Shipping.objects.filter(weight=2).update(basic_price=Decimal('9999'))
+        rate_card_index.bump_version()
+        data = self.quote(2)
+        self.assertEqual(quote_cache.stats()['hits'], 0)
+        self.assertEqual(data['base_rate'], 9999.0)
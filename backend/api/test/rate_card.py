@@ -0,0 +1,43 @@
+from datetime import date
+from decimal import Decimal
+from django.test import SimpleTestCase
+from api.services.rate_card import SurchargeEntry, SurchargeSchedule
+
+def surcharge(surcharge_type, start_date, end_date=None):
+    return SurchargeEntry(
+        surcharge_type=surcharge_type, rate=Decimal('10.00'), fixed_amount=None,
+        start_date=start_date, end_date=end_date,
+    )
+
+class SurchargeScheduleTest(SimpleTestCase):
+
+    def active(self, schedule, ship_date):
+        return [entry.surcharge_type for entry in schedule.active_on(ship_date)]
+
+    def test_inclusive_end_date(self):
+        schedule = SurchargeSchedule.build([surcharge('PEAK', date(2024, 1, 1), date(2024, 1, 31))])
+        self.assertEqual(self.active(schedule, date(2024, 1, 1)), ['PEAK'])
+        self.assertEqual(self.active(schedule, date(2024, 1, 31)), ['PEAK'])
+        self.assertEqual(self.active(schedule, date(2024, 2, 1)), [])
+
+    def test_open_ended(self):
+        schedule = SurchargeSchedule.build([surcharge('FUEL', date(2024, 1, 1))])
+        self.assertEqual(schedule.boundaries, [date(2024, 1, 1)])
+        self.assertEqual(self.active(schedule, date(2099, 12, 31)), ['FUEL'])
+
+    def test_overlapping_ranges(self):
+        schedule = SurchargeSchedule.build([
+            surcharge('FUEL', date(2024, 1, 1)),
+            surcharge('PEAK', date(2024, 1, 10), date(2024, 1, 20)),
+            surcharge('HOLIDAY', date(2024, 1, 15), date(2024, 1, 25)),
+        ])
+        self.assertEqual(self.active(schedule, date(2024, 1, 9)), ['FUEL'])
+        self.assertEqual(self.active(schedule, date(2024, 1, 15)), ['FUEL', 'PEAK', 'HOLIDAY'])
+        self.assertEqual(self.active(schedule, date(2024, 1, 20)), ['FUEL', 'PEAK', 'HOLIDAY'])
+        self.assertEqual(self.active(schedule, date(2024, 1, 21)), ['FUEL', 'HOLIDAY'])
+        self.assertEqual(self.active(schedule, date(2024, 1, 26)), ['FUEL'])
+
+    def test_before_first_boundary(self):
+        schedule = SurchargeSchedule.build([surcharge('FUEL', date(2024, 1, 1), date(2024, 1, 31))])
+        self.assertEqual(self.active(schedule, date(2023, 12, 31)), [])
+        self.assertEqual(self.active(SurchargeSchedule.build([]), date(2024, 1, 1)), [])
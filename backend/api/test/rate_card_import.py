@@ -0,0 +1,93 @@
+from decimal import Decimal
+from unittest import mock
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from api.models.master import Service, Countries, Shipping, ShippingRateCard, ShippingSurcharge
+from api.services.rate_card import rate_card_index
+from api.services.rate_card_import import RateCardImporter
+from .utils import isolated_cache
+
+def rates(base):
+    return [
+        {'zone': zone, 'weight': str(weight), 'basic_price': str(base + weight * 100)}
+        for zone in 'AB' for weight in (1, 2, 3)
+    ]
+
+COUNTRIES = [{'country_code': 'us', 'country_name': 'United States', 'country_name_jp': 'アメリカ', 'zone': 'a'}]
+SURCHARGES = [{'surcharge_type': 'fuel', 'rate': '10', 'fixed_amount': '', 'start_date': '2024-01-01', 'end_date': ''}]
+
+@isolated_cache
+class RateCardImporterTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.service = Service.objects.create(service_name='Service')
+
+    def setUp(self):
+        cache.clear()
+        rate_card_index.bump_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.report = RateCardImporter(self.service.id).run(rates(1000), COUNTRIES, SURCHARGES, source='v1.csv')
+
+    def import_card(self, base, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return RateCardImporter(self.service.id).run(rates(base), **kwargs)
+
+    def snapshot(self):
+        return (
+            list(ShippingRateCard.objects.order_by('id').values_list('version', 'status')),
+            list(Shipping.objects.order_by('id').values_list('zone', 'weight', 'basic_price', 'rate_card_id')),
+            list(Countries.objects.values_list('country_code', 'zone')),
+            list(ShippingSurcharge.objects.values_list('surcharge_type', 'rate')),
+        )
+
+    def test_second_version_replaces_first(self):
+        self.assertEqual(self.report['version'], 1)
+        self.assertEqual(rate_card_index.get_card(self.service.id).zones['A'].prices[0], Decimal('1100'))
+
+        report = self.import_card(2000)
+        self.assertEqual((report['version'], report['rates']), (2, 6))
+        self.assertEqual(
+            list(ShippingRateCard.objects.order_by('version').values_list('status', flat=True)),
+            [ShippingRateCard.STATUS_RETIRED, ShippingRateCard.STATUS_ACTIVE],
+        )
+        card = rate_card_index.get_card(self.service.id)
+        self.assertEqual(card.zones['A'].weights, [1, 2, 3])
+        self.assertEqual(card.zones['A'].prices[0], Decimal('2100'))
+
+    def test_only_active_rows_are_served(self):
+        # 取り込み中の料金表の行は参照しない
+        loading = ShippingRateCard.objects.create(service=self.service, version=9)
+        Shipping.objects.create(service=self.service, rate_card=loading, zone='A', weight=1, basic_price=Decimal('1'))
+        card = rate_card_index.get_card(self.service.id)
+        self.assertEqual(card.zones['A'].prices[0], Decimal('1100'))
+        self.assertEqual(card.countries, {'US': 'A'})
+
+    def test_dry_run_leaves_db_unchanged(self):
+        before = self.snapshot()
+        report = self.import_card(2000, countries=COUNTRIES, dry_run=True)
+        self.assertTrue(report['dry_run'])
+        self.assertEqual(report['version'], 2)
+        self.assertEqual(self.snapshot(), before)
+
+    def test_error_in_later_chunk_rolls_back(self):
+        before = self.snapshot()
+        rows = rates(2000)
+        rows[-1]['basic_price'] = 'abc'
+        with mock.patch.object(RateCardImporter, 'CHUNK_SIZE', 2), self.assertRaises(ValidationError) as raised:
+            RateCardImporter(self.service.id).run(rows, surcharges=[])
+        self.assertEqual(raised.exception.messages, ['rates 7行目: 値が不正です'])
+        self.assertEqual(self.snapshot(), before)
+
+    def test_invalidation_deferred_until_commit(self):
+        version = cache.get(rate_card_index.VERSION_KEY)
+        with mock.patch.object(rate_card_index, 'bump_version', wraps=rate_card_index.bump_version) as bump_version:
+            with self.captureOnCommitCallbacks() as callbacks:
+                RateCardImporter(self.service.id).run(rates(2000), COUNTRIES, SURCHARGES)
+            # 行ごとのシグナルではバージョンを上げない
+            bump_version.assert_not_called()
+            for callback in callbacks:
+                callback()
+        bump_version.assert_called_once_with()
+        self.assertEqual(cache.get(rate_card_index.VERSION_KEY), version + 1)
@@ -0,0 +1,6 @@
+from django.test import override_settings
+
+# テストでは設定済みの共有キャッシュ（開発・本番のプロセスと共有するファイルなど）を使わない
+isolated_cache = override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'api-test'},
+})
@@ -1,11 +1,22 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.authtoken import views as token_views
 from .views.user import UserListCreateAPIView, UserDetailAPIView
 from .views.setting import SettingAPIView
-from .views.product_data import ProductDataAPIView
-from .views.scraping import YahooAuctionItemSearchView, YahooAuctionCategorySearchView
-from .views.shipping_calculator import ShippingCalculatorView
-from .views.ebay import EbayRegisterView
+from .views.product_data import ProductDataAPIView, ProductDataJobView
+from .views.scraping import YahooAuctionItemSearchView, AsyncYahooAuctionItemSearchView, YahooAuctionCategorySearchView
+from .views.shipping_calculator import ShippingCalculatorView, ShippingCalculatorBatchView, ShippingCalculatorCompareView, ShippingConsolidationView, ShippingRateCardView, ShippingQuoteCacheView
+from .views.metrics import ApiMetricsView, CacheStatsView
+from .views.currency import CurrencyConvertView, AsyncCurrencyConvertView, CurrencyHistoryView
+from .views.profit import ProfitCalculatorView
+from .views.pipeline import ListingPipelineView
+from .views.ebay import EbayRegisterView, AsyncEbayRegisterView, EbayItemView, EbayListingView, EbayInventorySyncView, EbayRepriceView
+
+# ASGIサーバーで動かす場合は外部APIを呼ぶビューを非同期版にする
+if getattr(settings, 'ASYNC_VIEWS_ENABLED', False):
+    ItemSearchView, RegisterView, ConvertView = AsyncYahooAuctionItemSearchView, AsyncEbayRegisterView, AsyncCurrencyConvertView
+else:
+    ItemSearchView, RegisterView, ConvertView = YahooAuctionItemSearchView, EbayRegisterView, CurrencyConvertView
 
 urlpatterns = [
     path('token/', token_views.obtain_auth_token),  # ログイン用エンドポイント
@@ -13,8 +24,26 @@ urlpatterns = [
     path('users/<int:pk>/', UserDetailAPIView.as_view(), name='user-detail'),
     path('setting/', SettingAPIView.as_view(), name='setting'),
     path('product-register/', ProductDataAPIView.as_view(), name='product-register'),
-    path('search/yahoo-auction/items/', YahooAuctionItemSearchView.as_view(), name='yahoo-auction-item-search'),
+    path('product-register/jobs/<str:job_id>/', ProductDataJobView.as_view(), name='product-register-job'),
+    path('search/yahoo-auction/items/', ItemSearchView.as_view(), name='yahoo-auction-item-search'),
     path('search/yahoo-auction/categories/', YahooAuctionCategorySearchView.as_view(), name='yahoo-auction-category-search'),
     path('shipping-calculator/', ShippingCalculatorView.as_view(), name='shipping-calculator'),
-    path('ebay/register/', EbayRegisterView.as_view(), name='ebay-register'),
+    path('shipping-calculator/batch/', ShippingCalculatorBatchView.as_view(), name='shipping-calculator-batch'),
+    path('shipping-calculator/compare/', ShippingCalculatorCompareView.as_view(), name='shipping-calculator-compare'),
+    path('shipping-calculator/consolidate/', ShippingConsolidationView.as_view(), name='shipping-consolidate'),
+    path('shipping-calculator/rate-cards/', ShippingRateCardView.as_view(), name='shipping-rate-cards'),
+    path('shipping-calculator/cache-stats/', ShippingQuoteCacheView.as_view(), name='shipping-quote-cache-stats'),
+    path('ebay/register/', RegisterView.as_view(), name='ebay-register'),
+    path('ebay/items/', EbayItemView.as_view(), name='ebay-item-list'),
+    path('ebay/reprice/', EbayRepriceView.as_view(), name='ebay-reprice'),
+    path('ebay/listings/', EbayListingView.as_view(), name='ebay-listing-list'),
+    path('ebay/listings/sync/', EbayInventorySyncView.as_view(), name='ebay-listing-sync'),
+    path('ebay/listings/<str:item_id>/', EbayListingView.as_view(), name='ebay-listing-detail'),
+    path('currency/convert/', ConvertView.as_view(), name='currency-convert'),
+    path('currency/history/', CurrencyHistoryView.as_view(), name='currency-history'),
+    path('profit/calculate/', ProfitCalculatorView.as_view(), name='profit-calculate'),
+    path('listing-pipeline/', ListingPipelineView.as_view(), name='listing-pipeline-list'),
+    path('listing-pipeline/<str:pipeline_id>/', ListingPipelineView.as_view(), name='listing-pipeline-detail'),
+    path('metrics/api/', ApiMetricsView.as_view(), name='api-metrics'),
+    path('metrics/cache/', CacheStatsView.as_view(), name='cache-metrics'),
 ] 
\ No newline at end of file
@@ -1,6 +1,6 @@
 # api/views/__init__.py
 from .user import UserListCreateAPIView, UserDetailAPIView
 from .setting import SettingAPIView
-from .product_data import ProductDataAPIView
+from .product_data import ProductDataAPIView, ProductDataJobView
 from .scraping import YahooAuctionItemSearchView, YahooAuctionCategorySearchView
-from .shipping_calculator import ShippingCalculatorView
+from .shipping_calculator import ShippingCalculatorView, ShippingCalculatorBatchView, ShippingCalculatorCompareView, ShippingConsolidationView, ShippingRateCardView, ShippingQuoteCacheView
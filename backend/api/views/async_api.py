@@ -0,0 +1,67 @@
+from django.http import JsonResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated, ParseError
+from rest_framework.utils.encoders import JSONEncoder
+import json
+from typing import Any, Dict, Optional
+
+class AsyncAPIView(View):
+    """
+    ASGIで動かす非同期のビューの基底クラス（DRFのAPIViewは非同期のハンドラーに対応していないため）
+
+    DRFのTokenAuthenticationと同じ'Authorization: Token <key>'ヘッダーで認証し、
+    レスポンスはDRFと同じエンコーダーでJSONにする。
+    """
+    authentication_required = False
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        # APIViewと同じくCSRFの確認は行わない（トークン認証のため）
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        if self.authentication_required:
+            header = request.headers.get('Authorization', '').split()
+            if not header or header[0].lower() != 'token':
+                return self._unauthorized(NotAuthenticated.default_detail)
+            user = await self._authenticate(header[1] if len(header) == 2 else '')
+            if user is None:
+                return self._unauthorized(AuthenticationFailed.default_detail)
+            request.user = user
+        return await super().dispatch(request, *args, **kwargs)
+
+    @staticmethod
+    async def _authenticate(key: str):
+        try:
+            token = await Token.objects.select_related('user').aget(key=key)
+        except Token.DoesNotExist:
+            return None
+        return token.user if token.user.is_active else None
+
+    def _unauthorized(self, detail: str) -> JsonResponse:
+        response = self.respond({'detail': str(detail)}, status.HTTP_401_UNAUTHORIZED)
+        response['WWW-Authenticate'] = 'Token'
+        return response
+
+    @staticmethod
+    def parse_json(request) -> Optional[Dict[str, Any]]:
+        """リクエストボディのJSON（オブジェクトでない場合はNone）"""
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+
+    def bad_json(self) -> JsonResponse:
+        return self.respond({'detail': str(ParseError.default_detail)}, status.HTTP_400_BAD_REQUEST)
+
+    @staticmethod
+    def respond(data: Optional[Dict[str, Any]], status_code: int = status.HTTP_200_OK) -> JsonResponse:
+        return JsonResponse(
+            data, status=status_code, encoder=JSONEncoder, safe=False,
+            json_dumps_params={'ensure_ascii': False}
+        )
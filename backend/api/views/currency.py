@@ -0,0 +1,169 @@
+from django.core.exceptions import ValidationError
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from ..services.currency import CurrencyService
+from ..services.currency_history import ExchangeRateHistoryService
+from .async_api import AsyncAPIView
+import logging
+from datetime import datetime, time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class CurrencyConvertView(APIView):
+    permission_classes = [IsAuthenticated]
+    MAX_AMOUNTS = 1000
+
+    def post(self, request):
+        """複数の金額をまとめて通貨換算するエンドポイント"""
+        try:
+            amounts, from_currency, to_currency, decimal_places = self.parse_request(request.data)
+        except ValidationError as e:
+            return Response({
+                'success': False,
+                'message': ' '.join(e.messages)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            quote = CurrencyService.get_rate_quote(from_currency, to_currency)
+            return Response({
+                'success': True,
+                'message': '通貨換算に成功しました',
+                'data': self.convert(quote, amounts, from_currency, to_currency, decimal_places)
+            })
+        except ValidationError as e:
+            return Response({
+                'success': False,
+                'message': ' '.join(e.messages)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Failed to convert amounts: {str(e)}")
+            return Response({
+                'success': False,
+                'message': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @classmethod
+    def parse_request(cls, data: Dict[str, Any]) -> Tuple[List[Any], str, str, int]:
+        """金額のリスト・変換元通貨・変換先通貨・小数点以下の桁数（不正な場合はValidationError）"""
+        amounts = data.get('amounts')
+        from_currency = str(data.get('from_currency', 'JPY')).upper()
+        to_currency = str(data.get('to_currency', 'USD')).upper()
+        if not isinstance(amounts, list) or not amounts or len(amounts) > cls.MAX_AMOUNTS:
+            raise ValidationError(f'金額は1〜{cls.MAX_AMOUNTS}件のリストで指定してください')
+
+        try:
+            decimal_places = int(data.get('decimal_places', 2))
+            if not 0 <= decimal_places <= 6:
+                raise ValueError(decimal_places)
+        except (TypeError, ValueError):
+            raise ValidationError('小数点以下の桁数が不正です')
+        return amounts, from_currency, to_currency, decimal_places
+
+    @staticmethod
+    def convert(quote: Dict[str, Any], amounts: List[Any], from_currency: str, to_currency: str,
+                decimal_places: int) -> Dict[str, Any]:
+        converted = CurrencyService.convert_amounts(
+            amounts, from_currency, to_currency, decimal_places, rate=quote['rate']
+        )
+        return {
+            'from_currency': from_currency,
+            'to_currency': to_currency,
+            'rate': quote['rate'],
+            'as_of': quote['as_of'],
+            'stale': quote['stale'],
+            'source': quote['source'],
+            'amounts': converted,
+        }
+
+class AsyncCurrencyConvertView(AsyncAPIView):
+    """通貨換算（非同期版。ASGIで動かす場合に使う）"""
+    authentication_required = True
+
+    async def post(self, request):
+        data = self.parse_json(request)
+        if data is None:
+            return self.bad_json()
+        try:
+            amounts, from_currency, to_currency, decimal_places = CurrencyConvertView.parse_request(data)
+            quote = await CurrencyService.async_get_rate_quote(from_currency, to_currency)
+            return self.respond({
+                'success': True,
+                'message': '通貨換算に成功しました',
+                'data': CurrencyConvertView.convert(quote, amounts, from_currency, to_currency, decimal_places)
+            })
+        except ValidationError as e:
+            return self.respond({
+                'success': False,
+                'message': ' '.join(e.messages)
+            }, status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Failed to convert amounts: {str(e)}")
+            return self.respond({
+                'success': False,
+                'message': str(e)
+            }, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class CurrencyHistoryView(APIView):
+    permission_classes = [IsAuthenticated]
+    MAX_DATES = 366
+
+    def get(self, request):
+        """
+        指定日時に適用されていた為替レートを取得するエンドポイント
+
+        datesはカンマ区切りの日付または日時。日付のみの場合はその日の終わりのレートを返す。
+        """
+        from_currency = request.query_params.get('from_currency', 'JPY').upper()
+        to_currency = request.query_params.get('to_currency', 'USD').upper()
+        values = [value for value in request.query_params.get('dates', '').split(',') if value]
+        moments = [self._parse_moment(value) for value in values]
+        if not moments or len(moments) > self.MAX_DATES or None in moments:
+            return Response({
+                'success': False,
+                'message': f'日付は1〜{self.MAX_DATES}件をカンマ区切りで指定してください'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            results = ExchangeRateHistoryService.get_rates_as_of(from_currency, to_currency, moments)
+            return Response({
+                'success': True,
+                'message': '為替レートの履歴の取得に成功しました',
+                'data': {
+                    'from_currency': from_currency,
+                    'to_currency': to_currency,
+                    'rates': [{'date': value, **result} for value, result in zip(values, results)],
+                }
+            })
+        except ValidationError as e:
+            return Response({
+                'success': False,
+                'message': ' '.join(e.messages)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Failed to get exchange rate history: {str(e)}")
+            return Response({
+                'success': False,
+                'message': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @staticmethod
+    def _parse_moment(value: str) -> Optional[datetime]:
+        try:
+            # parse_datetimeは日付のみの値も0時として受け付けるため先に日付として解析する
+            date = parse_date(value)
+            if date is not None:
+                moment = datetime.combine(date, time.max)
+            else:
+                moment = parse_datetime(value)
+                if moment is None:
+                    return None
+        except ValueError:
+            return None
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
@@ -2,7 +2,12 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
+from ..models import EbayListing
 from ..services.ebay import EbayService
+from ..services.ebay_inventory import EbayInventoryService
+from ..services.ebay_repricing import EbayRepricingService
+from .async_api import AsyncAPIView
+from asgiref.sync import sync_to_async
 import logging
 
 logger = logging.getLogger(__name__)
@@ -29,4 +34,153 @@ class EbayRegisterView(APIView):
                 'success': False,
                 'message': 'Failed to register product on eBay',
                 'error': str(e)
-            }, status=status.HTTP_400_BAD_REQUEST) 
\ No newline at end of file
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+class AsyncEbayRegisterView(AsyncAPIView):
+    """商品登録（非同期版。ASGIで動かす場合に使う）"""
+    authentication_required = True
+
+    async def post(self, request):
+        """商品をeBayに登録するエンドポイント"""
+        product_data = self.parse_json(request)
+        if product_data is None:
+            return self.bad_json()
+        try:
+            # 認証情報の読み込みはDBを使うため同期処理として実行する
+            ebay_service = await sync_to_async(EbayService)(user_id=request.user.id)
+            result = await ebay_service.async_register_product(product_data)
+
+            return self.respond({
+                'success': True,
+                'message': 'Successfully registered product on eBay',
+                'data': result
+            })
+
+        except Exception as e:
+            logger.error(f"Failed to register product on eBay: {str(e)}")
+            return self.respond({
+                'success': False,
+                'message': 'Failed to register product on eBay',
+                'error': str(e)
+            }, status.HTTP_400_BAD_REQUEST)
+
+class EbayItemView(APIView):
+    permission_classes = [IsAuthenticated]
+    MAX_ITEM_IDS = 100
+
+    def get(self, request):
+        """複数の商品情報をeBayからまとめて取得するエンドポイント"""
+        item_ids = [item_id for item_id in request.query_params.get('ids', '').split(',') if item_id]
+        if not item_ids or len(item_ids) > self.MAX_ITEM_IDS:
+            return Response({
+                'success': False,
+                'message': f'Specify between 1 and {self.MAX_ITEM_IDS} item IDs'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            ebay_service = EbayService(user_id=request.user.id)
+            result = ebay_service.get_items(item_ids)
+
+            return Response({
+                'success': True,
+                'message': 'Successfully retrieved items from eBay',
+                'data': result
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            logger.error(f"Failed to get items from eBay: {str(e)}")
+            return Response({
+                'success': False,
+                'message': 'Failed to get items from eBay',
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+class EbayListingView(APIView):
+    permission_classes = [IsAuthenticated]
+    FIELDS = (
+        'item_id', 'title', 'listing_status', 'current_price', 'currency',
+        'quantity', 'quantity_sold', 'view_item_url', 'end_time', 'synced_at',
+    )
+
+    def get(self, request, item_id=None):
+        """ローカルの出品テーブルから出品状況を取得するエンドポイント"""
+        listings = EbayListing.objects.filter(user_id=request.user.id)
+        if item_id is not None:
+            listing = listings.filter(item_id=item_id).values(*self.FIELDS).first()
+            if listing is None:
+                return Response({
+                    'success': False,
+                    'message': 'Listing not found'
+                }, status=status.HTTP_404_NOT_FOUND)
+            return Response({
+                'success': True,
+                'message': 'Successfully retrieved listing',
+                'data': self._format(listing)
+            }, status=status.HTTP_200_OK)
+
+        listing_status = request.query_params.get('status')
+        if listing_status:
+            listings = listings.filter(listing_status=listing_status)
+        return Response({
+            'success': True,
+            'message': 'Successfully retrieved listings',
+            'data': [self._format(listing) for listing in listings.order_by('-id').values(*self.FIELDS)]
+        }, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def _format(listing):
+        listing['quantity_available'] = max(listing['quantity'] - listing['quantity_sold'], 0)
+        return listing
+
+class EbayInventorySyncView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """eBayの出品一覧をローカルテーブルに同期するエンドポイント"""
+        try:
+            inventory_service = EbayInventoryService(user_id=request.user.id)
+            result = inventory_service.sync(full=str(request.data.get('full', '')).lower() in ('1', 'true'))
+
+            return Response({
+                'success': True,
+                'message': 'Successfully synchronized eBay listings',
+                'data': result
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            logger.error(f"Failed to synchronize eBay listings: {str(e)}")
+            return Response({
+                'success': False,
+                'message': 'Failed to synchronize eBay listings',
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+class EbayRepriceView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """出品中の商品の価格・在庫数をまとめて更新するエンドポイント"""
+        changes = request.data.get('changes')
+        if not isinstance(changes, list) or not changes:
+            return Response({
+                'success': False,
+                'message': 'changes must be a non-empty list'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            repricing_service = EbayRepricingService(user_id=request.user.id)
+            result = repricing_service.reprice(changes, dry_run=str(request.data.get('dry_run', '')).lower() in ('1', 'true'))
+
+            return Response({
+                'success': True,
+                'message': 'Successfully repriced eBay listings',
+                'data': result
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            logger.error(f"Failed to reprice eBay listings: {str(e)}")
+            return Response({
+                'success': False,
+                'message': 'Failed to reprice eBay listings',
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
@@ -0,0 +1,49 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from ..services.metrics import api_metrics
+from ..services.ebay_scheduler import scheduler
+from ..services.layered_cache import get_cache_stats
+
+class ApiMetricsView(APIView):
+    """
+    外部API呼び出しの計測結果（このプロセスで集計したもの）
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({
+            'success': True,
+            'message': 'メトリクスの取得に成功しました',
+            'data': {
+                'calls': api_metrics.snapshot(),
+                'ebay_circuit_state': scheduler.circuit_breaker.state,
+            }
+        })
+
+    def delete(self, request):
+        """集計結果をリセット"""
+        api_metrics.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class CacheStatsView(APIView):
+    """
+    キャッシュの名前空間ごとのヒット・ミスの集計（このプロセスで集計したもの）
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        stats = get_cache_stats()
+        return Response({
+            'success': True,
+            'message': 'キャッシュの集計の取得に成功しました',
+            'data': stats.snapshot() if stats is not None else None,
+        })
+
+    def delete(self, request):
+        """集計結果をリセット"""
+        stats = get_cache_stats()
+        if stats is not None:
+            stats.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,104 @@
+from django.core.exceptions import ValidationError
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from ..models.master import Service
+from ..services.listing_pipeline import ListingPipeline, pipeline_registry
+from .shipping_calculator import parse_ship_date
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ListingPipelineView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pipeline_id=None):
+        """パイプラインの進捗・段ごとの統計・結果を取得するエンドポイント"""
+        if pipeline_id is None:
+            return Response({
+                'success': True,
+                'message': 'パイプラインの一覧の取得に成功しました',
+                'data': [
+                    {key: value for key, value in snapshot.items() if key != 'results'}
+                    for snapshot in pipeline_registry.list(request.user.id)
+                ]
+            })
+
+        snapshot = pipeline_registry.snapshot(pipeline_id, request.user.id)
+        if snapshot is None:
+            return Response({
+                'success': False,
+                'message': 'パイプラインが見つかりません'
+            }, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            'success': True,
+            'message': 'パイプラインの取得に成功しました',
+            'data': snapshot
+        })
+
+    def post(self, request):
+        """検索から出品までのパイプラインをバックグラウンドで開始するエンドポイント"""
+        search = request.data.get('search')
+        listing = request.data.get('listing')
+        package = request.data.get('package')
+        concurrency = request.data.get('concurrency')
+        if not isinstance(search, dict) or not search.get('p') or not isinstance(listing, dict) \
+                or not isinstance(package, dict) or not request.data.get('service_id') \
+                or not request.data.get('country_code') or (concurrency is not None and not isinstance(concurrency, dict)):
+            return Response({
+                'success': False,
+                'message': '必須パラメータが不足しています'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            pipeline = ListingPipeline(
+                user_id=request.user.id,
+                search_params=search,
+                listing=listing,
+                service_id=request.data['service_id'],
+                country_code=request.data['country_code'],
+                package=package,
+                ship_date=parse_ship_date(request.data.get('ship_date')),
+                max_items=request.data.get('max_items'),
+                dry_run=str(request.data.get('dry_run', '')).lower() in ('1', 'true'),
+                concurrency={name: value for name, value in (concurrency or {}).items() if name in ListingPipeline.STAGES},
+                queue_size=request.data.get('queue_size'),
+            )
+            pipeline_registry.start(pipeline)
+            return Response({
+                'success': True,
+                'message': 'パイプラインを開始しました',
+                'data': pipeline.snapshot()
+            }, status=status.HTTP_202_ACCEPTED)
+        except (ValidationError, Service.DoesNotExist) as e:
+            message = ' '.join(e.messages) if isinstance(e, ValidationError) else str(e)
+            return Response({
+                'success': False,
+                'message': message
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except (ValueError, TypeError) as e:
+            return Response({
+                'success': False,
+                'message': f'入力値が不正です: {str(e)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Failed to start listing pipeline: {str(e)}")
+            return Response({
+                'success': False,
+                'message': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def delete(self, request, pipeline_id=None):
+        """実行中のパイプラインを停止するエンドポイント"""
+        snapshot = pipeline_registry.cancel(pipeline_id, request.user.id) if pipeline_id else None
+        if snapshot is None:
+            return Response({
+                'success': False,
+                'message': 'パイプラインが見つかりません'
+            }, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            'success': True,
+            'message': 'パイプラインの停止を受け付けました',
+            'data': {key: value for key, value in snapshot.items() if key != 'results'}
+        })
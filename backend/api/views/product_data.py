@@ -1,31 +1,40 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from ..services.product_data import ProductDataService, product_data_jobs
+from ..services.scraping.yahoo_auction import YahooAuctionService
+from ..services.structured_log import SampledLogger
 import logging
+import time
 
 logger = logging.getLogger(__name__)
+# リクエストごとのログは一部のみ出力する（エラーは常に出力）
+event_logger = SampledLogger(logger, float(getattr(settings, 'PRODUCT_DATA_LOG_SAMPLE_RATE', 0.01)))
 
 class ProductDataAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+    # 取得がこの秒数以内に終わらない場合はジョブIDを返す
+    SYNC_WAIT_SECONDS = float(getattr(settings, 'PRODUCT_DATA_SYNC_WAIT', 2))
+
     def post(self, request):
         """
         商品データの取得リクエストを作成
+
+        キャッシュ済みの商品はすぐに返す。それ以外は商品ページの取得をバックグラウンドで開始し、
+        SYNC_WAIT_SECONDS以内に終われば結果を、終わらなければジョブID（202）を返す。
         """
+        started_at = time.monotonic()
         try:
-            # リクエストの内容をログ出力
-            logger.info("リクエスト受信:")
-            logger.info(f"Request Data: {request.data}")
-            logger.info(f"Request Headers: {request.headers}")
-
             source = request.data.get('source')
             url = request.data.get('url')
             category_id = request.data.get('categoryId')
 
-            # 受け取ったパラメータの値をログ出力
-            logger.info(f"Received parameters - source: {source}, url: {url}, category_id: {category_id}")
-
             # バリデーション
             if not all([source, url, category_id]):
-                logger.warning("必須パラメータ不足")
+                event_logger.info('product_data.rejected', reason='missing_parameters', source=source)
                 return Response(
                     {'message': '必須パラメータが不足しています'},
                     status=status.HTTP_400_BAD_REQUEST
@@ -33,30 +42,95 @@ class ProductDataAPIView(APIView):
 
             # ヤフオクの場合の処理
             if source == 'yahoo_auction':
-                logger.info("ヤフオクのリクエストを処理中")
-                
-                # 仮のレスポンス
-                response_data = {
+                url = str(url).strip()
+                # ヤフオクの商品URL以外はジョブを開始しない
+                if not YahooAuctionService.ITEM_URL_PATTERN.match(url):
+                    event_logger.info('product_data.rejected', reason='invalid_url', source=source)
+                    return Response(
+                        {'message': 'ヤフオクの商品URLではありません'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                data = {'url': url, 'categoryId': category_id, 'source': source}
+
+                item = ProductDataService.get_cached(url)
+                if item is not None:
+                    self._log(started_at, source, 'cached')
+                    return Response({
+                        'success': True,
+                        'message': 'データの取得に成功しました',
+                        'data': {**data, 'item': item, 'cached': True}
+                    })
+
+                job = product_data_jobs.submit(url)
+                job = product_data_jobs.wait(job['id'], self.SYNC_WAIT_SECONDS) or job
+                if job['status'] == product_data_jobs.STATUS_COMPLETED:
+                    self._log(started_at, source, 'fetched')
+                    return Response({
+                        'success': True,
+                        'message': 'データの取得に成功しました',
+                        'data': {**data, 'item': job['result'], 'cached': False}
+                    })
+                if job['status'] == product_data_jobs.STATUS_FAILED:
+                    event_logger.warning('product_data.failed', source=source, url=url, error=job['error'])
+                    return Response(
+                        {'message': f"商品データの取得に失敗しました: {job['error']}"},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+
+                self._log(started_at, source, 'accepted')
+                return Response({
                     'success': True,
                     'message': 'リクエストを受け付けました',
-                    'data': {
-                        'url': url,
-                        'categoryId': category_id,
-                        'source': source
-                    }
-                }
-                logger.info(f"レスポンス送信: {response_data}")
-                return Response(response_data)
+                    'data': {**data, 'job_id': job['id'], 'status': job['status']}
+                }, status=status.HTTP_202_ACCEPTED)
             else:
-                logger.warning(f"未対応の仕入れ元: {source}")
+                event_logger.info('product_data.rejected', reason='unsupported_source', source=source)
                 return Response(
                     {'message': '未対応の仕入れ元です'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
+        except ValidationError as e:
+            event_logger.warning('product_data.rejected', reason='busy', error=' '.join(e.messages))
+            return Response(
+                {'message': ' '.join(e.messages)},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
         except Exception as e:
-            logger.error(f"エラー発生: {str(e)}", exc_info=True)
+            event_logger.error('product_data.error', exc_info=True, error=str(e))
             return Response(
                 {'message': f'予期せぬエラーが発生しました: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            ) 
\ No newline at end of file
+            )
+
+    @staticmethod
+    def _log(started_at: float, source: str, outcome: str) -> None:
+        event_logger.info(
+            'product_data.request',
+            source=source,
+            outcome=outcome,
+            duration_ms=round((time.monotonic() - started_at) * 1000, 1),
+        )
+
+class ProductDataJobView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        """商品データの取得ジョブの状態と結果を取得"""
+        job = product_data_jobs.get(job_id)
+        if job is None:
+            return Response(
+                {'message': 'ジョブが見つかりません'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response({
+            'success': True,
+            'message': 'データの取得に成功しました',
+            'data': {
+                'url': job['url'],
+                'job_id': job['id'],
+                'status': job['status'],
+                'item': job['result'],
+                'error': job['error'],
+            }
+        })
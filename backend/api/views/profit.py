@@ -0,0 +1,64 @@
+from django.core.exceptions import ValidationError
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from ..models.master import Service
+from ..services.profit_calculator import ProfitCalculator
+from .shipping_calculator import parse_ship_date
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ProfitCalculatorView(APIView):
+    permission_classes = [IsAuthenticated]
+    MAX_LISTINGS = 1000
+
+    def post(self, request):
+        """検索結果の商品の原価・販売価格・利益率をまとめて計算するエンドポイント"""
+        listings = request.data.get('items')
+        package = request.data.get('package') or {}
+        if not isinstance(listings, list) or not listings or len(listings) > self.MAX_LISTINGS:
+            return Response({
+                'success': False,
+                'message': f'商品は1〜{self.MAX_LISTINGS}件のリストで指定してください'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if not request.data.get('service_id') or not request.data.get('country_code') \
+                or not isinstance(package, dict) or not all(isinstance(listing, dict) for listing in listings):
+            return Response({
+                'success': False,
+                'message': '必要なパラメータが不足しています'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            calculator = ProfitCalculator(
+                request.data['service_id'],
+                request.data['country_code'],
+                parse_ship_date(request.data.get('ship_date')),
+                target_margin=request.data.get('target_margin'),
+                currency=str(request.data.get('currency', 'USD')).upper(),
+            )
+            use_buy_now = str(request.data.get('use_buy_now', '')).lower() in ('1', 'true')
+            result = calculator.calculate(listings, package, use_buy_now=use_buy_now)
+            return Response({
+                'success': True,
+                'message': '利益の計算に成功しました',
+                'data': result
+            })
+        except (ValidationError, Service.DoesNotExist) as e:
+            message = ' '.join(e.messages) if isinstance(e, ValidationError) else str(e)
+            return Response({
+                'success': False,
+                'message': message
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except (ValueError, TypeError) as e:
+            return Response({
+                'success': False,
+                'message': f'入力値が不正です: {str(e)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Failed to calculate profit: {str(e)}")
+            return Response({
+                'success': False,
+                'message': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -2,6 +2,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from ..services.scraping.yahoo_auction import YahooAuctionService
+from .async_api import AsyncAPIView
 import logging
 
 logger = logging.getLogger(__name__)
@@ -38,6 +39,37 @@ class YahooAuctionItemSearchView(APIView):
                 'message': '検索処理に失敗しました'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class AsyncYahooAuctionItemSearchView(AsyncAPIView):
+    """
+    ヤフオクの商品検索API（非同期版。ASGIで動かす場合に使う）
+    """
+    async def get(self, request):
+        try:
+            platform = request.GET.get('platform')
+            if platform and platform != 'yahoo':
+                return self.respond({
+                    'success': False,
+                    'message': f'未対応のプラットフォーム: {platform}'
+                }, status.HTTP_400_BAD_REQUEST)
+            service = YahooAuctionService()
+            result = await service.async_search_items(request.GET)
+            return self.respond({
+                'success': True,
+                'message': '検索が完了しました',
+                'data': result
+            })
+        except ValueError as e:
+            return self.respond({
+                'success': False,
+                'message': str(e)
+            }, status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"商品検索でエラーが発生: {str(e)}")
+            return self.respond({
+                'success': False,
+                'message': '検索処理に失敗しました'
+            }, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 class YahooAuctionCategorySearchView(APIView):
     """
     ヤフオクのカテゴリ検索API
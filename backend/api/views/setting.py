@@ -19,7 +19,7 @@ class SettingAPIView(APIView):
                 'success': True,
                 'message': '設定の取得に成功しました',
                 'data': {
-                    'id': setting.id.id,
+                    'id': setting.id_id,
                     'yahoo_client_id': setting.yahoo_client_id,
                     'yahoo_client_secret': setting.yahoo_client_secret,
                     'ebay_client_id': setting.ebay_client_id,
@@ -53,7 +53,7 @@ class SettingAPIView(APIView):
                 'success': True,
                 'message': '設定の更新に成功しました',
                 'data': {
-                    'id': setting.id.id,
+                    'id': setting.id_id,
                     'yahoo_client_id': setting.yahoo_client_id,
                     'yahoo_client_secret': setting.yahoo_client_secret,
                     'ebay_client_id': setting.ebay_client_id,
@@ -1,23 +1,45 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from api.services.shipping_calculator import ShippingCalculator
-from api.models.master import Service, Countries
+from api.services.package_consolidation import PackageConsolidator
+from api.services.quote_cache import quote_cache
+from api.services.master_data import master_data_cache
+from api.services.rate_card_import import RateCardImporter
+from api.models.master import Service, Countries, ShippingRateCard
+from django.core.exceptions import ValidationError
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from django.utils.dateparse import parse_date
+from datetime import date
+from typing import Optional
+import csv
+import io
+
+def parse_ship_date(value) -> Optional[date]:
+    """発送日（YYYY-MM-DD）を解析（未指定の場合はNone、不正な場合はValueError）"""
+    if not value:
+        return None
+    ship_date = parse_date(str(value))
+    if ship_date is None:
+        raise ValueError(f'発送日の形式が不正です: {value}')
+    return ship_date
 
 class ShippingCalculatorView(APIView):
     def get(self, request):
-        """利用可能なサービスと国のリストを取得"""
+        """利用可能なサービスと国のリストを取得（If-None-Matchが一致する場合は304）"""
         try:
-            services = Service.objects.all().values('id', 'service_name')
-            countries = Countries.objects.all().values('country_code', 'country_name', 'country_name_jp')
-            return Response({
-                'success': True,
-                'message': 'データの取得に成功しました',
-                'data': {
-                    'services': list(services),
-                    'countries': list(countries)
-                }
-            })
+            etag, body = master_data_cache.get()
+            # If-None-Matchは弱い比較で判定する
+            if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+            if '*' in if_none_match or etag in if_none_match or f"W/{etag}" in if_none_match:
+                response = HttpResponseNotModified()
+            else:
+                response = HttpResponse(body, content_type='application/json')
+            response['ETag'] = etag
+            response['Cache-Control'] = 'private, no-cache'
+            return response
         except Exception as e:
             return Response({
                 'success': False,
@@ -33,13 +55,14 @@ class ShippingCalculatorView(APIView):
             width = int(request.data.get('width', 0))
             height = int(request.data.get('height', 0))
             weight = float(request.data.get('weight', 0))
+            ship_date = parse_ship_date(request.data.get('ship_date'))
             # 入力値の検証
             if not all([service_id, country_code, length, width, height, weight]):
                 return Response({
                     'error': '必要なパラメータが不足しています'
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            calculator = ShippingCalculator(service_id)
+            calculator = ShippingCalculator(service_id, ship_date)
             result = calculator.calculate_shipping_cost(
                 country_code, length, width, height, weight
             )
@@ -58,4 +81,230 @@ class ShippingCalculatorView(APIView):
         except Exception as e:
             return Response({
                 'error': f'予期せぬエラーが発生しました: {str(e)}'
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR) 
\ No newline at end of file
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR) 
+class ShippingCalculatorBatchView(APIView):
+    MAX_PACKAGES = 1000
+
+    def post(self, request):
+        """複数の荷物の送料をまとめて計算（結果は入力と同じ順序）"""
+        try:
+            service_id = request.data.get('service_id')
+            packages = request.data.get('packages')
+            if not service_id or not isinstance(packages, list) or not packages:
+                return Response({
+                    'error': '必要なパラメータが不足しています'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            if len(packages) > self.MAX_PACKAGES:
+                return Response({
+                    'error': f'一度に計算できる荷物は{self.MAX_PACKAGES}件までです'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            if not all(isinstance(package, dict) for package in packages):
+                return Response({
+                    'error': '入力値が不正です'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            calculator = ShippingCalculator(service_id, parse_ship_date(request.data.get('ship_date')))
+            results = calculator.calculate_shipping_costs(packages)
+            return Response({
+                'success': True,
+                'message': 'データの取得に成功しました',
+                'data': {
+                    'results': results,
+                    'succeeded': sum(1 for result in results if result['success']),
+                    'failed': sum(1 for result in results if not result['success']),
+                }
+            })
+
+        except Service.DoesNotExist as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except (ValueError, TypeError) as e:
+            return Response({
+                'error': f'入力値が不正です: {str(e)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                'error': f'予期せぬエラーが発生しました: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class ShippingCalculatorCompareView(APIView):
+    def post(self, request):
+        """1つの荷物の送料を複数の配送サービスで比較（合計金額の安い順）"""
+        try:
+            country_code = request.data.get('country_code')
+            length = int(request.data.get('length', 0))
+            width = int(request.data.get('width', 0))
+            height = int(request.data.get('height', 0))
+            weight = float(request.data.get('weight', 0))
+            service_ids = request.data.get('service_ids')
+            ship_date = parse_ship_date(request.data.get('ship_date'))
+            # 入力値の検証
+            if not all([country_code, length, width, height, weight]):
+                return Response({
+                    'error': '必要なパラメータが不足しています'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            if service_ids is not None and (not isinstance(service_ids, list) or not service_ids):
+                return Response({
+                    'error': 'service_idsは配送サービスIDのリストで指定してください'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            quotes = ShippingCalculator.compare_services(
+                country_code, length, width, height, weight, service_ids, ship_date
+            )
+            return Response({
+                'success': True,
+                'message': 'データの取得に成功しました',
+                'data': {
+                    'quotes': quotes,
+                    'cheapest': next((quote for quote in quotes if quote['available']), None),
+                }
+            })
+
+        except Service.DoesNotExist as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except (ValueError, TypeError) as e:
+            return Response({
+                'error': f'入力値が不正です: {str(e)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                'error': f'予期せぬエラーが発生しました: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class ShippingConsolidationView(APIView):
+    MAX_ITEMS = 30
+    MAX_BOXES = 50
+    # 探索の制限時間（ミリ秒）として指定できる範囲
+    MIN_TIME_BUDGET_MS = 1
+    MAX_TIME_BUDGET_MS = 1000
+
+    def post(self, request):
+        """複数の商品をまとめて発送する場合の送料が最も安い箱詰めを計算"""
+        try:
+            service_id = request.data.get('service_id')
+            country_code = request.data.get('country_code')
+            items = request.data.get('items')
+            boxes = request.data.get('boxes')
+            time_budget_ms = request.data.get('time_budget_ms')
+            if not all([service_id, country_code]) or not isinstance(items, list) or not items \
+                    or not isinstance(boxes, list) or not boxes:
+                return Response({
+                    'error': '必要なパラメータが不足しています'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            if len(items) > self.MAX_ITEMS or len(boxes) > self.MAX_BOXES:
+                return Response({
+                    'error': f'一度に計算できる商品は{self.MAX_ITEMS}件、箱は{self.MAX_BOXES}件までです'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            if not all(isinstance(row, dict) for row in items + boxes):
+                return Response({
+                    'error': '入力値が不正です'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            consolidator = PackageConsolidator(
+                service_id,
+                parse_ship_date(request.data.get('ship_date')),
+                allow_oversize=str(request.data.get('allow_oversize', '')).lower() in ('1', 'true'),
+            )
+            if time_budget_ms is not None:
+                time_budget_ms = min(max(int(time_budget_ms), self.MIN_TIME_BUDGET_MS), self.MAX_TIME_BUDGET_MS)
+            result = consolidator.optimize(country_code, items, boxes, time_budget_ms)
+            return Response({
+                'success': True,
+                'message': 'データの取得に成功しました',
+                'data': result
+            })
+
+        except Service.DoesNotExist as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except ValidationError as e:
+            return Response({
+                'error': ' '.join(e.messages)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except (ValueError, TypeError, OverflowError) as e:
+            return Response({
+                'error': f'入力値が不正です: {str(e)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                'error': f'予期せぬエラーが発生しました: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class ShippingRateCardView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """配送サービスの料金表のバージョン一覧を取得"""
+        service_id = request.query_params.get('service_id')
+        rate_cards = ShippingRateCard.objects.order_by('service_id', '-version')
+        if service_id:
+            rate_cards = rate_cards.filter(service_id=service_id)
+        return Response({
+            'success': True,
+            'message': 'データの取得に成功しました',
+            'data': list(rate_cards.values(
+                'id', 'service_id', 'version', 'status', 'source', 'row_count', 'created_at', 'activated_at'
+            ))
+        })
+
+    def post(self, request):
+        """料金表のCSV（rates、任意でcountries・surcharges）を取り込んで入れ替える"""
+        rates = request.FILES.get('rates')
+        if not request.data.get('service_id') or rates is None:
+            return Response({
+                'error': '必要なパラメータが不足しています'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        def reader(name):
+            upload = request.FILES.get(name)
+            if upload is None:
+                return None
+            return csv.DictReader(io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline=''))
+
+        try:
+            report = RateCardImporter(request.data.get('service_id')).run(
+                rates=reader('rates'),
+                countries=reader('countries'),
+                surcharges=reader('surcharges'),
+                source=rates.name,
+                dry_run=str(request.data.get('dry_run', '')).lower() in ('1', 'true'),
+            )
+            return Response({
+                'success': True,
+                'message': '料金表の取り込みに成功しました',
+                'data': report
+            })
+        except ValidationError as e:
+            return Response({
+                'success': False,
+                'error': e.messages
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except UnicodeDecodeError:
+            return Response({
+                'error': 'CSVはUTF-8で保存してください'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({
+                'error': f'予期せぬエラーが発生しました: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class ShippingQuoteCacheView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """送料計算結果のキャッシュの統計（このプロセスで集計したもの）"""
+        return Response({
+            'success': True,
+            'message': 'データの取得に成功しました',
+            'data': quote_cache.stats()
+        })
+
+    def delete(self, request):
+        """キャッシュと統計をリセット"""
+        quote_cache.clear()
+        quote_cache.reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -12,5 +12,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
+# ASGIサーバー（uvicorn project.asgi:application など）で動かす場合は外部APIを呼ぶビューを非同期版にする
+os.environ.setdefault('ASYNC_VIEWS_ENABLED', 'True')
+# 注意: ASGIでは非同期版のない同期のDRFのビューはすべてasgirefのthread_sensitiveな単一のスレッドで実行されるため、
+# ASGIで動かすと非同期版のビュー以外のAPIは1件ずつ順番に処理される（同時に処理したい場合はWSGIで動かすこと）
 
 application = get_asgi_application()
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -153,7 +154,9 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'if-none-match',
 ]
+CORS_EXPOSE_HEADERS = ['etag']
 
 # 認証設定
 REST_FRAMEWORK = {
@@ -166,6 +169,44 @@ AUTHENTICATION_BACKENDS = (
     'django.contrib.auth.backends.ModelBackend',
 )
 
+# キャッシュ（プロセス内のキャッシュと全ワーカーで共有するキャッシュの2層。api.services.layered_cache）
+# 共有キャッシュはfile（既定。同じサーバーのワーカー間で共有）、db（python manage.py createcachetableでテーブルを作成）、
+# redis、memcachedのいずれか（いずれもadd・incrはワーカー間でアトミックに行う）
+CACHE_SHARED_BACKEND = os.getenv('CACHE_SHARED_BACKEND', 'file')
+_SHARED_CACHE_BACKENDS = {
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', os.path.join(tempfile.gettempdir(), 'market_king_cache')),
+    'db': ('django.core.cache.backends.db.DatabaseCache', 'api_cache'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/0'),
+    'memcached': ('django.core.cache.backends.memcached.PyMemcacheCache', '127.0.0.1:11211'),
+}
+CACHES = {
+    'default': {
+        'BACKEND': 'api.services.layered_cache.LayeredCache',
+        'LOCATION': 'default',
+        'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'market_king'),
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'SHARED': {
+                'BACKEND': _SHARED_CACHE_BACKENDS[CACHE_SHARED_BACKEND][0],
+                'LOCATION': os.getenv('CACHE_SHARED_LOCATION') or _SHARED_CACHE_BACKENDS[CACHE_SHARED_BACKEND][1],
+                'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_SHARED_MAX_ENTRIES', '10000'))},
+            },
+            'LOCAL_TIMEOUT': int(os.getenv('CACHE_LOCAL_TIMEOUT', '5')),
+            'LOCAL_MAX_ENTRIES': int(os.getenv('CACHE_LOCAL_MAX_ENTRIES', '1000')),
+            # 常に最新の値が必要な名前空間（バージョン番号・呼び出し回数・バックグラウンド処理の進捗）はプロセス内に保持しない
+            'LOCAL_EXCLUDE': ['rate_card', 'exchange_rate_history', 'ebay_call_quota', 'listing_pipeline', 'product_data_job'],
+            'LOCK_TIMEOUT': int(os.getenv('CACHE_LOCK_TIMEOUT', '10')),
+        },
+    },
+}
+
+# ASGIサーバー（uvicornなど）で動かす場合に外部APIを呼ぶビューを非同期版にする
+# （ASGIでは同期のビューは単一のスレッドで順番に実行される。詳しくはproject/asgi.pyを参照）
+ASYNC_VIEWS_ENABLED = os.getenv('ASYNC_VIEWS_ENABLED', 'False').lower() == 'true'
+# 非同期版のビューが使うHTTPクライアントの接続プール
+HTTP_CLIENT_MAX_CONNECTIONS = int(os.getenv('HTTP_CLIENT_MAX_CONNECTIONS', '100'))
+HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS', '20'))
+
 # eBay Settings
 EBAY_IS_SANDBOX = os.getenv('EBAY_IS_SANDBOX', 'True').lower() == 'true'
 EBAY_SANDBOX_URL = os.getenv('EBAY_SANDBOX_URL', 'https://api.sandbox.ebay.com')
@@ -173,6 +214,50 @@ EBAY_PRODUCTION_URL = os.getenv('EBAY_PRODUCTION_URL', 'https://api.ebay.com')
 EBAY_API_COMPATIBILITY_LEVEL = os.getenv('EBAY_API_COMPATIBILITY_LEVEL', '967')
 EBAY_API_SITE_ID = os.getenv('EBAY_API_SITE_ID', '0')
 EBAY_TOKEN_CACHE_KEY = os.getenv('EBAY_TOKEN_CACHE_KEY', 'ebay_auth_token')
-EBAY_TOKEN_CACHE_BUFFER = int(os.getenv('EBAY_TOKEN_CACHE_BUFFER', '300')) 
+EBAY_TOKEN_CACHE_BUFFER = int(os.getenv('EBAY_TOKEN_CACHE_BUFFER', '300'))
+EBAY_ITEM_CACHE_TIMEOUT = int(os.getenv('EBAY_ITEM_CACHE_TIMEOUT', '60'))
+EBAY_MAX_CONCURRENT_REQUESTS = int(os.getenv('EBAY_MAX_CONCURRENT_REQUESTS', '5'))
+EBAY_REQUEST_TIMEOUT = int(os.getenv('EBAY_REQUEST_TIMEOUT', '30'))
+EBAY_DAILY_CALL_QUOTA = int(os.getenv('EBAY_DAILY_CALL_QUOTA', '5000'))
+EBAY_BACKGROUND_QUOTA_RESERVE = float(os.getenv('EBAY_BACKGROUND_QUOTA_RESERVE', '0.2'))  # 画面操作用に残す割合
+EBAY_MAX_RETRIES = int(os.getenv('EBAY_MAX_RETRIES', '3'))
+EBAY_RETRY_BASE_DELAY = float(os.getenv('EBAY_RETRY_BASE_DELAY', '0.5'))
+EBAY_RETRY_MAX_DELAY = float(os.getenv('EBAY_RETRY_MAX_DELAY', '8'))
+EBAY_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('EBAY_CIRCUIT_FAILURE_THRESHOLD', '5'))
+EBAY_CIRCUIT_RECOVERY_TIMEOUT = int(os.getenv('EBAY_CIRCUIT_RECOVERY_TIMEOUT', '60'))
+EBAY_REPRICE_MIN_CHANGE = os.getenv('EBAY_REPRICE_MIN_CHANGE', '0.50')  # これ未満の価格変更は反映しない
+EBAY_REPRICE_MIN_CHANGE_RATIO = os.getenv('EBAY_REPRICE_MIN_CHANGE_RATIO', '0.01')
+EBAY_FINAL_VALUE_FEE_RATE = os.getenv('EBAY_FINAL_VALUE_FEE_RATE', '0.1325')  # 落札手数料率
+EBAY_FIXED_FEE = os.getenv('EBAY_FIXED_FEE', '0.30')  # 1注文あたりの固定手数料（USD）
+
+# 利益計算（目標利益率と、送料が不明な場合の国内送料（円））
+PROFIT_TARGET_MARGIN = os.getenv('PROFIT_TARGET_MARGIN', '0.20')
+PROFIT_DEFAULT_DOMESTIC_SHIPPING = os.getenv('PROFIT_DEFAULT_DOMESTIC_SHIPPING', '1000')
+
+# 検索から出品までのパイプライン（段の間のキューの上限、1回で処理する商品数の上限、共有キャッシュに進捗を残す秒数）
+LISTING_PIPELINE_QUEUE_SIZE = int(os.getenv('LISTING_PIPELINE_QUEUE_SIZE', '10'))
+LISTING_PIPELINE_MAX_ITEMS = int(os.getenv('LISTING_PIPELINE_MAX_ITEMS', '100'))
+LISTING_PIPELINE_CACHE_TIMEOUT = int(os.getenv('LISTING_PIPELINE_CACHE_TIMEOUT', '3600'))
+
+# 商品データの取得（キャッシュの有効期限、ジョブの状態を残す秒数、同時取得数、同期で待つ秒数、リクエストログの出力割合）
+PRODUCT_DATA_CACHE_TIMEOUT = int(os.getenv('PRODUCT_DATA_CACHE_TIMEOUT', '600'))
+PRODUCT_DATA_JOB_TIMEOUT = int(os.getenv('PRODUCT_DATA_JOB_TIMEOUT', '3600'))
+PRODUCT_DATA_MAX_WORKERS = int(os.getenv('PRODUCT_DATA_MAX_WORKERS', '4'))
+PRODUCT_DATA_SYNC_WAIT = float(os.getenv('PRODUCT_DATA_SYNC_WAIT', '2'))
+PRODUCT_DATA_LOG_SAMPLE_RATE = float(os.getenv('PRODUCT_DATA_LOG_SAMPLE_RATE', '0.01'))
+
+# 送料計算結果のLRUキャッシュの最大件数（0の場合はキャッシュしない）
+SHIPPING_QUOTE_CACHE_SIZE = int(os.getenv('SHIPPING_QUOTE_CACHE_SIZE', '10000'))
+# 他のプロセスでのマスタデータの変更（料金表のバージョン）を確認する間隔（秒）
+SHIPPING_RATE_CARD_VERSION_CHECK_INTERVAL = float(os.getenv('SHIPPING_RATE_CARD_VERSION_CHECK_INTERVAL', '1'))
+# 同梱発送の箱詰めの探索の制限時間（ミリ秒）
+SHIPPING_CONSOLIDATION_TIME_BUDGET_MS = int(os.getenv('SHIPPING_CONSOLIDATION_TIME_BUDGET_MS', '200'))
 
 EXCHANGE_RATE_API_KEY = os.getenv('EXCHANGE_RATE_API_KEY')
+EXCHANGE_RATE_BASE_CURRENCY = os.getenv('EXCHANGE_RATE_BASE_CURRENCY', 'USD')
+EXCHANGE_RATE_REQUEST_TIMEOUT = float(os.getenv('EXCHANGE_RATE_REQUEST_TIMEOUT', '5'))
+# 為替レート表のバックグラウンド更新（有効期限の1時間より前に取得し直す）
+EXCHANGE_RATE_REFRESHER_ENABLED = os.getenv('EXCHANGE_RATE_REFRESHER_ENABLED', 'False').lower() == 'true'
+EXCHANGE_RATE_REFRESH_AFTER = int(os.getenv('EXCHANGE_RATE_REFRESH_AFTER', '2700'))
+EXCHANGE_RATE_REFRESH_CHECK_INTERVAL = int(os.getenv('EXCHANGE_RATE_REFRESH_CHECK_INTERVAL', '60'))
+EXCHANGE_RATE_REFRESH_CURRENCIES = os.getenv('EXCHANGE_RATE_REFRESH_CURRENCIES', '')
@@ -0,0 +1,43 @@
+import { apiClient } from '../client';
+import type { ApiResponse } from '@/lib/types/api';
+
+export interface CurrencyConvertParams {
+    amounts: (number | string)[];
+    from_currency?: string;
+    to_currency?: string;
+    decimal_places?: number;
+}
+
+export interface CurrencyConvertResult {
+    from_currency: string;
+    to_currency: string;
+    rate: number;
+    as_of: string | null;
+    stale: boolean;
+    source: 'live' | 'last_known_good' | 'default';
+    amounts: string[];
+}
+
+export const convertCurrencies = async (params: CurrencyConvertParams): Promise<ApiResponse<CurrencyConvertResult>> => {
+    const response = await apiClient.post('currency/convert/', params);
+    return response.data;
+};
+
+export interface CurrencyHistoryRate {
+    date: string;
+    rate: number;
+    as_of: string | null;
+}
+
+export interface CurrencyHistoryResult {
+    from_currency: string;
+    to_currency: string;
+    rates: CurrencyHistoryRate[];
+}
+
+export const getCurrencyHistory = async (dates: string[], fromCurrency = 'JPY', toCurrency = 'USD'): Promise<ApiResponse<CurrencyHistoryResult>> => {
+    const response = await apiClient.get('currency/history/', {
+        params: { dates: dates.join(','), from_currency: fromCurrency, to_currency: toCurrency },
+    });
+    return response.data;
+};
\ No newline at end of file
@@ -0,0 +1,73 @@
+import { apiClient } from '../client';
+import type { ApiResponse } from '@/lib/types/api';
+import type { ShippingPackage } from './shipping-calculator';
+
+export type PipelineStageName = 'search' | 'detail' | 'pricing' | 'shipping' | 'register';
+
+export interface ListingPipelineParams {
+    search: { p: string; [key: string]: string | number | undefined };
+    listing: { categoryId: string; conditionId?: string; shippingService?: string; [key: string]: unknown };
+    service_id: number;
+    country_code: string;
+    package: Omit<ShippingPackage, 'country_code'>;
+    ship_date?: string;
+    max_items?: number;
+    dry_run?: boolean;
+    concurrency?: Partial<Record<Exclude<PipelineStageName, 'search'>, number>>;
+    queue_size?: number;
+}
+
+export interface PipelineStageStats {
+    concurrency: number;
+    processed: number;
+    failed: number;
+    in_flight: number;
+    backlog: number;
+    max_backlog: number;
+    queue_size: number;
+    throughput: number;
+    avg_latency_ms: number | null;
+    blocked_seconds: number;
+}
+
+export type PipelineResult = {
+    url: string | null;
+    title: string | null;
+} & ({
+    success: true;
+    start_price: string;
+    shipping_cost: string;
+    registration: Record<string, unknown>;
+} | { success: false; stage: PipelineStageName; error: string });
+
+export interface ListingPipeline {
+    id: string;
+    status: 'pending' | 'running' | 'completed' | 'cancelled' | 'failed';
+    error: string | null;
+    dry_run: boolean;
+    elapsed_seconds: number;
+    stages: Record<PipelineStageName, PipelineStageStats>;
+    succeeded: number;
+    failed: number;
+    results?: PipelineResult[];
+}
+
+export const startListingPipeline = async (params: ListingPipelineParams): Promise<ApiResponse<ListingPipeline>> => {
+    const response = await apiClient.post('listing-pipeline/', params);
+    return response.data;
+};
+
+export const getListingPipelines = async (): Promise<ApiResponse<ListingPipeline[]>> => {
+    const response = await apiClient.get('listing-pipeline/');
+    return response.data;
+};
+
+export const getListingPipeline = async (id: string): Promise<ApiResponse<ListingPipeline>> => {
+    const response = await apiClient.get(`listing-pipeline/${id}/`);
+    return response.data;
+};
+
+export const cancelListingPipeline = async (id: string): Promise<ApiResponse<ListingPipeline>> => {
+    const response = await apiClient.delete(`listing-pipeline/${id}/`);
+    return response.data;
+};
\ No newline at end of file
@@ -1,8 +1,13 @@
 import { apiClient } from '../client';
 import type { ApiResponse } from '@/lib/types/api';
-import type { ProductRegisterParams, ProductData } from '@/lib/types/product-register';
+import type { ProductRegisterParams, ProductDataResponse, ProductDataJob } from '@/lib/types/product-register';
 
-export const registerProduct = async (params: ProductRegisterParams): Promise<ApiResponse<ProductData>> => {
+export const registerProduct = async (params: ProductRegisterParams): Promise<ApiResponse<ProductDataResponse>> => {
     const response = await apiClient.post('product-register/', params);
     return response.data;
-}; 
\ No newline at end of file
+};
+
+export const getProductDataJob = async (jobId: string): Promise<ApiResponse<ProductDataJob>> => {
+    const response = await apiClient.get(`product-register/jobs/${jobId}/`);
+    return response.data;
+};
\ No newline at end of file
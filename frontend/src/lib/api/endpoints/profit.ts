@@ -0,0 +1,59 @@
+import { apiClient } from '../client';
+import type { ApiResponse } from '@/lib/types/api';
+import type { ShippingPackage } from './shipping-calculator';
+
+export interface ProfitListing {
+    title: string;
+    url: string | null;
+    price: string;
+    buy_now_price?: string | null;
+    shipping?: string | null;
+    ebay_price?: number | null;
+    length?: number;
+    width?: number;
+    height?: number;
+    weight?: number;
+}
+
+export interface ProfitCalculateParams {
+    service_id: number;
+    country_code: string;
+    items: ProfitListing[];
+    package: Omit<ShippingPackage, 'country_code'>;
+    ship_date?: string;
+    target_margin?: number;
+    currency?: string;
+    use_buy_now?: boolean;
+}
+
+export type ProfitRow = {
+    url: string | null;
+    title: string;
+} & ({
+    success: true;
+    purchase_price: number;
+    domestic_shipping: number;
+    international_shipping: number;
+    landed_cost_jpy: number;
+    landed_cost: number;
+    target_price: number;
+    ebay_price: number | null;
+    profit: number | null;
+    margin: number | null;
+} | { success: false; error: string });
+
+export interface ProfitCalculateResult {
+    currency: string;
+    rate: number;
+    rate_as_of: string | null;
+    rate_source: 'live' | 'last_known_good' | 'default';
+    target_margin: number;
+    results: ProfitRow[];
+    succeeded: number;
+    failed: number;
+}
+
+export const calculateProfit = async (params: ProfitCalculateParams): Promise<ApiResponse<ProfitCalculateResult>> => {
+    const response = await apiClient.post('profit/calculate/', params);
+    return response.data;
+};
\ No newline at end of file
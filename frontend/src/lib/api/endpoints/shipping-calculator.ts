@@ -29,6 +29,7 @@ export interface ShippingCalculatorParams {
     width: number;
     height: number;
     weight: number;
+    ship_date?: string;
 }
 
 export interface ShippingCalculatorInitialData {
@@ -44,4 +45,88 @@ export const getShippingCalculatorData = async (): Promise<ApiResponse<ShippingC
 export const calculateShipping = async (params: ShippingCalculatorParams): Promise<ApiResponse<ShippingResult>> => {
     const response = await apiClient.post('shipping-calculator/', params);
     return response.data;
-}; 
\ No newline at end of file
+}; 
+
+export interface ShippingPackage {
+    country_code: string;
+    length: number;
+    width: number;
+    height: number;
+    weight: number;
+}
+
+export interface ShippingBatchResult {
+    results: ({ success: true; data: ShippingResult } | { success: false; error: string })[];
+    succeeded: number;
+    failed: number;
+}
+
+export const calculateShippingBatch = async (serviceId: number, packages: ShippingPackage[]): Promise<ApiResponse<ShippingBatchResult>> => {
+    const response = await apiClient.post('shipping-calculator/batch/', { service_id: serviceId, packages });
+    return response.data;
+};
+
+export interface ShippingQuote extends Partial<ShippingResult> {
+    service_id: number;
+    service_name: string;
+    available: boolean;
+    reason?: string;
+}
+
+export interface ShippingCompareResult {
+    quotes: ShippingQuote[];
+    cheapest: ShippingQuote | null;
+}
+
+export const compareShipping = async (params: Omit<ShippingCalculatorParams, 'service_id'> & { service_ids?: number[] }): Promise<ApiResponse<ShippingCompareResult>> => {
+    const response = await apiClient.post('shipping-calculator/compare/', params);
+    return response.data;
+};
+
+export interface ConsolidationItem {
+    id?: string | number;
+    length: number;
+    width: number;
+    height: number;
+    weight: number;
+}
+
+export interface ConsolidationBox {
+    name: string;
+    length: number;
+    width: number;
+    height: number;
+    weight?: number;
+}
+
+export interface ConsolidatedPackage {
+    box: string;
+    length: number;
+    width: number;
+    height: number;
+    items: (string | number)[];
+    weight: number;
+    quote: ShippingResult;
+}
+
+export interface ConsolidationResult {
+    packages: ConsolidatedPackage[];
+    total_amount: number;
+    separate_amount: number;
+    optimal: boolean;
+    evaluated: number;
+    elapsed_ms: number;
+}
+
+export const consolidateShipping = async (params: {
+    service_id: number;
+    country_code: string;
+    items: ConsolidationItem[];
+    boxes: ConsolidationBox[];
+    ship_date?: string;
+    allow_oversize?: boolean;
+    time_budget_ms?: number;
+}): Promise<ApiResponse<ConsolidationResult>> => {
+    const response = await apiClient.post('shipping-calculator/consolidate/', params);
+    return response.data;
+};
\ No newline at end of file
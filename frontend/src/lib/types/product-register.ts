@@ -20,4 +20,35 @@ export interface GetRequestDataParams {
     source: string;
     url: string;
     categoryId: string;
-} 
\ No newline at end of file
+} 
+
+export type YahooAuctionItemDetail = {
+    auction_id: string;
+    url: string;
+    title: string;
+    price: string;
+    buy_now_price: string | null;
+    image_urls: string[];
+    description: string | null;
+    condition: string | null;
+    category_id: string | null;
+    seller: string | null;
+    end_time: string | null;
+    bid_count: string | number | null;
+    shipping: string | null;
+};
+
+export type ProductDataResponse = ProductRegisterParams & ({
+    item: YahooAuctionItemDetail;
+    cached: boolean;
+} | {
+    job_id: string;
+    status: 'pending' | 'running';
+});
+
+export type ProductDataJob = ProductRegisterParams & {
+    job_id: string;
+    status: 'pending' | 'running' | 'completed' | 'failed';
+    item: YahooAuctionItemDetail | null;
+    error: string | null;
+};
\ No newline at end of file